@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+""" PyBibim의 핵심 datatype과 lexer, parser, scheduler의 실행 속도를 따로 측정합니다.
+
+benchmark마다 한 번 실행하는 데 min-time 이상 걸리도록 반복 횟수를 정한 뒤, 여러
+번 실행해서 연산 하나에 걸린 시간의 중앙값과 초당 연산 수를 JSON 파일로 저장합니다.
+lexer와 parser는 token 하나를 연산 하나로 셉니다. 결과는 benchmark/run.py와 같은
+형식이며, 저장된 baseline보다 허용한 비율을 넘게 느려진 benchmark가 있으면 1을
+반환하며 종료합니다.
+
+번역하지 않은 interpreter의 code를 직접 실행하므로 Python 2와 rpython이 필요합니다.
+
+사용법::
+
+    python benchmark/micro.py [--runs N] [--min-time SEC] [--only NAME] [--list]
+                              [--output PATH] [--baseline PATH]
+                              [--threshold PERCENT] [--update-baseline]
+"""
+from __future__ import print_function
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, BENCHMARK_DIR)
+
+from rpython.rlib.rbigint import rbigint  # noqa: E402
+
+from bibim.datatype import Bowl, Noodle, Number, ValueExpr, \
+    Wad  # noqa: E402
+from bibim.evaluator import Evaluator  # noqa: E402
+from bibim.interpreter import Interpreter, current  # noqa: E402
+from bibim.lexer import lexer, TokenList  # noqa: E402
+from bibim.optimizer import fold_constants  # noqa: E402
+from bibim.parser import parser  # noqa: E402
+from bibim.scheduler import Scheduler  # noqa: E402
+from run import DEFAULT_THRESHOLD, check_baseline, write_json  # noqa: E402
+
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "micro_results.json")
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "micro_baseline.json")
+DEFAULT_MIN_TIME = 0.1
+
+# lexer, parser와 scheduler를 측정할 프로그램
+PROGRAM = os.path.join(ROOT, "testcode", "euler_3.bibim")
+
+# Bowl의 get_noodle과 set_noodle을 측정할 cell 수
+BOWL_SIZES = [10, 1000, 100000]
+
+# 한 번 반복할 때 읽고 쓰는 cell 수의 최댓값
+SAMPLE_SIZE = 1000
+
+
+def timer():
+    return time.time()
+
+
+class MicroBenchmark(object):
+    """ 측정할 연산 하나를 담는 class입니다. """
+
+    def __init__(self, name, setup):
+        """ 새로운 MicroBenchmark를 생성합니다.
+
+        setup은 인자 없이 호출되며, (loops를 받아 그만큼 반복하는 데 걸린 초를
+        반환하는 함수, 한 번 반복할 때의 연산 수)를 반환해야 합니다.
+
+        :param name: benchmark 이름
+        :type name: str
+        :param setup: 측정할 함수를 준비하는 함수
+        :type setup: callable
+        """
+        self.name = name
+        self.setup = setup
+
+
+def timed(body, ops_per_loop=1):
+    """ body를 loops번 호출하는 측정 함수와 연산 수를 반환합니다.
+
+    :param body: 인자 없이 연산을 ops_per_loop번 수행하는 함수
+    :type body: callable
+    :param ops_per_loop: body 한 번의 연산 수
+    :type ops_per_loop: int
+    :rtype: (callable, int)
+    """
+    def run(loops):
+        start = timer()
+        for _ in itertools.repeat(None, loops):
+            body()
+        return timer() - start
+    return run, ops_per_loop
+
+
+def small(num, den=1):
+    return Number.from_ints(num, den)
+
+
+def big(bits, den_bits=0):
+    """ bits 비트의 분자와 den_bits 비트의 분모를 가지는 Number를 반환합니다.
+
+    :type bits: int
+    :type den_bits: int
+    :rtype: Number
+    """
+    numerator = rbigint.fromint(1).lshift(bits).sub(rbigint.fromint(3))
+    if den_bits == 0:
+        return Number(numerator)
+    return Number(numerator, rbigint.fromint(1).lshift(den_bits).add(
+        rbigint.fromint(1)))
+
+
+def number_benchmarks():
+    operands = [
+        ("small_int", small(123456), small(7891)),
+        ("small_fraction", small(355, 113), small(22, 7)),
+        ("big_int", big(256), big(200)),
+        ("big_fraction", big(256, 128), big(200, 100)),
+    ]
+    result = []
+    for kind, a, b in operands:
+        for op in ("add", "mul", "lt", "eq"):
+            result.append(MicroBenchmark(
+                "number_%s_%s" % (op, kind),
+                lambda a=a, b=b, op=op: timed(lambda: getattr(a, op)(b))))
+    result.append(MicroBenchmark(
+        "number_gcd_small",
+        lambda: timed(lambda: Number.int_gcd(1234567 * 89, 1234567 * 97))))
+    x = rbigint.fromint(1).lshift(256).sub(rbigint.fromint(1))
+    y = rbigint.fromint(1).lshift(192).sub(rbigint.fromint(1))
+    result.append(MicroBenchmark(
+        "number_gcd_big", lambda: timed(lambda: Number.gcd(x, y))))
+    return result
+
+
+def make_bowl(kind, size):
+    """ size개의 cell을 가지는 Bowl과 cell의 noodle number 목록을 반환합니다.
+
+    dense는 i번째 cell의 noodle number가 i인 Bowl, sparse는 2i인 Bowl,
+    memory는 noodle number가 i + 2인 cell을 가지는 Memory입니다.
+
+    :type kind: str
+    :type size: int
+    :rtype: (Bowl, list[Number])
+    """
+    value = ValueExpr(Number.ONE())
+    if kind == "memory":
+        bowl = Interpreter().memory
+        keys = [small(i + 2) for i in range(size)]
+        for key in keys:
+            bowl.set_noodle(key, value)
+        return bowl, keys
+    step = 1 if kind == "dense" else 2
+    keys = [small(i * step) for i in range(size)]
+    wad = Wad(None)
+    for key in keys:
+        wad.put(Noodle(ValueExpr(key), value))
+    return Bowl(wad), keys
+
+
+def bowl_setup(kind, size, op):
+    def setup():
+        bowl, keys = make_bowl(kind, size)
+        if len(keys) > SAMPLE_SIZE:
+            keys = random.Random(size).sample(keys, SAMPLE_SIZE)
+        value = ValueExpr(Number.ONE())
+        if op == "get":
+            def body():
+                for key in keys:
+                    bowl.get_noodle(key)
+        else:
+            def body():
+                for key in keys:
+                    bowl.set_noodle(key, value)
+        return timed(body, len(keys))
+    return setup
+
+
+def bowl_benchmarks():
+    result = []
+    for kind in ("dense", "sparse", "memory"):
+        for size in BOWL_SIZES:
+            for op in ("get", "set"):
+                result.append(MicroBenchmark(
+                    "bowl_%s_noodle_%s_%d" % (op, kind, size),
+                    bowl_setup(kind, size, op)))
+    return result
+
+
+def string_benchmarks():
+    text = (u"Hello, Bibim! 안녕하세요, 비빔! " * 32).encode("utf-8")
+    length = len(text.decode("utf-8"))
+
+    def to_str_setup():
+        # from_str이 만드는 Bowl은 문자열을 그대로 가지고 있으므로, Wad에
+        # Noodle을 담은 Bowl로 바꿔서 측정합니다.
+        bowl = Bowl(Bowl.from_str(text).wad())
+        return timed(lambda: Bowl.to_str(bowl), length)
+
+    return [
+        MicroBenchmark("bowl_from_str",
+                       lambda: timed(lambda: Bowl.from_str(text), length)),
+        MicroBenchmark("bowl_to_str", to_str_setup),
+    ]
+
+
+def read_program():
+    with open(PROGRAM, "rb") as f:
+        return f.read()
+
+
+def lex_setup():
+    code = read_program()
+    tokens = len(lexer.lex_all(code).tokens)
+
+    def body():
+        for _ in lexer.lex(code):
+            pass
+    return timed(body, tokens)
+
+
+def parse_setup():
+    tokens = lexer.lex_all(read_program()).tokens
+    return timed(lambda: parser.parse(TokenList(tokens, None)), len(tokens))
+
+
+def schedule_setup(invalidate):
+    def setup():
+        bowl = fold_constants(parser.parse(lexer.lex(read_program())))
+        scheduler = Scheduler(bowl, Evaluator())
+        mem = current().memory
+        cell = small(2)
+        for nn in range(2, 5):
+            mem.set_noodle(small(nn), ValueExpr(small(1)))
+        mem.set_current_noodle_number(ValueExpr(small(0)))
+        scheduler.get_next_noodle()
+        if not invalidate:
+            return timed(scheduler.get_next_noodle)
+        values = [ValueExpr(small(1)), ValueExpr(small(2))]
+
+        def body():
+            # @:2를 바꾸면 @:2를 읽는 noodle number를 모두 다시 평가합니다.
+            mem.set_noodle(cell, values[0])
+            scheduler.get_next_noodle()
+            mem.set_noodle(cell, values[1])
+            scheduler.get_next_noodle()
+        return timed(body, 2)
+    return setup
+
+
+def all_benchmarks():
+    return number_benchmarks() + bowl_benchmarks() + string_benchmarks() + [
+        MicroBenchmark("lexer_lex", lex_setup),
+        MicroBenchmark("parser_parse", parse_setup),
+        MicroBenchmark("scheduler_get_next_noodle", schedule_setup(False)),
+        MicroBenchmark("scheduler_get_next_noodle_after_write",
+                       schedule_setup(True)),
+    ]
+
+
+def calibrate(run, min_time):
+    """ 한 번 측정하는 데 min_time초 이상 걸리는 반복 횟수를 반환합니다.
+
+    :param run: 측정 함수
+    :type run: callable
+    :param min_time: 한 번 측정하는 데 걸릴 최소 시간
+    :type min_time: float
+    :rtype: int
+    """
+    loops = 1
+    while loops < 1 << 30:
+        if run(loops) >= min_time:
+            break
+        loops *= 2
+    return loops
+
+
+def measure(benchmark, runs, min_time):
+    """ benchmark를 측정한 결과를 반환합니다.
+
+    :type benchmark: MicroBenchmark
+    :param runs: 측정 횟수
+    :type runs: int
+    :param min_time: 한 번 측정하는 데 걸릴 최소 시간
+    :type min_time: float
+    :rtype: dict
+    """
+    run, ops_per_loop = benchmark.setup()
+    loops = calibrate(run, min_time)
+    ops = loops * ops_per_loop
+    times = sorted(run(loops) * 1e9 / ops for _ in range(runs))
+    median = times[len(times) // 2]
+    return {
+        "ns_per_op": round(median, 3),
+        "min_ns_per_op": round(times[0], 3),
+        "ops_per_sec": round(1e9 / median, 1) if median > 0 else 0.0,
+        "ops": ops,
+    }
+
+
+def main(argv):
+    arg_parser = argparse.ArgumentParser(
+        description="PyBibim microbenchmarks")
+    arg_parser.add_argument("--runs", type=int, default=5,
+                         help="number of measured runs per benchmark")
+    arg_parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME,
+                         help="minimum seconds per measured run")
+    arg_parser.add_argument("--only", action="append", default=None,
+                         metavar="NAME", help="run only the named benchmark")
+    arg_parser.add_argument("--list", action="store_true",
+                         help="list the benchmarks and exit")
+    arg_parser.add_argument("--output", default=DEFAULT_OUTPUT,
+                         help="where to write the results")
+    arg_parser.add_argument("--baseline", default=DEFAULT_BASELINE,
+                         help="results to compare against")
+    arg_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                         help="allowed slowdown per operation in percent")
+    arg_parser.add_argument("--update-baseline", action="store_true",
+                         help="store the results as the new baseline")
+    args = arg_parser.parse_args(argv[1:])
+    if args.runs < 1:
+        arg_parser.error("--runs must be at least 1")
+
+    selected = all_benchmarks()
+    if args.list:
+        for benchmark in selected:
+            print(benchmark.name)
+        return 0
+    if args.only is not None:
+        selected = [b for b in selected if b.name in args.only]
+        if not selected:
+            arg_parser.error("no benchmark named %s" % ", ".join(args.only))
+
+    entries = {}
+    for benchmark in selected:
+        entry = measure(benchmark, args.runs, args.min_time)
+        entries[benchmark.name] = entry
+        print("%-44s %14.1f ns/op %16.1f ops/s" % (
+            benchmark.name, entry["ns_per_op"], entry["ops_per_sec"]))
+
+    document = {"runs": args.runs, "results": {"micro": entries}}
+    write_json(args.output, document)
+    return check_baseline(document, args.baseline, args.update_baseline,
+                          args.threshold, "ns_per_op", "ns")
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,373 @@
+# -*- coding: utf-8 -*-
+""" testcode의 프로그램과 그 변형으로 PyBibim의 실행 시간을 측정합니다.
+
+benchmark마다 프로그램을 여러 번 실행해서 걸린 시간의 중앙값과 p95, 실행한 step
+수, Memory cell 수의 최댓값과 최대 RSS를 JSON 파일로 저장합니다. 저장된 baseline이
+있으면 중앙값을 baseline과 비교해서, 허용한 비율보다 느려진 benchmark가 있으면 1을
+반환하며 종료합니다.
+
+번역하지 않은 interpreter(pybibim.py)로 항상 측정하고, 번역한 bbm binary가 있으면
+bbm으로도 측정합니다. --vm을 주면 두 interpreter 모두 bytecode VM으로 실행합니다.
+
+사용법::
+
+    python benchmark/run.py [--runs N] [--heavy] [--only NAME]
+                            [--python PATH] [--bbm PATH | --no-bbm] [--vm]
+                            [--output PATH] [--baseline PATH]
+                            [--threshold PERCENT] [--update-baseline]
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TESTCODE = os.path.join(ROOT, "testcode")
+PYBIBIM = os.path.join(ROOT, "src", "pybibim.py")
+DEFAULT_BBM = os.path.join(ROOT, "bbm")
+DEFAULT_OUTPUT = os.path.join(ROOT, "benchmark", "results.json")
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmark", "baseline.json")
+
+# baseline의 중앙값보다 이 비율(%)을 넘게 느려지면 실패로 처리합니다.
+DEFAULT_THRESHOLD = 25.0
+
+# 표준 입력을 읽는 프로그램에 주는 입력
+INPUTS = {
+    "echo": b"Hello, Bibim!\n",
+}
+
+
+class Benchmark(object):
+    """ 실행할 프로그램 하나와 그 입력을 담는 class입니다. """
+
+    def __init__(self, name, source, stdin=b"", heavy=False):
+        """ 새로운 Benchmark를 생성합니다.
+
+        :param name: benchmark 이름
+        :type name: str
+        :param source: 실행할 Bibim code
+        :type source: str
+        :param stdin: 표준 입력으로 줄 내용
+        :type stdin: bytes
+        :param heavy: --heavy를 주었을 때만 실행할지 여부
+        :type heavy: bool
+        """
+        self.name = name
+        self.source = source
+        self.stdin = stdin
+        self.heavy = heavy
+
+
+class Variant(object):
+    """ testcode 프로그램의 상수나 입력을 바꿔서 더 오래 실행되게 만든
+    benchmark입니다.
+    """
+
+    def __init__(self, name, base, old=None, new=None, stdin=b"",
+                 heavy=False):
+        """ 새로운 Variant를 생성합니다.
+
+        :param name: benchmark 이름
+        :type name: str
+        :param base: 바꿀 testcode 프로그램의 이름
+        :type base: str
+        :param old: 프로그램에서 바꿀 문자열. None이면 프로그램을 바꾸지 않습니다.
+        :type old: bytes|None
+        :param new: old 대신 넣을 문자열
+        :type new: bytes|None
+        :param stdin: 표준 입력으로 줄 내용
+        :type stdin: bytes
+        :param heavy: --heavy를 주었을 때만 실행할지 여부
+        :type heavy: bool
+        """
+        self.name = name
+        self.base = base
+        self.old = old
+        self.new = new
+        self.stdin = stdin
+        self.heavy = heavy
+
+    def benchmark(self):
+        source = read_source(os.path.join(TESTCODE, self.base + ".bibim"))
+        if self.old is not None:
+            if source.count(self.old) != 1:
+                raise ValueError("%s: %r must appear exactly once in %s"
+                                 % (self.name, self.old, self.base))
+            source = source.replace(self.old, self.new)
+        return Benchmark(self.name, source, self.stdin, self.heavy)
+
+
+VARIANTS = [
+    Variant("euler_1_10000", "euler_1", b"< 1000)", b"< 10000)", heavy=True),
+    Variant("euler_1_100000", "euler_1", b"< 1000)", b"< 100000)",
+            heavy=True),
+    Variant("fizzbuzz_1000", "fizzbuzz_without_number", b"< 100 + 1)",
+            b"< 1000 + 1)"),
+    Variant("fizzbuzz_100000", "fizzbuzz_without_number", b"< 100 + 1)",
+            b"< 100000 + 1)", heavy=True),
+    Variant("echo_1mb", "echo", stdin=b"Hello, Bibim!\n" * 74899),
+]
+
+
+def read_source(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def benchmarks(heavy):
+    """ 실행할 Benchmark 목록을 반환합니다.
+
+    :param heavy: 오래 걸리는 변형도 포함할지 여부
+    :type heavy: bool
+    :rtype: list[Benchmark]
+    """
+    result = []
+    for name in sorted(os.listdir(TESTCODE)):
+        if not name.endswith(".bibim"):
+            continue
+        name = name[:-len(".bibim")]
+        result.append(Benchmark(name, read_source(
+            os.path.join(TESTCODE, name + ".bibim")), INPUTS.get(name, b"")))
+    for variant in VARIANTS:
+        if heavy or not variant.heavy:
+            result.append(variant.benchmark())
+    return result
+
+
+def run_once(command, stdin_path, stats_path):
+    """ command를 한 번 실행하고 걸린 시간(ms)과 최대 RSS(KB)를 반환합니다.
+
+    :param command: 실행할 명령
+    :type command: list[str]
+    :param stdin_path: 표준 입력으로 줄 파일
+    :type stdin_path: str
+    :param stats_path: --stats로 실행 통계를 저장할 파일
+    :type stats_path: str
+    :rtype: (float, int)
+    """
+    with open(stdin_path, "rb") as stdin, \
+            open(os.devnull, "wb") as devnull:
+        start = time.time()
+        process = subprocess.Popen(command + ["--stats", stats_path],
+                                   stdin=stdin, stdout=devnull,
+                                   stderr=devnull)
+        # Popen.wait는 rusage를 주지 않으므로 직접 기다립니다.
+        _, status, rusage = os.wait4(process.pid, 0)
+        elapsed = (time.time() - start) * 1000
+    process.returncode = status
+    if status != 0:
+        raise RuntimeError("%s exited with status %d"
+                           % (" ".join(command), os.WEXITSTATUS(status)))
+    return elapsed, rusage.ru_maxrss
+
+
+def percentile(times, percent):
+    """ 정렬된 times의 percent 백분위수를 nearest-rank 방식으로 반환합니다.
+
+    :type times: list[float]
+    :type percent: int
+    :rtype: float
+    """
+    rank = (len(times) * percent + 99) // 100
+    return times[max(rank, 1) - 1]
+
+
+def measure(command, benchmark, runs, workdir):
+    """ benchmark를 runs번 실행한 결과를 반환합니다.
+
+    첫 실행은 parser table cache를 만들 수 있으므로 측정하지 않습니다.
+
+    :param command: interpreter를 실행할 명령
+    :type command: list[str]
+    :type benchmark: Benchmark
+    :type runs: int
+    :param workdir: 프로그램과 입력을 저장할 임시 디렉터리
+    :type workdir: str
+    :rtype: dict
+    """
+    program = os.path.join(workdir, benchmark.name + ".bibim")
+    stdin_path = os.path.join(workdir, benchmark.name + ".in")
+    stats_path = os.path.join(workdir, benchmark.name + ".json")
+    with open(program, "wb") as f:
+        f.write(benchmark.source)
+    with open(stdin_path, "wb") as f:
+        f.write(benchmark.stdin)
+    command = command + [program]
+
+    run_once(command, stdin_path, stats_path)
+    times = []
+    max_rss = 0
+    for _ in range(runs):
+        elapsed, rss = run_once(command, stdin_path, stats_path)
+        times.append(elapsed)
+        max_rss = max(max_rss, rss)
+    times.sort()
+    with open(stats_path, "rb") as f:
+        stats = json.load(f)
+    return {
+        "median_ms": round(times[len(times) // 2], 3),
+        "p95_ms": round(percentile(times, 95), 3),
+        "min_ms": round(times[0], 3),
+        "steps": stats["steps"],
+        "peak_memory_cells": stats["memory"]["peak_cells"],
+        "max_rss_kb": max_rss,
+    }
+
+
+def compare(results, baseline, threshold, metric="median_ms", unit="ms"):
+    """ results의 metric 값을 baseline과 비교하고, 느려진 benchmark를 반환합니다.
+
+    :param results: 이번 실행 결과
+    :type results: dict
+    :param baseline: 저장된 baseline
+    :type baseline: dict
+    :param threshold: 허용하는 느려진 비율(%)
+    :type threshold: float
+    :param metric: 비교할 값의 key. 작을수록 빠른 값이어야 합니다.
+    :type metric: str
+    :param unit: metric 값의 단위
+    :type unit: str
+    :return: (group, benchmark 이름, baseline 대비 비율)의 목록
+    :rtype: list[(str, str, float)]
+    """
+    regressions = []
+    for group, entries in sorted(results.items()):
+        base_entries = baseline.get(group, {})
+        for name, entry in sorted(entries.items()):
+            base = base_entries.get(name)
+            if base is None:
+                continue
+            ratio = entry[metric] / base[metric]
+            mark = ""
+            if ratio > 1 + threshold / 100.0:
+                regressions.append((group, name, ratio))
+                mark = "  REGRESSION"
+            if "steps" in entry and entry["steps"] != base.get("steps"):
+                mark += "  (steps %s -> %d)" % (base.get("steps"),
+                                                entry["steps"])
+            print("%-8s %-32s %10.1f %s -> %10.1f %s  %+6.1f%%%s" % (
+                group, name, base[metric], unit, entry[metric], unit,
+                (ratio - 1) * 100, mark))
+    return regressions
+
+
+def write_json(path, document):
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, sort_keys=True,
+                  separators=(",", ": "))
+        f.write("\n")
+
+
+def check_baseline(document, baseline_path, update_baseline, threshold,
+                   metric="median_ms", unit="ms"):
+    """ document의 결과를 baseline과 비교하고, 종료 코드를 반환합니다.
+
+    update_baseline이 True이면 비교하지 않고 document를 새 baseline으로
+    저장합니다.
+
+    :param document: 이번 실행 결과를 담은 JSON 문서
+    :type document: dict
+    :param baseline_path: baseline 파일 경로
+    :type baseline_path: str
+    :param update_baseline: baseline을 새로 저장할지 여부
+    :type update_baseline: bool
+    :param threshold: 허용하는 느려진 비율(%)
+    :type threshold: float
+    :param metric: 비교할 값의 key
+    :type metric: str
+    :param unit: metric 값의 단위
+    :type unit: str
+    :return: 느려진 benchmark가 있으면 1, 없으면 0
+    :rtype: int
+    """
+    if update_baseline:
+        write_json(baseline_path, document)
+        print("baseline written to %s" % baseline_path)
+        return 0
+    if not os.path.exists(baseline_path):
+        print("no baseline at %s, nothing to compare" % baseline_path)
+        return 0
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)["results"]
+    print()
+    regressions = compare(document["results"], baseline, threshold, metric,
+                          unit)
+    if regressions:
+        print("%d benchmark(s) slower than the baseline by more than %.1f%%"
+              % (len(regressions), threshold))
+        return 1
+    return 0
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="PyBibim benchmark suite")
+    parser.add_argument("--runs", type=int, default=5,
+                        help="number of measured runs per benchmark")
+    parser.add_argument("--heavy", action="store_true",
+                        help="also run the long-running variants")
+    parser.add_argument("--only", action="append", default=None,
+                        metavar="NAME", help="run only the named benchmark")
+    parser.add_argument("--python", default=sys.executable,
+                        help="Python 2 interpreter that runs pybibim.py")
+    parser.add_argument("--bbm", default=DEFAULT_BBM,
+                        help="path to a translated bbm binary")
+    parser.add_argument("--no-bbm", action="store_true",
+                        help="do not run the translated binary")
+    parser.add_argument("--vm", action="store_true",
+                        help="run the programs with the bytecode VM")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT,
+                        help="where to write the results")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE,
+                        help="results to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown of the median in percent")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="store the results as the new baseline")
+    args = parser.parse_args(argv[1:])
+    if args.runs < 1:
+        parser.error("--runs must be at least 1")
+
+    flags = ["--vm"] if args.vm else []
+    interpreters = [("pybibim", [args.python, PYBIBIM] + flags)]
+    if not args.no_bbm:
+        if os.path.exists(args.bbm):
+            interpreters.append(("bbm", [args.bbm] + flags))
+        else:
+            print("bbm not found at %s, measuring pybibim.py only" % args.bbm)
+
+    selected = benchmarks(args.heavy or args.only is not None)
+    if args.only is not None:
+        selected = [b for b in selected if b.name in args.only]
+        if not selected:
+            parser.error("no benchmark named %s" % ", ".join(args.only))
+
+    workdir = tempfile.mkdtemp(prefix="bibim-bench-")
+    try:
+        results = {}
+        for interpreter, command in interpreters:
+            entries = results.setdefault(interpreter, {})
+            for benchmark in selected:
+                entry = measure(command, benchmark, args.runs, workdir)
+                entries[benchmark.name] = entry
+                print("%-8s %-32s median %10.1f ms  p95 %10.1f ms  "
+                      "%9d steps  %6d cells  %8d KB" % (
+                          interpreter, benchmark.name, entry["median_ms"],
+                          entry["p95_ms"], entry["steps"],
+                          entry["peak_memory_cells"], entry["max_rss_kb"]))
+    finally:
+        shutil.rmtree(workdir)
+
+    document = {"runs": args.runs, "results": results}
+    write_json(args.output, document)
+    return check_baseline(document, args.baseline, args.update_baseline,
+                          args.threshold)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
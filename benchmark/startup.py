@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+""" PyBibim의 시작 시간을 측정하고, 시작 시간 예산을 넘는지 확인합니다.
+
+testcode/helloworld.bibim을 여러 번 실행해서 걸린 시간의 중앙값을 예산과 비교합니다.
+중앙값이 예산을 넘으면 1을 반환하며 종료합니다.
+
+사용법::
+
+    python benchmark/startup.py [--runs N] [--budget MS] [--bbm PATH]
+"""
+from __future__ import print_function
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROGRAM = os.path.join(ROOT, "testcode", "helloworld.bibim")
+
+# 번역하지 않은 interpreter의 시작 시간 예산 (ms)
+UNTRANSLATED_BUDGET_MS = 500
+# 번역한 bbm binary의 시작 시간 예산 (ms)
+TRANSLATED_BUDGET_MS = 50
+
+
+def measure(command):
+    """ command를 한 번 실행하고 걸린 시간을 ms 단위로 반환합니다.
+
+    :param command: 실행할 명령
+    :type command: list[str]
+    :return: 실행 시간
+    :rtype: float
+    """
+    with open(os.devnull, "r+b") as devnull:
+        start = time.time()
+        subprocess.check_call(command, stdin=devnull, stdout=devnull,
+                              stderr=devnull)
+        return (time.time() - start) * 1000
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="PyBibim startup benchmark")
+    parser.add_argument("--runs", type=int, default=10,
+                        help="number of measured runs")
+    parser.add_argument("--budget", type=float, default=None,
+                        help="startup budget in milliseconds")
+    parser.add_argument("--bbm", default=None,
+                        help="path to a translated bbm binary")
+    args = parser.parse_args(argv[1:])
+
+    if args.bbm is None:
+        command = [sys.executable, os.path.join(ROOT, "src", "pybibim.py"),
+                   PROGRAM]
+        budget = UNTRANSLATED_BUDGET_MS
+    else:
+        command = [args.bbm, PROGRAM]
+        budget = TRANSLATED_BUDGET_MS
+    if args.budget is not None:
+        budget = args.budget
+
+    # 첫 실행은 parser table cache를 만들 수 있으므로 측정하지 않습니다.
+    measure(command)
+    times = sorted(measure(command) for _ in range(args.runs))
+    median = times[len(times) // 2]
+    print("startup: median %.1f ms, min %.1f ms, max %.1f ms (budget %.1f ms)"
+          % (median, times[0], times[-1], budget))
+    if median > budget:
+        print("startup budget exceeded")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,573 @@
+# -*- coding: utf-8 -*-
+""" 파싱한 Bowl을 저장하는 compiled program cache (.bbc) 입니다.
+
+.bbc 파일은 header와 body로 이루어집니다. header는 MAGIC과 cache key, 그리고
+줄바꿈 문자입니다. cache key는 interpreter version, FORMAT_VERSION, source의 길이와
+hash로 만들며, 다르면 오래된 cache로 보고 사용하지 않습니다. body는 Bowl을 전위
+순회하며 각 node의 tag와 그 내용을 차례로 기록한 것입니다.
+"""
+from __future__ import absolute_import
+
+import errno
+import os
+
+from rpython.rlib.objectmodel import we_are_translated
+from rpython.rlib.rarithmetic import r_uint, intmask
+
+from . import datatype, io
+from .expr_func import FuncBowl, FuncAssign, FuncDeno, FuncPlus, FuncMinus, \
+    FuncMul, FuncNumberSep, FuncAnd, FuncOr, FuncNot, FuncEq, FuncGt, FuncLt
+from .mode import VERSION
+
+MAGIC = "BBC"
+FORMAT_VERSION = 2
+EXTENSION = ".bbc"
+SOURCE_EXTENSION = ".bibim"
+# .bbc 파일 하나에 대해 한 process가 동시에 만들 수 있는 임시 파일의 최대 수
+MAX_TMP_FILES = 64
+
+TAG_BOWL = 'B'
+TAG_INT = 'I'
+TAG_FRACTION = 'F'
+TAG_BIG = 'L'
+TAG_MEM = 'M'
+TAG_NULL = 'Z'
+TAG_BOWL_GET = 'g'
+TAG_ASSIGN = 'a'
+TAG_DENO = '^'
+TAG_NOT = '!'
+TAG_PLUS = '+'
+TAG_MINUS = '-'
+TAG_MUL = '*'
+TAG_NUMBER_SEP = '/'
+TAG_AND = '&'
+TAG_OR = '|'
+TAG_EQ = '='
+TAG_GT = '>'
+TAG_LT = '<'
+
+_FNV_OFFSET = r_uint(0xcbf29ce484222325)
+_FNV_PRIME = r_uint(0x100000001b3)
+
+
+class CacheError(Exception):
+    """ .bbc 파일을 읽을 수 없을 때 발생하는 예외입니다. """
+
+    def __init__(self, msg):
+        """ 새로운 CacheError를 생성합니다.
+
+        :param msg: 오류 메시지
+        :type msg: str
+        """
+        self.msg = msg
+
+
+def source_hash(source):
+    """ source의 FNV-1a hash 값을 반환합니다.
+
+    :param source: Bibim code
+    :type source: str
+    :return: hash 값
+    :rtype: r_uint
+    """
+    if not we_are_translated():
+        h = 0xcbf29ce484222325
+        for c in source:
+            h = ((h ^ ord(c)) * 0x100000001b3) & 0xffffffffffffffff
+        return r_uint(h)
+    h = _FNV_OFFSET
+    for c in source:
+        h = (h ^ r_uint(ord(c))) * _FNV_PRIME
+    return h
+
+
+def _hex(h):
+    """ hash 값을 16자리 16진수 문자열로 변환합니다.
+
+    :type h: r_uint
+    :rtype: str
+    """
+    digits = []
+    for shift in range(60, -4, -4):
+        digits.append("0123456789abcdef"[intmask((h >> shift) & r_uint(0xf))])
+    return "".join(digits)
+
+
+def source_key(source):
+    """ source로 만든 .bbc 파일의 cache key를 반환합니다.
+
+    :param source: Bibim code
+    :type source: str
+    :return: cache key
+    :rtype: str
+    """
+    return "%s-%d-%d-%s" % (VERSION, FORMAT_VERSION, len(source),
+                            _hex(source_hash(source)))
+
+
+def cache_path(filename, source, cache_dir):
+    """ filename의 .bbc 파일 경로를 반환합니다.
+
+    cache_dir이 None이면 source 파일 옆에, 아니면 cache_dir 안에 source의 hash 값을
+    이름으로 하는 파일을 사용합니다.
+
+    :param filename: source 파일 경로
+    :type filename: str
+    :param source: Bibim code
+    :type source: str
+    :param cache_dir: cache 디렉터리
+    :type cache_dir: str|None
+    :return: .bbc 파일 경로
+    :rtype: str
+    """
+    if cache_dir is not None:
+        name = _hex(source_hash(source)) + EXTENSION
+        if cache_dir.endswith("/"):
+            return cache_dir + name
+        return cache_dir + "/" + name
+    if filename.endswith(SOURCE_EXTENSION):
+        end = len(filename) - len(SOURCE_EXTENSION)
+        assert end >= 0
+        return filename[:end] + EXTENSION
+    return filename + EXTENSION
+
+
+class BowlWriter(object):
+    """ Bowl을 .bbc body로 변환하는 class입니다. """
+
+    def __init__(self):
+        """ 새로운 BowlWriter를 생성합니다. """
+        self._chunks = []
+
+    def result(self):
+        """ 지금까지 기록한 내용을 반환합니다.
+
+        :rtype: str
+        """
+        return "".join(self._chunks)
+
+    def write_tag(self, tag):
+        self._chunks.append(tag)
+
+    def write_uint(self, value):
+        """ 부호 없는 정수를 7bit씩 나누어 기록합니다.
+
+        :type value: r_uint
+        """
+        while value >= r_uint(0x80):
+            self._chunks.append(chr(intmask(value & r_uint(0x7f)) | 0x80))
+            value >>= 7
+        self._chunks.append(chr(intmask(value)))
+
+    def write_int(self, value):
+        """ 정수를 zigzag 방식으로 부호를 붙여 기록합니다.
+
+        :type value: int
+        """
+        if value < 0:
+            self.write_uint((r_uint(-(value + 1)) << 1) | r_uint(1))
+        else:
+            self.write_uint(r_uint(value) << 1)
+
+    def write_str(self, s):
+        self.write_uint(r_uint(len(s)))
+        self._chunks.append(s)
+
+    def write_bowl(self, bowl):
+        """ bowl과 그 안의 모든 Noodle을 기록합니다.
+
+        :type bowl: datatype.Bowl
+        """
+        noodles = bowl.wad().noodles()
+        self.write_tag(TAG_BOWL)
+        self.write_uint(r_uint(len(noodles)))
+        for noodle in noodles:
+            self.write_int(noodle.lineno)
+            self.write_int(noodle.colno)
+            self.write_expr(noodle.nn_expr())
+            self.write_expr(noodle.expr())
+
+    def write_number(self, number):
+        """ number를 기록합니다.
+
+        :type number: datatype.Number
+        """
+        try:
+            numerator = number.toint()
+            denominator = number.denominator_number().toint()
+        except OverflowError:
+            self.write_tag(TAG_BIG)
+            self.write_str(number.numerator().str())
+            self.write_str(number.denominator().str())
+            return
+        if denominator == 1:
+            self.write_tag(TAG_INT)
+            self.write_int(numerator)
+        else:
+            self.write_tag(TAG_FRACTION)
+            self.write_int(numerator)
+            self.write_int(denominator)
+
+    def write_expr(self, expr):
+        """ expr과 그 하위 Expr을 기록합니다.
+
+        :type expr: datatype.Expr
+        """
+        if isinstance(expr, datatype.MemoryExpr):
+            self.write_tag(TAG_MEM)
+            return
+        if isinstance(expr, datatype.ValueExpr):
+            value = expr.value()
+            if isinstance(value, datatype.Number):
+                self.write_number(value)
+            elif isinstance(value, datatype.Bowl):
+                self.write_bowl(value)
+            else:
+                self.write_tag(TAG_NULL)
+            return
+        func = expr.func()
+        if isinstance(func, FuncBowl):
+            self.write_tag(TAG_BOWL_GET)
+            self.write_expr(func.bowl)
+            self.write_expr(func.nn)
+        elif isinstance(func, FuncAssign):
+            self.write_tag(TAG_ASSIGN)
+            self.write_expr(func.bowl)
+            self.write_expr(func.nn)
+            self.write_expr(func.value_expr)
+        elif isinstance(func, FuncDeno):
+            self.write_tag(TAG_DENO)
+            self.write_expr(func.number)
+        elif isinstance(func, FuncNot):
+            self.write_tag(TAG_NOT)
+            self.write_expr(func.number)
+        elif isinstance(func, FuncPlus):
+            self.write_binary(TAG_PLUS, func.l_number, func.r_number)
+        elif isinstance(func, FuncMinus):
+            self.write_binary(TAG_MINUS, func.l_number, func.r_number)
+        elif isinstance(func, FuncMul):
+            self.write_binary(TAG_MUL, func.l_number, func.r_number)
+        elif isinstance(func, FuncNumberSep):
+            self.write_binary(TAG_NUMBER_SEP, func.l_number, func.r_number)
+        elif isinstance(func, FuncAnd):
+            self.write_binary(TAG_AND, func.l_number, func.r_number)
+        elif isinstance(func, FuncOr):
+            self.write_binary(TAG_OR, func.l_number, func.r_number)
+        elif isinstance(func, FuncEq):
+            self.write_binary(TAG_EQ, func.l_number, func.r_number)
+        elif isinstance(func, FuncGt):
+            self.write_binary(TAG_GT, func.l_number, func.r_number)
+        elif isinstance(func, FuncLt):
+            self.write_binary(TAG_LT, func.l_number, func.r_number)
+        else:
+            raise CacheError("Cannot serialize %s" % (expr.log_string(),))
+
+    def write_binary(self, tag, l_number, r_number):
+        self.write_tag(tag)
+        self.write_expr(l_number)
+        self.write_expr(r_number)
+
+
+class BowlReader(object):
+    """ .bbc body로부터 Bowl을 만드는 class입니다. """
+
+    def __init__(self, data, pos):
+        """ data의 pos 위치부터 읽는 새로운 BowlReader를 생성합니다.
+
+        :param data: .bbc 파일 내용
+        :type data: str
+        :param pos: body가 시작하는 위치
+        :type pos: int
+        """
+        self._data = data
+        self._pos = pos
+
+    def at_end(self):
+        return self._pos == len(self._data)
+
+    def read_tag(self):
+        if self._pos >= len(self._data):
+            raise CacheError("Unexpected end of cache")
+        tag = self._data[self._pos]
+        self._pos += 1
+        return tag
+
+    def read_uint(self):
+        value = r_uint(0)
+        shift = 0
+        while True:
+            byte = ord(self.read_tag())
+            if shift > 63:
+                raise CacheError("Integer is too large")
+            value |= r_uint(byte & 0x7f) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def read_int(self):
+        byte = ord(self.read_tag())
+        if byte < 0x80:
+            if byte & 1:
+                return -(byte >> 1) - 1
+            return byte >> 1
+        self._pos -= 1
+        value = self.read_uint()
+        if value & r_uint(1):
+            return -intmask(value >> 1) - 1
+        return intmask(value >> 1)
+
+    def read_length(self):
+        value = ord(self.read_tag())
+        if value < 0x80:
+            return value
+        self._pos -= 1
+        value = intmask(self.read_uint())
+        if value < 0 or value > len(self._data):
+            raise CacheError("Invalid length")
+        return value
+
+    def read_str(self):
+        length = self.read_length()
+        start = self._pos
+        end = start + length
+        if end > len(self._data):
+            raise CacheError("Unexpected end of cache")
+        self._pos = end
+        assert start >= 0 and end >= 0
+        return self._data[start:end]
+
+    def read_bowl(self):
+        """ Bowl을 읽습니다. TAG_BOWL은 이미 읽은 상태여야 합니다.
+
+        :rtype: datatype.Bowl
+        """
+        count = self.read_length()
+        wad = datatype.Wad(None)
+        for _ in range(count):
+            lineno = self.read_int()
+            colno = self.read_int()
+            nn_expr = self.read_expr()
+            expr = self.read_expr()
+            noodle = datatype.Noodle(nn_expr, expr)
+            noodle.set_position(lineno, colno)
+            wad.put(noodle)
+        return datatype.Bowl(wad)
+
+    def read_number(self, tag):
+        """ Number를 읽습니다. tag는 이미 읽은 상태여야 합니다.
+
+        :param tag: TAG_INT, TAG_FRACTION, TAG_BIG 중 하나
+        :type tag: str
+        :rtype: datatype.Number
+        """
+        if tag == TAG_INT:
+            return datatype.Number.from_ints(self.read_int())
+        elif tag == TAG_FRACTION:
+            numerator = self.read_int()
+            denominator = self.read_int()
+            if denominator == 0:
+                raise CacheError("Zero denominator")
+            return datatype.Number.from_ints(numerator, denominator)
+        numerator = self.read_decimal()
+        denominator = self.read_decimal()
+        if not denominator.tobool():
+            raise CacheError("Zero denominator")
+        return datatype.Number(numerator, denominator)
+
+    def read_decimal(self):
+        """ 10진수 문자열로 저장된 큰 정수를 읽습니다.
+
+        rbigint.fromdecimalstr는 올바른 10진수 문자열만 받으므로, 그 전에 문자열을
+        확인합니다.
+
+        :rtype: rbigint
+        """
+        from rpython.rlib.rbigint import rbigint
+        digits = self.read_str()
+        start = 1 if digits.startswith("-") else 0
+        if start == len(digits):
+            raise CacheError("Invalid big integer")
+        for i in range(start, len(digits)):
+            if not "0" <= digits[i] <= "9":
+                raise CacheError("Invalid big integer")
+        return rbigint.fromdecimalstr(digits)
+
+    def read_expr(self):
+        """ Expr과 그 하위 Expr을 읽습니다.
+
+        :rtype: datatype.Expr
+        """
+        tag = self.read_tag()
+        if tag == TAG_INT or tag == TAG_FRACTION or tag == TAG_BIG:
+            return datatype.ValueExpr(self.read_number(tag))
+        elif tag == TAG_BOWL:
+            return datatype.ValueExpr(self.read_bowl())
+        elif tag == TAG_MEM:
+            return datatype.MEM_EXPR
+        elif tag == TAG_NULL:
+            return datatype.NULL_EXPR_INST
+        elif tag == TAG_BOWL_GET:
+            bowl = self.read_expr()
+            nn = self.read_expr()
+            return datatype.Expr(FuncBowl(bowl=bowl, nn=nn))
+        elif tag == TAG_ASSIGN:
+            bowl = self.read_expr()
+            nn = self.read_expr()
+            value_expr = self.read_expr()
+            return datatype.Expr(FuncAssign(bowl=bowl, nn=nn,
+                                            value_expr=value_expr))
+        elif tag == TAG_DENO:
+            return datatype.Expr(FuncDeno(number=self.read_expr()))
+        elif tag == TAG_NOT:
+            return datatype.Expr(FuncNot(number=self.read_expr()))
+        l_number = self.read_expr()
+        r_number = self.read_expr()
+        if tag == TAG_PLUS:
+            func = FuncPlus(l_number=l_number, r_number=r_number)
+        elif tag == TAG_MINUS:
+            func = FuncMinus(l_number=l_number, r_number=r_number)
+        elif tag == TAG_MUL:
+            func = FuncMul(l_number=l_number, r_number=r_number)
+        elif tag == TAG_NUMBER_SEP:
+            func = FuncNumberSep(l_number=l_number, r_number=r_number)
+        elif tag == TAG_AND:
+            func = FuncAnd(l_number=l_number, r_number=r_number)
+        elif tag == TAG_OR:
+            func = FuncOr(l_number=l_number, r_number=r_number)
+        elif tag == TAG_EQ:
+            func = FuncEq(l_number=l_number, r_number=r_number)
+        elif tag == TAG_GT:
+            func = FuncGt(l_number=l_number, r_number=r_number)
+        elif tag == TAG_LT:
+            func = FuncLt(l_number=l_number, r_number=r_number)
+        else:
+            raise CacheError("Unknown tag %s" % (tag,))
+        return datatype.Expr(func)
+
+
+def dumps(bowl, key):
+    """ bowl을 cache key가 key인 .bbc 파일 내용으로 변환합니다.
+
+    :param bowl: 파싱된 Bowl
+    :type bowl: datatype.Bowl
+    :param key: cache key
+    :type key: str
+    :return: .bbc 파일 내용
+    :rtype: str
+    """
+    writer = BowlWriter()
+    writer.write_bowl(bowl)
+    return "%s%s\n%s" % (MAGIC, key, writer.result())
+
+
+def loads(data, key):
+    """ .bbc 파일 내용으로부터 Bowl을 만듭니다.
+
+    cache key가 key와 다르거나 내용이 잘못되었다면 CacheError를 발생시킵니다.
+
+    :param data: .bbc 파일 내용
+    :type data: str
+    :param key: 기대하는 cache key
+    :type key: str
+    :return: 파싱된 Bowl
+    :rtype: datatype.Bowl
+    """
+    header = MAGIC + key + "\n"
+    if not data.startswith(header):
+        raise CacheError("Stale cache")
+    reader = BowlReader(data, len(header))
+    if reader.read_tag() != TAG_BOWL:
+        raise CacheError("Cache does not contain a Bowl")
+    bowl = reader.read_bowl()
+    if not reader.at_end():
+        raise CacheError("Trailing data in cache")
+    return bowl
+
+
+def read_cache(path, key):
+    """ path의 .bbc 파일로부터 Bowl을 만듭니다.
+
+    파일이 없거나, 오래되었거나, 잘못된 경우에는 None을 반환합니다.
+
+    :param path: .bbc 파일 경로
+    :type path: str
+    :param key: 기대하는 cache key
+    :type key: str
+    :return: 파싱된 Bowl
+    :rtype: datatype.Bowl|None
+    """
+    try:
+        fp = os.open(path, os.O_RDONLY, 0o777)
+    except OSError:
+        return None
+    try:
+        data = io.read_data(fp)
+    finally:
+        os.close(fp)
+    try:
+        return loads(data, key)
+    except CacheError:
+        return None
+
+
+def write_cache(path, key, bowl):
+    """ bowl을 path의 .bbc 파일로 저장합니다.
+
+    저장하지 못하면 False를 반환합니다.
+
+    :param path: .bbc 파일 경로
+    :type path: str
+    :param key: cache key
+    :type key: str
+    :param bowl: 파싱된 Bowl
+    :type bowl: datatype.Bowl
+    :return: 저장 여부
+    :rtype: bool
+    """
+    try:
+        data = dumps(bowl, key)
+    except CacheError:
+        return False
+    try:
+        tmp_path, fp = _create_tmp(path)
+    except OSError:
+        return False
+    try:
+        try:
+            io.write_all(fp, data)
+        finally:
+            os.close(fp)
+        os.rename(tmp_path, path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def _create_tmp(path):
+    """ path 옆에 다른 process나 thread와 겹치지 않는 임시 파일을 새로 만듭니다.
+
+    이름에 pid를 붙이고, 같은 이름의 파일이 이미 있으면 번호를 바꿔서 다시
+    만듭니다.
+
+    :param path: .bbc 파일 경로
+    :type path: str
+    :return: 임시 파일 경로와 쓰기용 file descriptor
+    :rtype: (str, int)
+    """
+    pid = os.getpid()
+    index = 0
+    while True:
+        tmp_path = "%s.%d.%d.tmp" % (path, pid, index)
+        try:
+            fp = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL,
+                         0o644)
+        except OSError as e:
+            if e.errno != errno.EEXIST or index >= MAX_TMP_FILES:
+                raise
+            index += 1
+        else:
+            return tmp_path, fp
@@ -2,143 +2,236 @@
 from __future__ import absolute_import
 
 import os
-
-from . import datatype, io
-from .lexer import lexer
-from .parser import parser
-from .utils import safe_get_value
-from .mode import debug_time, debug_loop
-
-
-from rpython.rlib.jit import JitDriver
-
-jitdriver = JitDriver(
-    greens=[
-        'current_noodle',
-        'bowl'
-    ],
-    reds='auto',
-    is_recursive=True
-)
-
-
-def parse(code_string):
-    """ code_string을 파싱한 결과를 반환합니다.
-
-    :param code_string: parsing할 code 문자열
-    :type code_string: str
-    :return: 파싱된 결과.
-    :rtype: datatime.Value|datatime.Expr|datatime.Noodle
+import stat
+
+from . import bbc, io
+from .optimizer import fold_constants
+from .profiler import Profiler
+from .interpreter import Interpreter
+from .trace import TraceRecorder
+from .evaluator import Evaluator
+from .vm import VirtualMachine
+from .mode import debug_time, parse_options, OptionError, USAGE
+
+
+def load(interpreter, code, filename, options):
+    """ interpreter로 code를 파싱한 Bowl을 반환합니다.
+
+    cache를 사용한다면 .bbc 파일에 저장된 Bowl을 읽고, 파일이 없거나 오래되었다면
+    code를 파싱한 결과를 .bbc 파일에 저장합니다.
+
+    :param interpreter: code를 파싱할 Interpreter
+    :type interpreter: Interpreter
+    :param code: Bibim code
+    :type code: str
+    :param filename: code를 읽은 파일 경로
+    :type filename: str
+    :param options: 실행 옵션
+    :type options: Options
+    :return: 파싱된 Bowl
+    :rtype: datatype.Bowl
     """
-    return parser.parse(lexer.lex(code_string))
-
-
-def run(bowl_inst):
-    """ bowl_inst를 실행합니다.
-
-    :param bowl_inst: 실행할 Bowl instance
-    :type bowl_inst: datatime.Bowl
+    if not options.use_cache:
+        return interpreter.parse(code)
+    path = bbc.cache_path(filename, code, options.cache_dir)
+    key = bbc.source_key(code)
+    bowl = bbc.read_cache(path, key)
+    if bowl is None:
+        bowl = interpreter.parse(code)
+        bbc.write_cache(path, key, bowl)
+    return bowl
+
+
+def run_file(interpreter, fp, options):
+    stats = interpreter.stats
+    start = stats.now()
+    code = io.read_data(fp)
+    os.close(fp)
+    stats.read_time = stats.now() - start
+    if options.use_vm:
+        evaluator = VirtualMachine()
+    else:
+        evaluator = Evaluator()
+    profiler = None
+    if options.profile:
+        profiler = Profiler()
+    recorder = None
+    if options.trace is not None:
+        try:
+            recorder = TraceRecorder(os.open(
+                options.trace, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644))
+        except OSError:
+            interpreter.write_message(("Cannot write file %s\n" % (options.trace,)).decode("utf-8"))
+            return
+    start = stats.now()
+    running = False
+    try:
+        try:
+            bowl = fold_constants(load(interpreter, code, options.filename,
+                                       options))
+            stats.parse_time = stats.now() - start - stats.lex_time
+            start = stats.now()
+            running = True
+            interpreter.run(bowl, evaluator, profiler, recorder)
+        except ValueError as e:
+            pass
+        except RuntimeError as e:
+            pass
+    finally:
+        # 처리하지 않은 예외로 끝난 실행도 그때까지의 trace, profile과 통계를
+        # 남깁니다.
+        if running:
+            stats.run_time = stats.now() - start
+        else:
+            stats.parse_time = stats.now() - start - stats.lex_time
+        if recorder is not None:
+            recorder.close()
+        if profiler is not None:
+            write_profile(interpreter, profiler, options.profile_stacks)
+        if options.stats is not None:
+            write_stats(interpreter, options.stats)
+
+
+def write_profile(interpreter, profiler, stacks_path):
+    """ profiler의 보고서를 표준 오류로 출력하고, collapsed stack을 stacks_path에
+    저장합니다.
+
+    :param interpreter: 실행을 마친 Interpreter
+    :type interpreter: Interpreter
+    :param profiler: 실행을 마친 Profiler
+    :type profiler: Profiler
+    :param stacks_path: collapsed stack을 저장할 파일 경로
+    :type stacks_path: str
     """
-    if not isinstance(bowl_inst, datatype.Bowl):
-        raise AssertionError('The code must be a Bowl.')
-    mem = datatype.MEM
-    mem.set_current_noodle_number(datatype.NULL_EXPR_INST)
-    current_noodle = get_next_noodle(bowl_inst)
-    while current_noodle is not None:
-        jitdriver.jit_merge_point(
-            current_noodle=current_noodle,
-            bowl=bowl_inst
-        )
-        current_nn_expr = current_noodle.nn_expr()
-        if debug_loop:
-            print("Noodle number expression: %s" % current_nn_expr.log_expr())
-        current_nn = current_nn_expr.eval()
-        if debug_loop:
-            print("Noodle number: %s" % current_nn.log_expr())
-        mem.set_current_noodle_number(current_nn)
-        current_n_expr = current_noodle.expr()
-        if debug_loop:
-            print("Noodle expression: %s" % current_n_expr.log_expr())
-        if debug_loop:
-            print("STDIN/OUT start")
-        current_n = current_noodle.expr().eval()
-        if debug_loop:
-            print("\nSTDIN/OUT end")
-        if debug_loop:
-            print("Noodle expression result: %s" % current_n.log_expr())
-        if debug_loop:
-            print("Memory: %s" % mem.log_contents())
-        current_noodle = get_next_noodle(bowl_inst)
-        # raw_input("PRESS ENTER TO CONTINUE.")
-
-
-def get_next_noodle(bowl_inst):
-    """ bowl_inst에서 실행할 다음 Noodle을 반환합니다.
-
-    다음에 실행할 Noodle을 발견하지 못하면 None을 반환합니다.
-
-    :param bowl_inst: 실행하고 있는 Bowl instance
-    :type bowl_inst: datatype.Bowl
-    :return: 다음 Noodle
-    :rtype: datatype.Noodle|None
+    interpreter.flush()
+    io.write_all(io.STDERR, profiler.report())
+    try:
+        fp = os.open(stacks_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            io.write_all(fp, profiler.collapsed_stacks())
+        finally:
+            os.close(fp)
+    except OSError:
+        io.write_all(io.STDERR, "Cannot write file %s\n" % (stacks_path,))
+
+
+def write_stats(interpreter, path):
+    """ interpreter의 실행 통계를 JSON 형식으로 path에 저장합니다.
+
+    :param interpreter: 실행을 마친 Interpreter
+    :type interpreter: Interpreter
+    :param path: 통계를 저장할 파일 경로
+    :type path: str
     """
-    min_noodle = None
-    min_noodle_value = None
-    for noodle in bowl_inst.wad().noodles():
-        nn = safe_get_value(noodle.nn_expr(), datatype.Number)
-        if nn is datatype.NULL_INST:
-            continue
-        if is_nextable_nn(nn):
-            if min_noodle is None or nn.lt(min_noodle_value):
-                min_noodle = noodle
-                min_noodle_value = min_noodle.nn_expr().eval().value()
-    return min_noodle
-
-
-def is_nextable_nn(number):
-    """ number가 다음에 실행할 noodle number가 될 수 있는지 확인합니다.
-
-    마지막에 실행한 noodle number보다 number가 크면 True를, 작거나 같으면 False를
-    반환합니다. 만약 마지막에 실행한 noodle number가 존재하지 않을 경우에는 number가 0보다
-    크거나 같으면 True, 작으면 False를 반환합니다.
-
-    :param number: 확인할 number
-    :type number: datatype.Number
-    :return: 확인 결과
+    try:
+        fp = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            io.write_all(fp, interpreter.stats.to_json(interpreter.memory))
+        finally:
+            os.close(fp)
+    except OSError:
+        interpreter.flush()
+        io.write_all(io.STDERR, "Cannot write file %s\n" % (path,))
+
+
+def compile_file(interpreter, filename, cache_dir):
+    """ filename을 파싱해서 .bbc 파일로 저장합니다.
+
+    :param interpreter: 파싱에 사용할 Interpreter
+    :type interpreter: Interpreter
+    :param filename: source 파일 경로
+    :type filename: str
+    :param cache_dir: cache 디렉터리
+    :type cache_dir: str|None
+    :return: 저장 여부
     :rtype: bool
     """
-    if number is datatype.NULL_INST:
-        return False
     try:
-        current_noodle = datatype.MEM.get_noodle(
-            datatype.Memory.NN_CURRENT_NOODLE)
-    except KeyError:
+        fp = os.open(filename, os.O_RDONLY, 0o777)
+    except OSError:
+        interpreter.write_message(("Cannot open file %s\n" % (filename,)).decode("utf-8"))
         return False
-    current_nn = safe_get_value(current_noodle.expr(), datatype.Number)
-    if current_nn is datatype.NULL_INST:
-        return number.numerator().ge(datatype.Number.R_ZERO)
-    else:
-        return number.gt(current_nn)
-
-
-def run_file(fp):
     code = io.read_data(fp)
     os.close(fp)
     try:
-        bowl = parse(code)
-        run(bowl)
-    except ValueError as e:
-        pass
-    except RuntimeError as e:
-        pass
+        bowl = interpreter.parse(code)
+    except ValueError:
+        return False
+    path = bbc.cache_path(filename, code, cache_dir)
+    if not bbc.write_cache(path, bbc.source_key(code), bowl):
+        interpreter.write_message(("Cannot write file %s\n" % (path,)).decode("utf-8"))
+        return False
+    interpreter.flush()
+    print("%s -> %s" % (filename, path))
+    return True
+
+
+def compile_dir(interpreter, dirname, cache_dir):
+    """ dirname 아래의 모든 .bibim 파일을 .bbc 파일로 저장합니다.
+
+    :param interpreter: 파싱에 사용할 Interpreter
+    :type interpreter: Interpreter
+    :param dirname: source 디렉터리
+    :type dirname: str
+    :param cache_dir: cache 디렉터리
+    :type cache_dir: str|None
+    :return: 저장하지 못한 파일의 수
+    :rtype: int
+    """
+    failed = 0
+    for name in os.listdir(dirname):
+        path = dirname + "/" + name
+        try:
+            mode = os.stat(path).st_mode
+        except OSError:
+            continue
+        if stat.S_ISDIR(mode):
+            failed += compile_dir(interpreter, path, cache_dir)
+        elif name.endswith(bbc.SOURCE_EXTENSION):
+            if not compile_file(interpreter, path, cache_dir):
+                failed += 1
+    return failed
 
 
 def entry_point(argv):
     try:
-        filename = argv[1]
-    except IndexError:
-        print("You must supply a filename")
+        options = parse_options(argv)
+    except OptionError as e:
+        print(e.msg)
+        if e.show_usage:
+            print(USAGE)
         return 1
+    return execute(Interpreter(), options)
+
+
+def execute(interpreter, options):
+    """ options에 따라 interpreter로 프로그램을 실행합니다.
+
+    :param interpreter: 프로그램을 실행할 Interpreter
+    :type interpreter: Interpreter
+    :param options: 실행 옵션
+    :type options: mode.Options
+    :return: 종료 status
+    :rtype: int
+    """
+    interpreter.configure(options)
+    previous = interpreter.enter()
+    try:
+        return main(interpreter, options)
+    finally:
+        interpreter.leave(previous)
+
+
+def main(interpreter, options):
+    if options.compile_dir is not None:
+        try:
+            failed = compile_dir(interpreter, options.compile_dir,
+                                 options.cache_dir)
+        except OSError:
+            interpreter.write_message(("Cannot open directory %s\n" % (options.compile_dir,)).decode("utf-8"))
+            return 1
+        return 1 if failed else 0
+    filename = options.filename
 
     try:
         fp = os.open(filename, os.O_RDONLY, 0o777)
@@ -146,12 +239,15 @@ def entry_point(argv):
         if debug_time:
             import time
             start_time = time.time()
-            run_file(fp)
+            run_file(interpreter, fp, options)
+            interpreter.flush()
             print("runtime: %s sec" % (time.time() - start_time))
+            print(interpreter.stats.log_cache())
+            print(interpreter.memory.log_stats())
         else:
-            run_file(fp)
+            run_file(interpreter, fp, options)
     except OSError as e:
-        io.write_data(io.STDOUT, ("Cannot open file %s\n" % (filename,)).decode("utf-8"))
+        interpreter.write_message(("Cannot open file %s\n" % (filename,)).decode("utf-8"))
         pass
 
     return 0
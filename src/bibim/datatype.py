@@ -1,10 +1,17 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import
-from rply.token import BaseBox
-from rpython.rlib.rbigint import rbigint
+import sys
+
 from rpython.rlib import jit
+from rpython.rlib.objectmodel import r_dict, instantiate, specialize
+from rpython.rlib.rarithmetic import intmask, ovfcheck
+
+from .interpreter import current, current_stats
+from .stats import COUNTING
+from .rlib import BaseBox
 
-from . import io
+_MIN_INT = -sys.maxint - 1
+_MAX_SMALL_DIGITS = len(str(sys.maxint)) - 1
 
 
 class Base(BaseBox):
@@ -56,6 +63,14 @@ class Expr(Base):
         """
         return self._func.call()
 
+    def func(self):
+        """ Expr이 평가될 때 실행될 Func을 반환합니다.
+
+        :return: Func
+        :rtype: Func
+        """
+        return self._func
+
     def log_string(self):
         return "Expr(%s)" % (self._func.log_string(),)
 
@@ -100,6 +115,33 @@ class ValueExpr(Expr):
         return "%s" % (self._value.log_expr(),)
 
 
+class MemoryExpr(Expr):
+    """ '@'를 나타내는 Expr입니다.
+
+    평가할 때마다 실행 중인 Interpreter의 Memory를 가진 ValueExpr을 반환하므로,
+    파싱된 code가 특정 Memory에 묶이지 않습니다. MEM_EXPR 하나만 사용합니다.
+    """
+    _immutable_ = True
+
+    def __init__(self):
+        """ 새로운 MemoryExpr을 만듭니다. """
+        self._func = None
+
+    def eval(self):
+        """ 실행 중인 Interpreter의 Memory를 가진 ValueExpr을 반환합니다.
+
+        :return: 평가 결과
+        :rtype: ValueExpr
+        """
+        return current().memory_expr
+
+    def log_string(self):
+        return "MemoryExpr"
+
+    def log_expr(self):
+        return "@"
+
+
 class Null(Value):
     """ 정의되지 않은 값을 가지는 Value입니다."""
     _immutable_ = True
@@ -112,23 +154,26 @@ class Null(Value):
 
 
 class Number(Value):
-    """ 기약분수 꼴로 표현되는 유리수를 가지는 Value입니다. """
-    _immutable_ = True
-    _immutable_fields_ = ["_numerator", "_denominator"]
+    """ 기약분수 꼴로 표현되는 유리수를 가지는 Value입니다.
 
-    R_ZERO = rbigint.fromint(0)
-    R_ONE = rbigint.fromint(1)
+    분자와 분모가 모두 machine int 범위 안에 있으면 int로 저장하고 overflow를 검사하며
+    연산합니다. 범위를 벗어나는 경우에만 rbigint로 저장합니다. 같은 값은 항상 같은 방식으로
+    저장됩니다.
+    """
+    _immutable_ = True
+    _immutable_fields_ = ["_small", "_num", "_den", "_numerator",
+                          "_denominator"]
 
     @staticmethod
     def ONE():
         if not hasattr(Number, "ONE_V"):
-            Number.ONE_V = Number(Number.R_ONE)
+            Number.ONE_V = Number._new_small(1, 1)
         return Number.ONE_V
 
     @staticmethod
     def ZERO():
         if not hasattr(Number, "ZERO_V"):
-            Number.ZERO_V = Number(Number.R_ZERO)
+            Number.ZERO_V = Number._new_small(0, 1)
         return Number.ZERO_V
 
     @staticmethod
@@ -138,10 +183,21 @@ class Number(Value):
         :type a: rbigint
         :type b: rbigint
         """
-        while b.ne(Number.R_ZERO):
+        while b.tobool():
             a, b = b, a.mod(b)
         return a
 
+    @staticmethod
+    @jit.elidable
+    def int_gcd(a, b):
+        """ 정수 a와 b의 최대공약수를 Number.gcd와 같은 방식으로 계산합니다.
+        :type a: int
+        :type b: int
+        """
+        while b != 0:
+            a, b = b, a % b
+        return a
+
     def __init__(self, numerator, denominator=None):
         """ 새로운 Number를 하나 이상의 정수로부터 만듭니다.
 
@@ -152,20 +208,110 @@ class Number(Value):
         :param denominator: 분모
         :type denominator: rbigint
         """
+        if COUNTING.enabled:
+            current_stats().numbers_allocated += 1
+
+        if denominator is not None:
+            if not denominator.tobool():
+                raise AssertionError('Zero cannot be a denominator.')
+
+            if not denominator.int_eq(1):
+                if COUNTING.enabled:
+                    current_stats().gcd_calls += 1
+                g = Number.gcd(numerator, denominator)
+                numerator = numerator.div(g)
+                denominator = denominator.div(g)
+
+        try:
+            num = numerator.toint()
+            den = 1 if denominator is None else denominator.toint()
+        except OverflowError:
+            self._set_big(numerator, denominator)
+        else:
+            if num == _MIN_INT or den == _MIN_INT:
+                self._set_big(numerator, denominator)
+            else:
+                self._set_small(num, den)
+
+    def _set_small(self, num, den):
+        self._small = True
+        self._num = num
+        self._den = den
+        self._numerator = None
+        self._denominator = None
 
+    def _set_big(self, numerator, denominator):
         if denominator is None:
-            denominator = Number.R_ONE
+            from rpython.rlib.rbigint import rbigint
+            denominator = rbigint.fromint(1)
+        if COUNTING.enabled:
+            current_stats().record_bigint(max(numerator.bit_length(),
+                                              denominator.bit_length()))
+        self._small = False
+        self._num = 0
+        self._den = 1
+        self._numerator = numerator
+        self._denominator = denominator
+
+    @staticmethod
+    def _new_small(num, den):
+        """ 이미 기약분수인 int 분자와 분모로 새로운 Number를 만듭니다.
+
+        :type num: int
+        :type den: int
+        :rtype: Number
+        """
+        if COUNTING.enabled:
+            current_stats().numbers_allocated += 1
+        number = instantiate(Number)
+        number._set_small(num, den)
+        return number
+
+    @staticmethod
+    def from_ints(num, den=1):
+        """ int 분자와 분모로부터 Number를 만듭니다.
 
-        if denominator.eq(Number.R_ZERO):
+        작은 값은 NUMBER_CACHE에 저장된 Number를 공유합니다.
+
+        :param num: 분자
+        :type num: int
+        :param den: 분모
+        :type den: int
+        :return: 새 Number
+        :rtype: Number
+        """
+        if den == 0:
             raise AssertionError('Zero cannot be a denominator.')
+        if num == _MIN_INT or den == _MIN_INT:
+            from rpython.rlib.rbigint import rbigint
+            return Number(rbigint.fromint(num), rbigint.fromint(den))
+        if den != 1:
+            if COUNTING.enabled:
+                current_stats().gcd_calls += 1
+            g = Number.int_gcd(num, den)
+            num = num // g
+            den = den // g
+        return NUMBER_CACHE.number(num, den)
 
-        if denominator.eq(Number.R_ONE):
-            self._numerator = numerator
-            self._denominator = Number.R_ONE
-        else:
-            g = Number.gcd(numerator, denominator)
-            self._numerator = numerator.div(g)
-            self._denominator = denominator.div(g)
+    @staticmethod
+    def from_digits(digits):
+        """ 10진수 숫자로 이루어진 문자열로부터 Number를 만듭니다.
+
+        machine int 범위 안의 값은 rbigint를 거치지 않고 만듭니다.
+
+        :param digits: 숫자 문자열
+        :type digits: str
+        :return: 새 Number
+        :rtype: Number
+        """
+        if len(digits) <= _MAX_SMALL_DIGITS and \
+                (digits[0] != '0' or len(digits) == 1):
+            value = 0
+            for digit in digits:
+                value = value * 10 + (ord(digit) - ord('0'))
+            return Number.from_ints(value)
+        from rpython.rlib.rbigint import rbigint
+        return Number(rbigint.fromstr(digits))
 
     @jit.elidable
     def numerator(self):
@@ -174,6 +320,9 @@ class Number(Value):
         :return: 분자
         :rtype: rbigint
         """
+        if self._small:
+            from rpython.rlib.rbigint import rbigint
+            return rbigint.fromint(self._num)
         return self._numerator
 
     @jit.elidable
@@ -183,6 +332,9 @@ class Number(Value):
         :return: 분모
         :rtype: rbigint
         """
+        if self._small:
+            from rpython.rlib.rbigint import rbigint
+            return rbigint.fromint(self._den)
         return self._denominator
 
     @jit.elidable
@@ -195,8 +347,45 @@ class Number(Value):
         :return: 분모
         :rtype: Number
         """
+        if self._small:
+            return NUMBER_CACHE.number(self._den, 1)
         return Number(self._denominator)
 
+    @jit.elidable
+    def is_integer(self):
+        """ Number의 분모가 1이면 True를, 그 외의 경우에는 False를 반환합니다.
+
+        :rtype: bool
+        """
+        if self._small:
+            return self._den == 1
+        return self._denominator.int_eq(1)
+
+    def is_small_integer(self):
+        """ Number가 int 범위의 정수이면 True를, 그 외의 경우에는 False를
+        반환합니다.
+
+        :rtype: bool
+        """
+        return self._small and self._den == 1
+
+    @jit.elidable
+    def toint(self):
+        """ Number의 분자를 int로 반환합니다.
+
+        int 범위를 벗어나면 OverflowError를 발생시킵니다.
+
+        :rtype: int
+        """
+        if self._small:
+            return self._num
+        return self._numerator.toint()
+
+    def _is_zero(self):
+        if self._small:
+            return self._num == 0
+        return not self._numerator.tobool()
+
     @jit.elidable
     def __nonzero__(self):
         """ Number 값이 Number.ZERO일 경우 False를, 그 외의 경우에는 True를 반환합니다.
@@ -205,7 +394,7 @@ class Number(Value):
         직접 반환하면 안됩니다. 각 논리 및 비교 연산의 결과는 Number.ONE() 또는 Number.ZERO을
         반환하도록 해야 합니다. 해당 결과를 원한다면, bool_f 메서드를 대신 사용하세요.
         """
-        return self._numerator.ne(Number.R_ZERO)
+        return not self._is_zero()
 
     @staticmethod
     @jit.elidable
@@ -227,7 +416,7 @@ class Number(Value):
         :return: 연산 결과
         :rtype: Number
         """
-        return Number.ZERO() if self._numerator.eq(Number.R_ZERO) else Number.ONE()
+        return Number.ZERO() if self._is_zero() else Number.ONE()
 
     @jit.elidable
     def neg(self):
@@ -236,7 +425,9 @@ class Number(Value):
         :return: 연산 결과
         :rtype: Number
         """
-        return Number(self.numerator().neg(), self.denominator())
+        if self._small:
+            return NUMBER_CACHE.number(-self._num, self._den)
+        return Number(self._numerator.neg(), self._denominator)
 
     @jit.elidable
     def mul(self, other):
@@ -255,6 +446,14 @@ class Number(Value):
             # else:
             #     return NULL_INST
             return NULL_INST
+        if self._small and other._small:
+            try:
+                num = ovfcheck(self._num * other._num)
+                den = ovfcheck(self._den * other._den)
+            except OverflowError:
+                pass
+            else:
+                return Number.from_ints(num, den)
         return Number(self.numerator().mul(other.numerator()),
                       self.denominator().mul(other.denominator()))
 
@@ -275,8 +474,21 @@ class Number(Value):
             # else:
             #     return NULL_INST
             return NULL_INST
+        if self._small and other._small:
+            try:
+                if self._den == 1 and other._den == 1:
+                    num = ovfcheck(self._num + other._num)
+                    den = 1
+                else:
+                    num = ovfcheck(ovfcheck(self._num * other._den) +
+                                   ovfcheck(self._den * other._num))
+                    den = ovfcheck(self._den * other._den)
+            except OverflowError:
+                pass
+            else:
+                return Number.from_ints(num, den)
         return Number(
-            self._numerator.mul(other.denominator()).add(
+            self.numerator().mul(other.denominator()).add(
                 self.denominator().mul(other.numerator())
             ),
             self.denominator().mul(other.denominator()))
@@ -317,6 +529,14 @@ class Number(Value):
             # else:
             #     return NULL_INST
             return NULL_INST
+        if self._small and other._small:
+            try:
+                num = ovfcheck(self._num * other._den)
+                den = ovfcheck(self._den * other._num)
+            except OverflowError:
+                pass
+            else:
+                return Number.from_ints(num, den)
         return Number(self.numerator().mul(other.denominator()),
                       self.denominator().mul(other.numerator()))
 
@@ -331,7 +551,7 @@ class Number(Value):
         :rtype: Number
         """
         if isinstance(other, Number):
-            if self.numerator().ne(Number.R_ZERO) and other.numerator().ne(Number.R_ZERO):
+            if not self._is_zero() and not other._is_zero():
                 return Number.ONE()
             else:
                 return Number.ZERO()
@@ -356,7 +576,7 @@ class Number(Value):
         :return: 연산 결과
         :rtype: Number
         """
-        if self.numerator().ne(Number.R_ZERO):
+        if not self._is_zero():
             return Number.ONE()
         else:
             if isinstance(other, Number):
@@ -372,6 +592,39 @@ class Number(Value):
                 #     return Number.ZERO()
                 return Number.ZERO()
 
+    def _compare(self, other):
+        """ 자신이 other보다 작으면 음수를, 같으면 0을, 크면 양수를 반환합니다.
+
+        :param other: 비교할 Number
+        :type other: Number
+        :rtype: int
+        """
+        if self._small and other._small:
+            if self._den == other._den:
+                left = self._num
+                right = other._num
+            else:
+                try:
+                    left = ovfcheck(self._num * other._den)
+                    right = ovfcheck(other._num * self._den)
+                except OverflowError:
+                    return self._compare_big(other)
+            if left < right:
+                return -1
+            elif left > right:
+                return 1
+            return 0
+        return self._compare_big(other)
+
+    def _compare_big(self, other):
+        left = self.numerator().mul(other.denominator())
+        right = other.numerator().mul(self.denominator())
+        if left.lt(right):
+            return -1
+        elif left.gt(right):
+            return 1
+        return 0
+
     @jit.elidable
     def lt(self, other):
         """ 자신이 other보다 작을 경우 True를, 그 외의 경우에는 False을
@@ -388,9 +641,7 @@ class Number(Value):
             # else:
             #     return False
             return False
-        return self.numerator().mul(other.denominator()).lt(
-            other.numerator().mul(self.denominator())
-        )
+        return self._compare(other) < 0
 
     @jit.elidable
     def gt(self, other):
@@ -408,9 +659,7 @@ class Number(Value):
             # else:
             #     return False
             return False
-        return self.numerator().mul(other.denominator()).gt(
-           other.numerator().mul(self.denominator())
-        )
+        return self._compare(other) > 0
 
     @jit.elidable
     def eq(self, other):
@@ -428,8 +677,27 @@ class Number(Value):
             # else:
             #     return False
             return False
-        return self.numerator().eq(other.numerator()) and \
-               self.denominator().eq(other.denominator())
+        if self._small != other._small:
+            return False
+        if self._small:
+            return self._num == other._num and self._den == other._den
+        return self._numerator.eq(other._numerator) and \
+               self._denominator.eq(other._denominator)
+
+    @jit.elidable
+    def hash(self):
+        """ Number의 hash 값을 반환합니다.
+
+        Number는 항상 기약분수 꼴로 저장되므로, 같은 값을 가지는 Number는 같은 hash
+        값을 가집니다.
+
+        :return: hash 값
+        :rtype: int
+        """
+        if self._small:
+            return intmask(self._num * 1000003) ^ self._den
+        return intmask(self._numerator.hash() * 1000003) ^ \
+            self._denominator.hash()
 
     @jit.elidable
     def not_f(self):
@@ -439,7 +707,7 @@ class Number(Value):
         :return: 연산 결과
         :rtype: Number
         """
-        return Number.ONE() if self._numerator.eq(Number.R_ZERO) else Number.ZERO()
+        return Number.ONE() if self._is_zero() else Number.ZERO()
 
     @jit.elidable
     def eq_f(self, other):
@@ -476,17 +744,148 @@ class Number(Value):
         """
         return Number.from_bool(self.lt(other))
 
+    def _str_parts(self):
+        if self._small:
+            return str(self._num), str(self._den)
+        return self._numerator.str(), self._denominator.str()
+
     def log_string(self):
-        if self._denominator.eq(Number.R_ONE):
-            return "%s" % (self._numerator.str(),)
+        numerator, denominator = self._str_parts()
+        if self.is_integer():
+            return "%s" % (numerator,)
         else:
-            return "%s/%s" % (self._numerator.str(), self._denominator.str())
+            return "%s/%s" % (numerator, denominator)
 
     def log_expr(self):
-        if self._denominator.eq(Number.R_ONE):
-            return "%s" % (self._numerator.str(),)
+        numerator, denominator = self._str_parts()
+        if self.is_integer():
+            return "%s" % (numerator,)
         else:
-            return "%s/%s" % (self._numerator.str(), self._denominator.str())
+            return "%s/%s" % (numerator, denominator)
+
+
+class NumberCacheEntry(object):
+    """ NumberCache의 table 한 칸에 저장하는 Number와 그 ValueExpr입니다. """
+    _immutable_fields_ = ["number"]
+
+    def __init__(self, number):
+        """ 새로운 NumberCacheEntry를 생성합니다.
+
+        :param number: 저장할 Number
+        :type number: Number
+        """
+        self.number = number
+        self.expr = None
+
+    def value_expr(self):
+        """ number를 value로 가지는 ValueExpr을 처음 요청할 때 만들어 반환합니다.
+
+        :rtype: ValueExpr
+        """
+        value_expr = self.expr
+        if value_expr is None:
+            value_expr = ValueExpr(self.number)
+            self.expr = value_expr
+        return value_expr
+
+
+class NumberCache(object):
+    """ 자주 만들어지는 작은 Number와 그 Number를 가지는 ValueExpr을 공유하는 class입니다.
+
+    Number의 hash 값으로 위치가 정해지는 고정 크기 table에 저장하며, 같은 위치에 다른
+    값이 들어오면 기존 값을 내보냅니다. 분자의 절대값이 max_numerator보다 크거나 분모가
+    max_denominator보다 큰 Number는 저장하지 않습니다.
+
+    table의 한 칸은 NumberCacheEntry 하나로 한 번에 바뀌므로, 여러 thread가 함께
+    사용해도 찾은 entry의 Number와 ValueExpr은 서로 같은 값을 가집니다. hit, miss,
+    eviction 횟수는 실행 중인 Interpreter의 RunStats에 기록합니다.
+    """
+
+    def __init__(self, size=4096, max_numerator=1 << 16, max_denominator=64):
+        """ 새로운 NumberCache를 생성합니다.
+
+        :param size: table의 크기, 2의 거듭제곱이어야 합니다
+        :type size: int
+        :param max_numerator: 저장할 Number의 분자의 최대 절대값
+        :type max_numerator: int
+        :param max_denominator: 저장할 Number의 분모의 최댓값
+        :type max_denominator: int
+        """
+        assert size > 0 and size & (size - 1) == 0
+        self._mask = size - 1
+        self._max_numerator = max_numerator
+        self._max_denominator = max_denominator
+        self._entries = [None] * size
+
+    def _cacheable(self, num, den):
+        return -self._max_numerator <= num <= self._max_numerator and \
+            0 < den <= self._max_denominator
+
+    def _slot(self, num, den, number):
+        """ num/den을 저장한 table의 entry를 반환합니다.
+
+        table에 num/den이 없다면 number를, number가 None이면 새 Number를 저장합니다.
+
+        :type num: int
+        :type den: int
+        :type number: Number|None
+        :rtype: NumberCacheEntry
+        """
+        index = (intmask(num * 1000003) ^ den) & self._mask
+        entry = self._entries[index]
+        if entry is not None and entry.number._num == num and \
+                entry.number._den == den:
+            if COUNTING.enabled:
+                current_stats().cache_hits += 1
+            return entry
+        if COUNTING.enabled:
+            stats = current_stats()
+            stats.cache_misses += 1
+            if entry is not None:
+                stats.cache_evictions += 1
+        if number is None:
+            number = Number._new_small(num, den)
+        entry = NumberCacheEntry(number)
+        self._entries[index] = entry
+        return entry
+
+    def number(self, num, den):
+        """ 기약분수인 num/den 값을 가지는 Number를 반환합니다.
+
+        :param num: 분자
+        :type num: int
+        :param den: 분모
+        :type den: int
+        :return: Number
+        :rtype: Number
+        """
+        if not self._cacheable(num, den):
+            return Number._new_small(num, den)
+        return self._slot(num, den, None).number
+
+    def put(self, number):
+        """ number를 table에 저장하고, 같은 값을 가지는 공유 Number를 반환합니다.
+
+        :param number: 저장할 Number
+        :type number: Number
+        :return: 공유 Number
+        :rtype: Number
+        """
+        if not number._small or not self._cacheable(number._num, number._den):
+            return number
+        return self._slot(number._num, number._den, number).number
+
+    def value_expr(self, number):
+        """ number를 value로 가지는 ValueExpr을 반환합니다.
+
+        :param number: value
+        :type number: Number
+        :return: ValueExpr
+        :rtype: ValueExpr
+        """
+        if not number._small or not self._cacheable(number._num, number._den):
+            return ValueExpr(number)
+        return self._slot(number._num, number._den, number).value_expr()
 
 
 class Noodle(Base):
@@ -503,6 +902,30 @@ class Noodle(Base):
         """
         self._nn_expr = nn_expr
         self._expr = expr
+        self.lineno = -1
+        self.colno = -1
+
+    def set_position(self, lineno, colno):
+        """ Noodle이 source에서 시작하는 위치를 등록합니다.
+
+        :param lineno: 줄 번호
+        :type lineno: int
+        :param colno: 열 번호
+        :type colno: int
+        """
+        self.lineno = lineno
+        self.colno = colno
+
+    def position_string(self):
+        """ Noodle이 source에서 시작하는 위치를 "줄:열" 형식으로 반환합니다.
+
+        위치를 모르는 Noodle이면 "?"를 반환합니다.
+
+        :rtype: str
+        """
+        if self.lineno < 0:
+            return "?"
+        return "%d:%d" % (self.lineno, self.colno)
 
     @jit.elidable
     def nn_expr(self):
@@ -513,6 +936,22 @@ class Noodle(Base):
         """
         return self._nn_expr
 
+    def constant_nn(self):
+        """ Noodle number가 상수 Number일 경우 그 Number를 반환합니다.
+
+        Noodle number가 평가가 필요한 Expr이거나 Number가 아닌 경우에는 None을
+        반환합니다.
+
+        :return: 상수 noodle number
+        :rtype: Number|None
+        """
+        nn_expr = self._nn_expr
+        if isinstance(nn_expr, ValueExpr):
+            nn = nn_expr.value()
+            if isinstance(nn, Number):
+                return nn
+        return None
+
     def expr(self):
         """ Noodle의 Expr을 반환합니다.
 
@@ -538,7 +977,14 @@ class Noodle(Base):
 
 
 class Wad(Base):
-    """ Bowl의 Noodle들을 담고 있는 class입니다. """
+    """ Bowl의 Noodle들을 담고 있는 class입니다.
+
+    i번째 Noodle의 noodle number가 상수 i인 동안에는 dense 상태로, noodle number를
+    list의 위치로 사용해서 바로 찾습니다. 그 외의 noodle number를 가지는 Noodle이
+    추가되면 dense 상태를 벗어나고, 상수 noodle number를 가지는 Noodle은 noodle
+    number를 key로 하는 hash index에 등록되어 바로 찾을 수 있습니다. noodle number가
+    평가가 필요한 Expr인 Noodle은 찾을 때마다 순서대로 평가합니다.
+    """
     _immutable_ = None
 
     def __init__(self, noodle):
@@ -547,11 +993,12 @@ class Wad(Base):
         :param noodle: noodle
         :type noodle: Noodle|None
         """
-
+        self._noodles = []
+        self._dense = True
+        self._index = None
+        self._dynamic = []
         if noodle:
-            self._noodles = [noodle]
-        else:
-            self._noodles = []
+            self.put(noodle)
 
     def noodles(self):
         """ noodles를 반환합니다.
@@ -567,9 +1014,82 @@ class Wad(Base):
         :param noodle: 추가할 noodle
         :return: Wad
         """
+        position = len(self._noodles)
+        nn = noodle.constant_nn()
+        if self._dense:
+            if nn is not None and nn.is_small_integer() and \
+                    nn.toint() == position:
+                self._noodles.append(noodle)
+                return self
+            self._build_index()
         self._noodles.append(noodle)
+        if nn is None:
+            self._dynamic.append(position)
+        elif nn not in self._index:
+            self._index[nn] = position
         return self
 
+    def _build_index(self):
+        """ dense 상태를 벗어나면서, 지금까지의 Noodle을 hash index에 등록합니다. """
+        self._dense = False
+        self._index = number_dict()
+        for position in range(len(self._noodles)):
+            self._index[Number.from_ints(position)] = position
+
+    def is_dense(self):
+        """ i번째 Noodle의 noodle number가 모두 i인지 반환합니다.
+
+        :rtype: bool
+        """
+        return self._dense
+
+    def has_dynamic(self):
+        """ noodle number가 평가가 필요한 Expr인 Noodle이 있는지 반환합니다.
+
+        :rtype: bool
+        """
+        return len(self._dynamic) > 0
+
+    def find(self, number):
+        """ number를 noodle number로 가지는 첫 번째 Noodle을 반환합니다.
+
+        hash index에서 찾은 Noodle보다 앞에 있는 Noodle 중 noodle number를
+        평가해야 하는 Noodle만 순서대로 평가하므로, 모든 Noodle을 순서대로 확인하는
+        것과 같은 결과를 반환합니다.
+
+        :param number: 찾을 Noodle의 noodle number
+        :type number: Number
+        :return: 해당 Noodle
+        :rtype: Noodle
+        """
+        counting = COUNTING.enabled
+        if counting:
+            current_stats().find_calls += 1
+        if self._dense:
+            if isinstance(number, Number) and number.is_small_integer():
+                position = number.toint()
+                if 0 <= position < len(self._noodles):
+                    return self._noodles[position]
+            raise KeyError("Cannot found the noodle")
+        position = -1
+        if isinstance(number, Number):
+            position = self._index.get(number, -1)
+        for dynamic_position in self._dynamic:
+            if position != -1 and dynamic_position > position:
+                break
+            if counting:
+                current_stats().find_scanned += 1
+            noodle = self._noodles[dynamic_position]
+            nn = noodle.nn_expr().eval().value()
+            if not isinstance(nn, Number):
+                raise gen_error("Noodle numbers must be a Number. %s is "
+                                "not a Number" % (nn.log_string(),))
+            if nn.eq(number):
+                return noodle
+        if position == -1:
+            raise KeyError("Cannot found the noodle")
+        return self._noodles[position]
+
     def log_string(self):
         result = ""
         for noodle in self._noodles:
@@ -597,6 +1117,7 @@ class Bowl(Value):
             self._wad = wad
         else:
             self._wad = Wad(None)
+        self._watchers = None
 
     def wad(self):
         """ wad를 반환합니다.
@@ -611,17 +1132,12 @@ class Bowl(Value):
     def from_str(s):
         """ 문자열을 Bowl으로 변환합니다.
 
-        :param s: 변환할 문자열
-        :type s: unicode
+        :param s: utf-8로 인코딩된 변환할 문자열
+        :type s: str
         :return: 생성된 Bowl
-        :rtype: Bowl
+        :rtype: StrBowl
         """
-        wad = Wad(None)
-        noodle_num = Number.ZERO()
-        for c in s.decode("utf-8"):
-            wad.put(Noodle(ValueExpr(noodle_num), ValueExpr(Number(rbigint.fromint(ord(c))))))
-            noodle_num = noodle_num.add(Number.ONE())
-        return Bowl(wad)
+        return StrBowl(s.decode("utf-8"))
 
     @staticmethod
     def to_str(bowl):
@@ -632,25 +1148,61 @@ class Bowl(Value):
         :return: 생성된 문자열
         :rtype: unicode
         """
-        result = u''
-        index = 0
-        while True:
-            try:
-                noodle = bowl.get_noodle(Number(rbigint.fromint(index)))
-            except KeyError:
+        return Bowl.to_utf8(bowl).decode("utf-8")
+
+    @staticmethod
+    def to_utf8(bowl):
+        """ Bowl을 utf-8로 인코딩된 문자열로 변환합니다.
+
+        noodle number가 0, 1, 2, ...인 Noodle의 값을 문자 code로 사용합니다.
+        noodle number가 모두 상수라면 Noodle을 한 번만 훑어서 문자의 순서를 정하고,
+        그렇지 않다면 noodle number마다 get_noodle로 찾습니다.
+
+        :param bowl: 변환할 Bowl
+        :type bowl: Bowl
+        :return: utf-8로 인코딩된 문자열
+        :rtype: str
+        """
+        if isinstance(bowl, StrBowl):
+            encoded = bowl.encoded()
+            if encoded is not None:
+                # 모든 cell을 읽었으므로 Number가 아닌 값으로 기록합니다.
+                current().tracker.record_read(bowl, NULL_INST)
+                return encoded
+        if isinstance(bowl, Memory) or bowl.wad().has_dynamic():
+            return _encode_utf8(_str_values(bowl))
+        noodles = bowl.wad().noodles()
+        if bowl.wad().is_dense():
+            values = [0] * len(noodles)
+            for index in range(len(noodles)):
+                values[index] = _str_value(noodles[index])
+            # 문자열의 끝을 확인하기 위해 읽은 cell도 기록합니다.
+            current().tracker.record_read(bowl, NULL_INST)
+            return _encode_utf8(values)
+        ordered = [None] * len(noodles)
+        for noodle in noodles:
+            nn = noodle.constant_nn()
+            if nn is None or not nn.is_small_integer():
+                continue
+            index = nn.toint()
+            if 0 <= index < len(ordered) and ordered[index] is None:
+                ordered[index] = noodle
+        tracker = current().tracker
+        values = []
+        for noodle in ordered:
+            if noodle is None:
                 break
-            noodle_value = noodle.expr().eval().value()
-            if not isinstance(noodle_value, Number):
-                raise gen_error("Could not convert it to string, "
-                                "noodle value is not a Number: %s" % (
-                                    noodle_value.log_string()))
-            elif noodle_value.denominator().ne(Number.R_ONE):
-                raise gen_error("Could not convert it to string, "
-                                "noodle value's denominator is not 1: %s"
-                                % (noodle_value.log_string()))
-            result += unichr(noodle_value.numerator().toint())
-            index += 1
-        return result
+            tracker.record_read(bowl, noodle.constant_nn())
+            values.append(_str_value(noodle))
+        tracker.record_read(bowl, Number.from_ints(len(values)))
+        return _encode_utf8(values)
+
+    def size(self):
+        """ 담고 있는 Noodle의 수를 반환합니다.
+
+        :rtype: int
+        """
+        return len(self.wad().noodles())
 
     def get_noodle(self, number):
         """ number를 noodle number로 가지는 Noodle을 반환합니다.
@@ -660,14 +1212,11 @@ class Bowl(Value):
         :return: 해당 Noodle
         :rtype: Noodle
         """
-        for noodle in self.wad().noodles():
-            nn = noodle.nn_expr().eval().value()
-            if not isinstance(nn, Number):
-                raise gen_error("Noodle numbers must be a Number. %s is "
-                                "not a Number" % (nn.log_string(),))
-            if nn.eq(number):
-                return noodle
-        raise KeyError("Cannot found the noodle")
+        interpreter = current()
+        if COUNTING.enabled:
+            interpreter.stats.get_noodle_calls += 1
+        interpreter.tracker.record_read(self, number)
+        return self.wad().find(number)
 
     def set_noodle(self, number, value_expr):
         """ number를 noodle number로 가지는 Noodle의 expr를 변경합니다.
@@ -679,52 +1228,295 @@ class Bowl(Value):
         :return: NullExpr
         :rtype: NullExpr
         """
-        for noodle in self.wad().noodles():
-            nn = noodle.nn_expr().eval().value()
-            if not isinstance(nn, Number):
-                raise gen_error("Noodle numbers must be a Number. %s is "
-                                "not a Number" % (nn.log_string(),))
-            if nn.eq(number):
-                noodle.set_expr(value_expr)
-                return NULL_EXPR_INST
-        self.wad().put(Noodle(ValueExpr(number), value_expr))
+        interpreter = current()
+        if COUNTING.enabled:
+            interpreter.stats.set_noodle_calls += 1
+        interpreter.tracker.record_effect()
+        self.notify(number)
+        _record_write(interpreter, self, number, value_expr)
+        try:
+            noodle = self.wad().find(number)
+        except KeyError:
+            self.wad().put(Noodle(to_value_expr(number), value_expr))
+            return NULL_EXPR_INST
+        noodle.set_expr(value_expr)
         return NULL_EXPR_INST
 
+    def watch(self, number, dependency):
+        """ number를 noodle number로 가지는 cell이 바뀌면 dependency를 무효화하도록
+        등록합니다.
+
+        :param number: 감시할 cell의 noodle number
+        :type number: Number
+        :param dependency: 무효화할 Dependency
+        :type dependency: Dependency
+        """
+        if self._watchers is None:
+            self._watchers = number_dict()
+        watching = self._watchers.get(number, None)
+        if watching is None:
+            watching = {}
+            self._watchers[number] = watching
+        watching[dependency] = None
+
+    def notify(self, number):
+        """ number를 noodle number로 가지는 cell을 읽은 Dependency를 무효화합니다.
+
+        number가 Number가 아닐 경우, 해당 Bowl의 모든 cell을 읽은 Dependency를
+        무효화합니다.
+
+        :param number: 바뀐 cell의 noodle number
+        :type number: Number
+        """
+        if self._watchers is None:
+            return
+        if not isinstance(number, Number):
+            for watching in self._watchers.values():
+                for dependency in watching:
+                    dependency.invalidate()
+            self._watchers = None
+            return
+        watching = self._watchers.pop(number, None)
+        if watching is not None:
+            for dependency in watching:
+                dependency.invalidate()
+
     def log_string(self):
-        return "{%s}" % (self._wad.log_string(),)
+        return "{%s}" % (self.wad().log_string(),)
 
     def log_expr(self):
-        return "{%s}" % (self._wad.log_expr(),)
+        return "{%s}" % (self.wad().log_expr(),)
+
+
+class StrBowl(Bowl):
+    """ 문자열의 문자 code를 noodle number 0, 1, 2, ...의 값으로 가지는 Bowl입니다.
+
+    Noodle을 만들지 않고 문자열을 그대로 들고 있다가, get_noodle이 호출되면 해당
+    문자로 Noodle을 만들어 반환합니다. 문자열 안의 cell에 값을 쓰면 그 cell의
+    Noodle만 만들어 보관하고, 문자열 밖의 cell에 값을 쓰거나 wad가 필요해지면
+    전체 Wad를 만든 뒤 Bowl과 같이 동작합니다.
+    """
+
+    def __init__(self, chars):
+        """ chars로부터 새로운 StrBowl을 생성합니다.
+
+        :param chars: 담을 문자열
+        :type chars: unicode
+        """
+        self._wad = None
+        self._watchers = None
+        self._chars = chars
+        self._assigned = None
+
+    def wad(self):
+        """ wad를 반환합니다. 아직 Wad를 만들지 않았다면 문자열로부터 만듭니다.
+
+        :return: wad
+        :rtype: Wad
+        """
+        if self._wad is None:
+            wad = Wad(None)
+            for index in range(len(self._chars)):
+                wad.put(self._noodle(index))
+            self._wad = wad
+            self._chars = u""
+            self._assigned = None
+        return self._wad
+
+    def size(self):
+        """ 담고 있는 Noodle의 수를 반환합니다.
+
+        :rtype: int
+        """
+        if self._wad is None:
+            return len(self._chars)
+        return len(self._wad.noodles())
+
+    def encoded(self):
+        """ 값을 쓴 cell이 없다면 담고 있는 문자열을 utf-8로 인코딩해서 반환합니다.
+
+        그 외의 경우에는 None을 반환합니다.
+
+        :rtype: str|None
+        """
+        if self._wad is not None or self._assigned is not None:
+            return None
+        return self._chars.encode("utf-8")
+
+    def _index(self, number):
+        if isinstance(number, Number) and number.is_small_integer():
+            index = number.toint()
+            if 0 <= index < len(self._chars):
+                return index
+        return -1
+
+    def _noodle(self, index):
+        if self._assigned is not None:
+            noodle = self._assigned.get(index, None)
+            if noodle is not None:
+                return noodle
+        return Noodle(to_value_expr(Number.from_ints(index)),
+                      to_value_expr(Number.from_ints(ord(self._chars[index]))))
+
+    def get_noodle(self, number):
+        """ number를 noodle number로 가지는 Noodle을 반환합니다.
+
+        :param number: 가져올 Noodle의 noodle number
+        :type number: Number
+        :return: 해당 Noodle
+        :rtype: Noodle
+        """
+        if self._wad is not None:
+            return Bowl.get_noodle(self, number)
+        interpreter = current()
+        if COUNTING.enabled:
+            interpreter.stats.get_noodle_calls += 1
+        interpreter.tracker.record_read(self, number)
+        index = self._index(number)
+        if index < 0:
+            raise KeyError("Cannot found the noodle")
+        return self._noodle(index)
+
+    def set_noodle(self, number, value_expr):
+        """ number를 noodle number로 가지는 Noodle의 expr를 변경합니다.
+
+        :param number: 수정할 Noodle의 noodle number
+        :type number: Number
+        :param value_expr: 수정할 Noodle의 expr
+        :type value_expr: ValueExpr
+        :return: NullExpr
+        :rtype: NullExpr
+        """
+        if self._wad is None:
+            index = self._index(number)
+            if index >= 0:
+                interpreter = current()
+                if COUNTING.enabled:
+                    interpreter.stats.set_noodle_calls += 1
+                interpreter.tracker.record_effect()
+                self.notify(number)
+                _record_write(interpreter, self, number, value_expr)
+                if self._assigned is None:
+                    self._assigned = {}
+                noodle = self._assigned.get(index, None)
+                if noodle is None:
+                    noodle = self._noodle(index)
+                    self._assigned[index] = noodle
+                noodle.set_expr(value_expr)
+                return NULL_EXPR_INST
+        return Bowl.set_noodle(self, number, value_expr)
 
 
 class Memory(Bowl):
-    """ '@' 문자에 매핑되는 특수 Bowl class입니다. """
+    """ '@' 문자에 매핑되는 특수 Bowl class입니다.
+
+    현재 noodle number(@:0)는 전용 Noodle에, 나머지 cell은 noodle number를 key로
+    하는 map에 담습니다. cell마다 읽고 쓴 횟수와, 전체 cell을 읽고 쓴 횟수를
+    기록합니다. recorder가 있으면 cell에 쓴 값과, cell에 담긴 Bowl 안에 쓴 값을
+    recorder에 기록합니다.
+    """
     _immutable_ = None
 
     NN_CURRENT_NOODLE = Number.ZERO()
     NN_IO = Number.ONE()
 
-    def __init__(self):
-        """ 새로운 Memory을 생성합니다. """
+    def __init__(self, interpreter):
+        """ interpreter가 사용할 새로운 Memory을 생성합니다.
+
+        :param interpreter: 입출력과 통계를 사용할 Interpreter
+        :type interpreter: interpreter.Interpreter
+        """
         Bowl.__init__(self, None)
+        self.interpreter = interpreter
+        self._current = None
+        self._positions = number_dict()
+        self._cells = []
+        self._accesses = []
+        self.recorder = None
+        self.reads = 0
+        self.writes = 0
+        self.current_reads = 0
+        self.current_writes = 0
+
+    def wad(self):
+        """ 현재 noodle number와 나머지 cell을 담은 Wad를 새로 만들어 반환합니다.
+
+        :return: wad
+        :rtype: Wad
+        """
+        wad = Wad(None)
+        if self._current is not None:
+            wad.put(self._current)
+        for noodle in self._cells:
+            wad.put(noodle)
+        return wad
+
+    def path_to(self, bowl):
+        """ cell에 담긴 Bowl을 따라가서 bowl에 이르는 noodle number의 목록을
+        반환합니다.
+
+        noodle number가 상수이고 값이 평가된 Noodle만 따라가며, 여러 경로가 있으면
+        처음 찾은 경로를 반환합니다. bowl에 이르지 못하면 None을 반환합니다.
+
+        :param bowl: 찾을 Bowl
+        :type bowl: Bowl
+        :return: 첫 cell부터 bowl까지의 noodle number
+        :rtype: list[Number]|None
+        """
+        visited = {}
+        for noodle in self._cells:
+            path = _path_to(noodle, bowl, visited)
+            if path is not None:
+                return path
+        return None
+
+    def current_noodle(self):
+        """ 현재 noodle number를 담은 Noodle을 반환합니다.
+
+        아직 현재 noodle number를 지정하지 않았다면 KeyError를 발생시킵니다.
+
+        :return: 현재 noodle number의 Noodle
+        :rtype: Noodle
+        """
+        if COUNTING.enabled:
+            self.current_reads += 1
+        if self._current is None:
+            raise KeyError("Cannot found the noodle")
+        return self._current
 
     def get_noodle(self, number):
         """ number를 noodle number로 가지는 Noodle을 반환합니다.
 
         만약 number가 NN_IO일 경우, 표준 입력에서 문자열을 가져와 Noodle의 expr에
         Bowl으로 변환해 담아서 반환합니다. 모든 입력은 utf-8로 인코딩합니다.
+        입력을 record 단위로 읽도록 설정했다면 입력 전체 대신 다음 record를
+        가져옵니다.
 
         :param number: 가져올 Noodle의 noodle number
         :type number: Number
         :return: 해당 Noodle
         :rtype: Noodle
         """
+        interpreter = self.interpreter
+        if COUNTING.enabled:
+            interpreter.stats.get_noodle_calls += 1
+        if not isinstance(number, Number):
+            raise KeyError("Cannot found the noodle")
         if number.eq(Memory.NN_IO):
-            input_str = io.read_data(io.STDIN)
+            interpreter.tracker.record_effect()
+            input_str = interpreter.read_input()
             return Noodle(ValueExpr(Memory.NN_IO),
                           ValueExpr(Bowl.from_str(input_str)))
-        else:
-            return Bowl.get_noodle(self, number)
+        interpreter.tracker.record_read(self, number)
+        if number.eq(Memory.NN_CURRENT_NOODLE):
+            return self.current_noodle()
+        if COUNTING.enabled:
+            self.reads += 1
+        position = self._positions.get(number, -1)
+        if position == -1:
+            raise KeyError("Cannot found the noodle")
+        self._accesses[position] += 1
+        return self._cells[position]
 
     def set_noodle(self, number, value_expr):
         """ number를 noodle number로 가지는 Noodle의 expr를 변경합니다.
@@ -743,18 +1535,40 @@ class Memory(Bowl):
         :return: NullExpr
         :rtype: NullExpr
         """
+        interpreter = self.interpreter
+        if COUNTING.enabled:
+            interpreter.stats.set_noodle_calls += 1
+        if not isinstance(number, Number):
+            raise gen_error("Noodle numbers must be a Number. %s is not a "
+                            "Number" % (number.log_string(),))
         if number.eq(Memory.NN_IO):
+            interpreter.tracker.record_effect()
             bowl_to_print = value_expr.value()
             if not isinstance(bowl_to_print, Bowl):
                 raise gen_error("Could not print it as string, "
                                 "expr is not a Bowl: %s" % (
                                     bowl_to_print.log_string()))
-            io.write_data(io.STDOUT, Bowl.to_str(bowl_to_print))
+            interpreter.write(Bowl.to_utf8(bowl_to_print))
             return NULL_EXPR_INST
         elif number.eq(Memory.NN_CURRENT_NOODLE):
             return NULL_EXPR_INST
+        interpreter.tracker.record_effect()
+        self.notify(number)
+        if COUNTING.enabled:
+            self.writes += 1
+        if self.recorder is not None:
+            self.recorder.record_write([number], value_expr.value())
+        position = self._positions.get(number, -1)
+        if position == -1:
+            self._positions[number] = len(self._cells)
+            self._cells.append(Noodle(to_value_expr(number), value_expr))
+            self._accesses.append(1)
+            if COUNTING.enabled:
+                interpreter.stats.record_memory_cells(self.cell_count())
         else:
-            return Bowl.set_noodle(self, number, value_expr)
+            self._cells[position].set_expr(value_expr)
+            self._accesses[position] += 1
+        return NULL_EXPR_INST
 
     def set_current_noodle_number(self, value_expr):
         """ 현재 noodle number를 지정합니다.
@@ -763,7 +1577,58 @@ class Memory(Bowl):
         :return: NullExpr
         :rtype: NullExpr
         """
-        return Bowl.set_noodle(self, Memory.NN_CURRENT_NOODLE, value_expr)
+        self.interpreter.tracker.record_effect()
+        self.notify(Memory.NN_CURRENT_NOODLE)
+        if COUNTING.enabled:
+            self.current_writes += 1
+        if self._current is None:
+            self._current = Noodle(to_value_expr(Memory.NN_CURRENT_NOODLE),
+                                   value_expr)
+        else:
+            self._current.set_expr(value_expr)
+        return NULL_EXPR_INST
+
+    def size(self):
+        """ 담고 있는 Noodle의 수를 반환합니다.
+
+        :rtype: int
+        """
+        return self.cell_count()
+
+    def cell_count(self):
+        """ 값이 담긴 cell의 수를 반환합니다. 현재 noodle number도 포함합니다.
+
+        :rtype: int
+        """
+        count = len(self._cells)
+        if self._current is not None:
+            count += 1
+        return count
+
+    def cell_accesses(self):
+        """ cell마다 noodle number와 읽고 쓴 횟수를 cell이 생긴 순서대로 반환합니다.
+
+        :rtype: list[(Number, int)]
+        """
+        result = []
+        for position in range(len(self._cells)):
+            nn = self._cells[position].constant_nn()
+            result.append((nn, self._accesses[position]))
+        return result
+
+    def reset_stats(self):
+        """ 읽고 쓴 횟수를 0으로 만듭니다. """
+        self.reads = 0
+        self.writes = 0
+        self.current_reads = 0
+        self.current_writes = 0
+        for position in range(len(self._accesses)):
+            self._accesses[position] = 0
+
+    def log_stats(self):
+        return "Memory(cells=%d, reads=%d, writes=%d, current_reads=%d, " \
+            "current_writes=%d)" % (self.cell_count(), self.reads, self.writes,
+                                    self.current_reads, self.current_writes)
 
     def log_string(self):
         result = "{"
@@ -781,11 +1646,244 @@ class Memory(Bowl):
         return result + "\n}"
 
 
+class Dependency(object):
+    """ 평가 중에 읽은 cell이 바뀌면 다시 평가해야 하는 값을 나타내는 class입니다.
+
+    세부적인 동작은 해당 class를 상속받은 class에서 정의합니다.
+    """
+
+    def __init__(self):
+        """ 새로운 Dependency를 생성합니다. """
+        self.valid = False
+        self.pure = True
+
+    def invalidate(self):
+        """ 읽은 cell이 바뀌었으므로 다시 평가해야 함을 표시합니다. """
+        self.valid = False
+
+
+class DependencyTracker(object):
+    """ 평가 중인 Dependency가 읽은 cell을 기록하는 class입니다.
+
+    평가 중에 cell에 값을 쓰거나, 입출력을 하거나, 오류를 출력한 Dependency는 평가
+    결과를 재사용할 수 없으므로 pure하지 않은 것으로 표시합니다.
+    """
+
+    def __init__(self):
+        """ 새로운 DependencyTracker를 생성합니다. """
+        self.current = None
+
+    def start(self, dependency):
+        """ dependency의 평가를 시작합니다.
+
+        :param dependency: 평가할 Dependency
+        :type dependency: Dependency
+        :return: 이전에 평가 중이던 Dependency
+        :rtype: Dependency|None
+        """
+        previous = self.current
+        self.current = dependency
+        dependency.pure = True
+        return previous
+
+    def stop(self, previous):
+        """ 평가 중인 Dependency의 평가를 마칩니다.
+
+        :param previous: start가 반환한 Dependency
+        :type previous: Dependency|None
+        """
+        self.current = previous
+
+    def record_read(self, bowl, number):
+        """ 평가 중인 Dependency가 bowl의 number cell을 읽었음을 기록합니다.
+
+        :param bowl: 읽은 Bowl
+        :type bowl: Bowl
+        :param number: 읽은 cell의 noodle number
+        :type number: Number
+        """
+        dependency = self.current
+        if dependency is None:
+            return
+        if not isinstance(number, Number):
+            dependency.pure = False
+            return
+        bowl.watch(number, dependency)
+
+    def record_effect(self):
+        """ 평가 중인 Dependency가 부수 효과를 일으켰음을 기록합니다. """
+        if self.current is not None:
+            self.current.pure = False
+
+
+def _number_eq(a, b):
+    return a.eq(b)
+
+
+def _number_hash(a):
+    return a.hash()
+
+
+@specialize.call_location()
+def number_dict():
+    """ Number를 key로 하는 새 dict를 생성합니다.
+
+    호출한 곳마다 따로 annotation되므로 dict마다 다른 type의 값을 담을 수 있습니다.
+
+    :return: 빈 dict
+    :rtype: r_dict
+    """
+    return r_dict(_number_eq, _number_hash)
+
+
+def to_value_expr(value):
+    """ value를 가지는 ValueExpr을 반환합니다.
+
+    작은 Number와 Null은 공유되는 ValueExpr을 반환합니다.
+
+    :param value: value
+    :type value: Value
+    :return: ValueExpr
+    :rtype: ValueExpr
+    """
+    if isinstance(value, Number):
+        return NUMBER_CACHE.value_expr(value)
+    elif value is NULL_INST:
+        return NULL_EXPR_INST
+    return ValueExpr(value)
+
+
+def _record_write(interpreter, bowl, number, value_expr):
+    """ trace를 기록하는 중이고 bowl이 Memory의 cell에 담겨 있으면, bowl의 number
+    cell에 value_expr의 값을 썼음을 cell부터의 경로와 함께 기록합니다.
+
+    :type interpreter: interpreter.Interpreter
+    :type bowl: Bowl
+    :type number: Number
+    :type value_expr: ValueExpr
+    """
+    memory = interpreter.memory
+    if memory.recorder is None:
+        return
+    path = memory.path_to(bowl)
+    if path is not None:
+        path.append(number)
+        memory.recorder.record_write(path, value_expr.value())
+
+
+def _path_to(noodle, bowl, visited):
+    """ noodle의 값이 bowl이거나 bowl을 담고 있으면 noodle부터 bowl까지의 noodle
+    number 목록을, 아니면 None을 반환합니다.
+
+    :type noodle: Noodle
+    :type bowl: Bowl
+    :param visited: 이미 따라간 Bowl
+    :type visited: dict
+    :rtype: list[Number]|None
+    """
+    nn = noodle.constant_nn()
+    expr = noodle.expr()
+    if nn is None or not isinstance(expr, ValueExpr):
+        return None
+    value = expr.value()
+    if not isinstance(value, Bowl) or isinstance(value, Memory):
+        return None
+    if value is bowl:
+        return [nn]
+    if value in visited:
+        return None
+    visited[value] = None
+    if isinstance(value, StrBowl) and value._wad is None:
+        # 문자열에서 바로 만든 cell은 Number이므로 값을 쓴 cell만 따라갑니다.
+        if value._assigned is None:
+            return None
+        children = value._assigned.values()
+    else:
+        children = value.wad().noodles()
+    for child in children:
+        path = _path_to(child, bowl, visited)
+        if path is not None:
+            return [nn] + path
+    return None
+
+
+def _str_values(bowl):
+    values = []
+    index = 0
+    while True:
+        try:
+            noodle = bowl.get_noodle(Number.from_ints(index))
+        except KeyError:
+            break
+        values.append(_str_value(noodle))
+        index += 1
+    return values
+
+
+def _str_value(noodle):
+    noodle_value = noodle.expr().eval().value()
+    if not isinstance(noodle_value, Number):
+        raise gen_error("Could not convert it to string, "
+                        "noodle value is not a Number: %s" % (
+                            noodle_value.log_string()))
+    elif not noodle_value.is_integer():
+        raise gen_error("Could not convert it to string, "
+                        "noodle value's denominator is not 1: %s"
+                        % (noodle_value.log_string()))
+    code = noodle_value.toint()
+    if code < 0 or code > 0x10FFFF:
+        raise ValueError("unichr() arg not in range(0x110000)")
+    return code
+
+
+def _encode_utf8(codes):
+    """ 문자 code의 목록을 utf-8로 인코딩합니다.
+
+    unicode.encode처럼 짝이 맞는 surrogate는 하나의 문자로 합쳐서 인코딩합니다.
+
+    :param codes: 문자 code의 목록
+    :type codes: list[int]
+    :return: utf-8로 인코딩된 문자열
+    :rtype: str
+    """
+    from rpython.rlib.rstring import StringBuilder
+    builder = StringBuilder(len(codes))
+    i = 0
+    length = len(codes)
+    while i < length:
+        code = codes[i]
+        i += 1
+        if code < 0x80:
+            builder.append(chr(code))
+            continue
+        elif code < 0x800:
+            builder.append(chr(0xC0 | (code >> 6)))
+            builder.append(chr(0x80 | (code & 0x3F)))
+            continue
+        if 0xD800 <= code <= 0xDBFF and i < length and \
+                0xDC00 <= codes[i] <= 0xDFFF:
+            code = 0x10000 + (((code & 0x3FF) << 10) | (codes[i] & 0x3FF))
+            i += 1
+        if code < 0x10000:
+            builder.append(chr(0xE0 | (code >> 12)))
+        else:
+            builder.append(chr(0xF0 | (code >> 18)))
+            builder.append(chr(0x80 | ((code >> 12) & 0x3F)))
+        builder.append(chr(0x80 | ((code >> 6) & 0x3F)))
+        builder.append(chr(0x80 | (code & 0x3F)))
+    return builder.build()
+
+
 def gen_error(msg):
-    io.write_data(io.STDOUT, ("Runtime Error: %s\n" % (msg,)).decode("utf-8"))
+    interpreter = current()
+    interpreter.tracker.record_effect()
+    interpreter.write_message(("Runtime Error: %s\n" % (msg,)).decode("utf-8"))
     return RuntimeError(msg)
 
 
 NULL_INST = Null()
 NULL_EXPR_INST = ValueExpr(NULL_INST)
-MEM = Memory()
\ No newline at end of file
+NUMBER_CACHE = NumberCache()
+NUMBER_CACHE.put(Number.ZERO())
+NUMBER_CACHE.put(Number.ONE())
+MEM_EXPR = MemoryExpr()
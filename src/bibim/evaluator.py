@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+from .utils import safe_get_value
+
+
+class Evaluator(object):
+    """ Expr을 평가하는 class입니다.
+
+    기본 Evaluator는 Expr tree를 재귀적으로 평가합니다. 다른 실행 방식은 해당 class를
+    상속받은 class에서 정의합니다.
+    """
+
+    def value(self, expr):
+        """ expr을 평가한 결과의 Value를 반환합니다.
+
+        평가 중에 발생한 예외는 그대로 전달됩니다.
+
+        :param expr: 평가할 Expr
+        :type expr: datatype.Expr
+        :return: 평가 결과
+        :rtype: datatype.Value
+        """
+        return expr.eval().value()
+
+    def safe_value(self, expr):
+        """ expr을 평가한 결과의 Value를 반환합니다.
+
+        평가 중에 예외가 발생하면 datatype.NULL_INST를 반환합니다.
+
+        :param expr: 평가할 Expr
+        :type expr: datatype.Expr
+        :return: 평가 결과
+        :rtype: datatype.Value
+        """
+        return safe_get_value(expr)
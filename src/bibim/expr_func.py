@@ -70,7 +70,7 @@ class FuncAssign(Func):
     def __init__(self, bowl=None, nn=None, value_expr=None):
         """ FuncAssign를 생성합니다.
 
-        만약 bowl이 None이라면 기본값으로 datatype.ValueExpr(datatype.MEM)를
+        만약 bowl이 None이라면 기본값으로 datatype.MEM_EXPR를
         사용합니다.
 
         :param bowl: assign 대상
@@ -80,8 +80,7 @@ class FuncAssign(Func):
         :param value_expr: assign할 Value를 가진 ValueExpr
         :type value_expr: ValueExpr
         """
-        self.bowl = bowl if bowl is not None else datatype.ValueExpr(
-            datatype.MEM)
+        self.bowl = bowl if bowl is not None else datatype.MEM_EXPR
         self.nn = nn
         self.value_expr = value_expr
 
@@ -134,7 +133,7 @@ class FuncDeno(Func):
         number = safe_get_value(self.number, datatype.Number)
         if number is datatype.NULL_INST:
             return datatype.NULL_EXPR_INST
-        return datatype.ValueExpr(number.denominator_number())
+        return datatype.to_value_expr(number.denominator_number())
 
 
 class FuncPlus(Func):
@@ -169,7 +168,7 @@ class FuncPlus(Func):
         r_number = safe_get_value(self.r_number, datatype.Number)
         if r_number is datatype.NULL_INST:
             return datatype.NULL_EXPR_INST
-        return datatype.ValueExpr(l_number.add(r_number))
+        return datatype.to_value_expr(l_number.add(r_number))
 
 
 class FuncMinus(Func):
@@ -204,7 +203,7 @@ class FuncMinus(Func):
         r_number = safe_get_value(self.r_number, datatype.Number)
         if r_number is datatype.NULL_INST:
             return datatype.NULL_EXPR_INST
-        return datatype.ValueExpr(l_number.sub(r_number))
+        return datatype.to_value_expr(l_number.sub(r_number))
 
 
 class FuncMul(Func):
@@ -239,7 +238,7 @@ class FuncMul(Func):
         r_number = safe_get_value(self.r_number, datatype.Number)
         if r_number is datatype.NULL_INST:
             return datatype.NULL_EXPR_INST
-        return datatype.ValueExpr(l_number.mul(r_number))
+        return datatype.to_value_expr(l_number.mul(r_number))
 
 
 class FuncNumberSep(Func):
@@ -268,7 +267,7 @@ class FuncNumberSep(Func):
         r_number = safe_get_value(self.r_number, datatype.Number)
         if r_number is datatype.NULL_INST:
             return datatype.NULL_EXPR_INST
-        return datatype.ValueExpr(l_number.div(r_number))
+        return datatype.to_value_expr(l_number.div(r_number))
 
     def log_string(self):
         return "FuncNumberSep(%s, %s)" % (self.l_number.log_string(), self.r_number.log_string())
@@ -309,7 +308,7 @@ class FuncAnd(Func):
         r_number = safe_get_value(self.r_number, datatype.Number)
         if r_number is datatype.NULL_INST:
             return datatype.NULL_EXPR_INST
-        return datatype.ValueExpr(l_number._and(r_number))
+        return datatype.to_value_expr(l_number._and(r_number))
 
 
 class FuncOr(Func):
@@ -344,7 +343,7 @@ class FuncOr(Func):
         r_number = safe_get_value(self.r_number, datatype.Number)
         if r_number is datatype.NULL_INST:
             return datatype.NULL_EXPR_INST
-        return datatype.ValueExpr(l_number._or(r_number))
+        return datatype.to_value_expr(l_number._or(r_number))
 
 
 class FuncNot(Func):
@@ -373,7 +372,7 @@ class FuncNot(Func):
         number = safe_get_value(self.number, datatype.Number)
         if number is datatype.NULL_INST:
             return datatype.NULL_EXPR_INST
-        return datatype.ValueExpr(number.not_f())
+        return datatype.to_value_expr(number.not_f())
 
 
 class FuncEq(Func):
@@ -408,7 +407,7 @@ class FuncEq(Func):
         r_number = safe_get_value(self.r_number, datatype.Number)
         if r_number is datatype.NULL_INST:
             return datatype.NULL_EXPR_INST
-        return datatype.ValueExpr(l_number.eq_f(r_number))
+        return datatype.to_value_expr(l_number.eq_f(r_number))
 
 
 class FuncGt(Func):
@@ -443,7 +442,7 @@ class FuncGt(Func):
         r_number = safe_get_value(self.r_number, datatype.Number)
         if r_number is datatype.NULL_INST:
             return datatype.NULL_EXPR_INST
-        return datatype.ValueExpr(l_number.gt_f(r_number))
+        return datatype.to_value_expr(l_number.gt_f(r_number))
 
 
 class FuncLt(Func):
@@ -478,4 +477,4 @@ class FuncLt(Func):
         r_number = safe_get_value(self.r_number, datatype.Number)
         if r_number is datatype.NULL_INST:
             return datatype.NULL_EXPR_INST
-        return datatype.ValueExpr(l_number.lt_f(r_number))
+        return datatype.to_value_expr(l_number.lt_f(r_number))
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+""" Bibim 프로그램 하나를 실행하는 데 필요한 상태를 묶은 Interpreter입니다.
+
+Memory, 표준 입출력 stream, 실행 통계와 DependencyTracker는 모두 Interpreter가
+가집니다. 파싱된 code의 '@'는 특정 Memory 대신 실행 중인 Interpreter의 Memory를
+가리키므로, 한 process에서 여러 프로그램을 차례로 또는 thread마다 따로 실행해도
+상태가 섞이지 않습니다. 실행 중인 Interpreter는 thread마다 따로 기록합니다.
+"""
+from __future__ import absolute_import
+
+from . import io
+from .mode import debug_loop, debug_time
+from .rlib import JitDriver, ThreadLocalReference
+from .stats import COUNTING, RunStats
+
+jitdriver = JitDriver(
+    greens=[
+        'current_noodle',
+        'bowl'
+    ],
+    reds='auto',
+    is_recursive=True
+)
+
+
+class Interpreter(object):
+    """ Memory와 입출력, 실행 통계를 가지고 Bibim 프로그램을 실행하는 class입니다.
+
+    Interpreter의 method가 아닌 곳에서 Memory나 입출력을 사용하려면 enter로 해당
+    Interpreter를 실행 중인 Interpreter로 지정해야 합니다.
+    """
+
+    def __init__(self, stdin=io.STDIN, stdout=io.STDOUT):
+        """ 새로운 Interpreter를 생성합니다.
+
+        :param stdin: @:1에서 읽을 file descriptor
+        :type stdin: int
+        :param stdout: @:1에 쓴 내용과 오류를 출력할 file descriptor
+        :type stdout: int
+        """
+        from .datatype import DependencyTracker, Memory, ValueExpr
+        self.stdout = io.OutputBuffer(stdout)
+        self.stdin = io.InputStream(stdin)
+        self.stats = RunStats()
+        self.tracker = DependencyTracker()
+        self.memory = Memory(self)
+        self.memory_expr = ValueExpr(self.memory)
+
+    def configure(self, options):
+        """ 실행 옵션에 따라 입출력 방식과 통계를 모을지 여부를 정합니다.
+
+        통계를 모으면 process의 모든 Interpreter가 횟수를 세기 시작합니다.
+
+        :param options: 실행 옵션
+        :type options: mode.Options
+        """
+        self.stdout.configure(options.buffer_size, options.line_buffered)
+        self.stdin.configure(options.stream_input, options.input_delimiter)
+        self.stats.timing = options.stats is not None
+        if self.stats.timing or debug_time:
+            COUNTING.enabled = True
+
+    def enter(self):
+        """ 현재 thread에서 실행 중인 Interpreter를 self로 바꿉니다.
+
+        :return: 이전에 실행 중이던 Interpreter
+        :rtype: Interpreter|None
+        """
+        previous = _CURRENT.get()
+        _CURRENT.set(self)
+        return previous
+
+    def leave(self, previous):
+        """ 실행 중인 Interpreter를 enter 전으로 되돌립니다.
+
+        :param previous: enter가 반환한 Interpreter
+        :type previous: Interpreter|None
+        """
+        self.stdout.flush()
+        _CURRENT.set(previous)
+
+    def write(self, data):
+        """ data를 표준 출력 buffer에 씁니다.
+
+        :param data: 쓸 data
+        :type data: str
+        """
+        self.stdout.write(data)
+
+    def write_message(self, message):
+        """ message를 utf-8로 인코딩해서 표준 출력에 쓰고 바로 flush합니다.
+
+        :param message: 출력할 메시지
+        :type message: unicode
+        """
+        self.stdout.write(message.encode("utf-8"))
+        self.stdout.flush()
+
+    def flush(self):
+        self.stdout.flush()
+
+    def read_input(self):
+        """ @:1에서 읽을 표준 입력을 반환합니다.
+
+        record 단위로 읽도록 설정되었다면 다음 record를, 그렇지 않다면 입력의 끝까지
+        읽은 내용을 반환합니다. 입력을 기다리기 전에 지금까지의 출력을 보여줍니다.
+
+        :return: 읽은 입력
+        :rtype: str
+        """
+        self.stdout.flush()
+        if self.stdin.streaming:
+            return self.stdin.read_record()
+        return io.read_data(self.stdin.fp)
+
+    def parse(self, code_string):
+        """ code_string을 파싱한 결과를 반환합니다.
+
+        stats.timing이 켜져 있으면 token을 미리 모두 나눠서 token을 나누는 시간을
+        따로 기록합니다.
+
+        :param code_string: parsing할 code 문자열
+        :type code_string: str
+        :return: 파싱된 결과.
+        :rtype: datatype.Value|datatype.Expr|datatype.Noodle
+        """
+        from .lexer import lexer
+        from .parser import parser
+        stats = self.stats
+        if not stats.timing:
+            return parser.parse(lexer.lex(code_string))
+        start = stats.now()
+        tokens = lexer.lex_all(code_string)
+        stats.lex_time += stats.now() - start
+        return parser.parse(tokens)
+
+    def run(self, bowl_inst, evaluator=None, profiler=None, recorder=None):
+        """ bowl_inst를 self의 Memory에서 실행합니다.
+
+        bowl_inst는 self가 파싱하거나 읽은 Bowl이어야 합니다. 실행 중에 Bowl 안의
+        Noodle이 바뀔 수 있으므로 다른 Interpreter와 같은 Bowl을 공유하면 안
+        됩니다.
+
+        :param bowl_inst: 실행할 Bowl instance
+        :type bowl_inst: datatype.Bowl
+        :param evaluator: Expr을 평가할 Evaluator. None이면 Expr tree를 그대로
+            평가합니다.
+        :type evaluator: Evaluator|None
+        :param profiler: Noodle별 실행 시간을 기록할 Profiler
+        :type profiler: Profiler|None
+        :param recorder: 실행 과정을 기록할 TraceRecorder
+        :type recorder: TraceRecorder|None
+        """
+        from . import datatype
+        from .evaluator import Evaluator
+        from .scheduler import Scheduler
+        if not isinstance(bowl_inst, datatype.Bowl):
+            raise AssertionError('The code must be a Bowl.')
+        if evaluator is None:
+            evaluator = Evaluator()
+        mem = self.memory
+        previous = self.enter()
+        mem.recorder = recorder
+        try:
+            mem.set_current_noodle_number(datatype.NULL_EXPR_INST)
+            self._loop(Scheduler(bowl_inst, evaluator, profiler), bowl_inst,
+                       evaluator, profiler, recorder)
+        finally:
+            mem.recorder = None
+            self.leave(previous)
+
+    def _loop(self, scheduler, bowl_inst, evaluator, profiler, recorder):
+        """ scheduler가 더 이상 Noodle을 찾지 못할 때까지 Noodle을 실행합니다. """
+        from . import datatype
+        mem = self.memory
+        current_noodle = next_noodle(scheduler, profiler)
+        while current_noodle is not None:
+            jitdriver.jit_merge_point(
+                current_noodle=current_noodle,
+                bowl=bowl_inst
+            )
+            if debug_loop:
+                print("Noodle number expression: %s" %
+                      current_noodle.nn_expr().log_expr())
+            current_nn = datatype.to_value_expr(scheduler.current_nn())
+            if debug_loop:
+                print("Noodle number: %s" % current_nn.log_expr())
+            mem.set_current_noodle_number(current_nn)
+            self.stats.steps += 1
+            if recorder is not None:
+                recorder.record_step(current_noodle, scheduler.current_nn())
+            current_n_expr = current_noodle.expr()
+            if debug_loop:
+                print("Noodle expression: %s" % current_n_expr.log_expr())
+            if debug_loop:
+                print("STDIN/OUT start")
+            if profiler is None:
+                current_n = evaluator.value(current_n_expr)
+            else:
+                start = profiler.now()
+                try:
+                    current_n = evaluator.value(current_n_expr)
+                finally:
+                    profiler.record_body(current_noodle, profiler.now() - start)
+            if debug_loop:
+                print("\nSTDIN/OUT end")
+            if debug_loop:
+                print("Noodle expression result: %s" % current_n.log_expr())
+            if debug_loop:
+                print("Memory: %s" % mem.log_contents())
+            current_noodle = next_noodle(scheduler, profiler)
+
+
+def next_noodle(scheduler, profiler):
+    if profiler is None:
+        return scheduler.get_next_noodle()
+    start = profiler.now()
+    noodle = scheduler.get_next_noodle()
+    profiler.record_schedule(profiler.now() - start)
+    return noodle
+
+
+_CURRENT = ThreadLocalReference(Interpreter, loop_invariant=True)
+# Interpreter를 실행하기 전에 만든 Number 등을 세는 통계
+IDLE_STATS = RunStats()
+
+
+def current():
+    """ 현재 thread에서 실행 중인 Interpreter를 반환합니다.
+
+    실행 중인 Interpreter가 없으면 새 Interpreter를 만들어 지정합니다.
+
+    :rtype: Interpreter
+    """
+    interpreter = _CURRENT.get()
+    if interpreter is None:
+        interpreter = Interpreter()
+        _CURRENT.set(interpreter)
+    return interpreter
+
+
+def current_stats():
+    """ 현재 thread에서 실행 중인 Interpreter의 통계를 반환합니다.
+
+    실행 중인 Interpreter가 없으면 IDLE_STATS를 반환합니다.
+
+    :rtype: RunStats
+    """
+    interpreter = _CURRENT.get()
+    if interpreter is None:
+        return IDLE_STATS
+    return interpreter.stats
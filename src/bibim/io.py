@@ -2,20 +2,255 @@
 from __future__ import absolute_import
 
 import os
+import stat
 
 STDIN = 0
 STDOUT = 1
+STDERR = 2
+
+# pipe나 terminal에서 한 번에 읽는 크기 (byte)
+READ_CHUNK_SIZE = 65536
+# 표준 출력 buffer의 기본 크기 (byte)
+DEFAULT_BUFFER_SIZE = 8192
+
+
+class OutputBuffer(object):
+    """ file descriptor로 쓰는 data를 모았다가 한 번에 쓰는 buffer입니다.
+
+    모인 data가 buffer 크기 이상이 되거나 flush를 호출하면 os.write로 씁니다.
+    buffer 크기가 0이면 buffer 없이 바로 쓰고, line 단위 모드에서는 줄바꿈이
+    포함된 data를 쓸 때마다 flush합니다.
+    """
+
+    def __init__(self, fp, size=DEFAULT_BUFFER_SIZE, line_buffered=False):
+        """ 새로운 OutputBuffer를 생성합니다.
+
+        :param fp: 쓸 file descriptor
+        :type fp: int
+        :param size: buffer 크기
+        :type size: int
+        :param line_buffered: line 단위로 flush할지 여부
+        :type line_buffered: bool
+        """
+        self.fp = fp
+        self.size = size
+        self.line_buffered = line_buffered
+        self._chunks = []
+        self._length = 0
+
+    def configure(self, size, line_buffered):
+        """ buffer 크기와 line 단위 모드를 바꿉니다. 모인 data는 먼저 씁니다.
+
+        :param size: buffer 크기
+        :type size: int
+        :param line_buffered: line 단위로 flush할지 여부
+        :type line_buffered: bool
+        """
+        self.flush()
+        self.size = size
+        self.line_buffered = line_buffered
+
+    def write(self, data):
+        """ data를 buffer에 추가하고, 필요하면 flush합니다.
+
+        :param data: 쓸 data
+        :type data: str
+        """
+        self._chunks.append(data)
+        self._length += len(data)
+        if self._length >= self.size or \
+                (self.line_buffered and data.find("\n") >= 0):
+            self.flush()
+
+    def flush(self):
+        """ buffer에 모인 data를 모두 씁니다. """
+        if self._length == 0:
+            return
+        data = "".join(self._chunks)
+        self._chunks = []
+        self._length = 0
+        write_all(self.fp, data)
+
+
+class InputStream(object):
+    """ file descriptor에서 구분자로 나뉜 record를 하나씩 읽는 class입니다.
+
+    구분자가 빈 문자열이면 os.read가 반환한 chunk를 하나의 record로 사용하며,
+    chunk 끝에서 잘린 utf-8 문자는 다음 record로 넘깁니다. 읽었지만 아직 반환하지
+    않은 data만 들고 있으므로, 입력 전체의 크기와 관계없이 record 하나의 크기만큼의
+    memory만 사용합니다.
+    """
+
+    def __init__(self, fp, delimiter="\n"):
+        """ 새로운 InputStream을 생성합니다.
+
+        :param fp: 읽을 file descriptor
+        :type fp: int
+        :param delimiter: record 구분자
+        :type delimiter: str
+        """
+        self.fp = fp
+        self.delimiter = delimiter
+        self.streaming = False
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def configure(self, streaming, delimiter):
+        """ record 단위로 읽을지 여부와 구분자를 바꿉니다.
+
+        :param streaming: record 단위로 읽을지 여부
+        :type streaming: bool
+        :param delimiter: record 구분자
+        :type delimiter: str
+        """
+        self.streaming = streaming
+        self.delimiter = delimiter
+
+    def _read(self):
+        if self._eof:
+            return ""
+        data = os.read(self.fp, READ_CHUNK_SIZE)
+        if len(data) == 0:
+            self._eof = True
+        return data
+
+    def read_record(self):
+        """ 다음 record를 구분자를 포함해서 반환합니다.
+
+        입력의 끝에서는 남은 data를, 더 이상 남은 data가 없으면 빈 문자열을
+        반환합니다.
+
+        :return: 다음 record
+        :rtype: str
+        """
+        if len(self.delimiter) == 0:
+            return self._read_chunk()
+        delimiter = self.delimiter
+        parts = []
+        while True:
+            buffer = self._buffer
+            index = buffer.find(delimiter, self._pos)
+            if index >= 0:
+                end = index + len(delimiter)
+                parts.append(buffer[self._pos:end])
+                self._pos = end
+                break
+            # 구분자가 두 chunk에 걸쳐 있을 수 있으므로 끝부분은 남겨둡니다.
+            cut = len(buffer) - len(delimiter) + 1
+            if cut < self._pos:
+                cut = self._pos
+            parts.append(buffer[self._pos:cut])
+            data = self._read()
+            if len(data) == 0:
+                parts.append(buffer[cut:])
+                self._buffer = ""
+                self._pos = 0
+                break
+            self._buffer = buffer[cut:] + data
+            self._pos = 0
+        return "".join(parts)
+
+    def _read_chunk(self):
+        buffer = self._buffer[self._pos:]
+        end = 0
+        # 입력의 끝이 아닌 한 빈 문자열을 반환하지 않습니다.
+        while end == 0 and not self._eof:
+            data = self._read()
+            if len(data) > 0:
+                buffer += data
+            end = len(buffer)
+            if not self._eof:
+                end = _utf8_boundary(buffer)
+        if self._eof:
+            end = len(buffer)
+        self._buffer = buffer[end:]
+        self._pos = 0
+        return buffer[:end]
+
+
+def _utf8_boundary(data):
+    """ data의 끝에서 잘린 utf-8 문자가 시작하는 위치를 반환합니다.
+
+    잘린 문자가 없으면 len(data)를 반환합니다.
+
+    :type data: str
+    :rtype: int
+    """
+    length = len(data)
+    i = length - 1
+    # utf-8 문자는 최대 4 byte이므로 마지막 3 byte만 확인합니다.
+    while i >= 0 and i >= length - 3:
+        byte = ord(data[i])
+        if byte & 0xC0 != 0x80:
+            if byte >= 0xF0:
+                size = 4
+            elif byte >= 0xE0:
+                size = 3
+            elif byte >= 0xC0:
+                size = 2
+            else:
+                size = 1
+            if i + size > length:
+                return i
+            return length
+        i -= 1
+    return length
+
+
+def write_all(fp, data):
+    """ data가 모두 써질 때까지 os.write를 호출합니다.
+
+    :param fp: 쓸 file descriptor
+    :type fp: int
+    :param data: 쓸 data
+    :type data: str
+    """
+    written = 0
+    while written < len(data):
+        written += os.write(fp, data[written:])
 
 
 def read_data(fp):
-    data = ""
+    """ fp에서 끝까지 읽은 내용을 반환합니다.
+
+    일반 파일은 남은 크기만큼 한 번에 읽고, pipe나 terminal은 chunk 단위로 읽어서
+    마지막에 한 번만 합칩니다.
+
+    :param fp: 읽을 file descriptor
+    :type fp: int
+    :return: 읽은 내용
+    :rtype: str
+    """
+    chunks = []
+    size = _remaining_size(fp)
+    if size > 0:
+        chunks.append(os.read(fp, size))
     while True:
-        read = os.read(fp, 4096)
+        read = os.read(fp, READ_CHUNK_SIZE)
         if len(read) == 0:
             break
-        data += read
-    return data
+        chunks.append(read)
+    if len(chunks) == 1:
+        return chunks[0]
+    return "".join(chunks)
+
+
+def _remaining_size(fp):
+    """ fp가 일반 파일이면 현재 위치부터 파일 끝까지의 크기를, 아니면 0을
+    반환합니다.
+
+    :type fp: int
+    :rtype: int
+    """
+    try:
+        st = os.fstat(fp)
+        if not stat.S_ISREG(st.st_mode):
+            return 0
+        return st.st_size - os.lseek(fp, 0, os.SEEK_CUR)
+    except OSError:
+        return 0
 
 
 def write_data(fp, data):
-    os.write(fp, data.encode('utf-8'))
+    write_all(fp, data.encode('utf-8'))
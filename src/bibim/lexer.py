@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import
 
-from rply import LexerGenerator
+from rply.errors import LexingError
+from rply.token import SourcePosition, Token
 
+# 각 token이 나타내는 문자열의 규칙입니다. lexer는 이 규칙을 정규식 대신 직접 구현합니다.
 op_map = {
     'NUMBER': r'\d[\d\s]*',
     'PLUS': r'\+',
@@ -28,11 +30,254 @@ op_map = {
     'MEM': r'@',
 }
 
-lg = LexerGenerator()
-for name, regex in op_map.items():
-    lg.add(name, regex)
+single_char_map = {
+    '+': 'PLUS',
+    '-': 'MINUS',
+    '*': 'MUL',
+    '/': 'NUMBER_SEP',
+    '(': 'EXPR_OPEN',
+    ')': 'EXPR_CLOSE',
+    '&': 'AND',
+    '|': 'OR',
+    '!': 'NOT',
+    '>': 'GT',
+    '<': 'LT',
+    ':': 'BOWL',
+    '{': 'BOWL_OPEN',
+    '}': 'BOWL_CLOSE',
+    '[': 'NOODLE_OPEN',
+    ';': 'NOODLE_SEP',
+    ']': 'NOODLE_CLOSE',
+    '=': 'ASSIGN',
+    '^': 'DENO',
+    '@': 'MEM',
+}
+
+
+def _is_space(c):
+    return c == ' ' or '\t' <= c <= '\r'
+
+
+def _is_digit(c):
+    return '0' <= c <= '9'
+
+
+class Lexer(object):
+    """ Bibim code를 token으로 나누는 lexer입니다.
+
+    첫 문자로 token의 종류를 정하고 code를 한 번만 읽습니다. 공백과 주석
+    ('~#'로 시작해서 '#~'로 끝나는 문자열)은 무시합니다.
+    """
+
+    def lex(self, s):
+        """ s를 token으로 나누는 LexerStream을 반환합니다.
+
+        :param s: Bibim code
+        :type s: str
+        :return: token stream
+        :rtype: LexerStream
+        """
+        return LexerStream(s)
+
+    def lex_all(self, s):
+        """ s를 미리 모두 token으로 나눈 TokenList를 반환합니다.
+
+        :param s: Bibim code
+        :type s: str
+        :return: token stream
+        :rtype: TokenList
+        """
+        stream = LexerStream(s)
+        tokens = []
+        error = None
+        try:
+            while True:
+                tokens.append(stream.next())
+        except StopIteration:
+            pass
+        except LexingError as e:
+            error = e
+        return TokenList(tokens, error)
+
+
+class TokenStream(object):
+    """ parser가 token을 하나씩 꺼내는 iterator의 base class입니다. """
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        """ 다음 token을 반환합니다. 끝에 도달하면 StopIteration을 발생시킵니다.
+
+        :rtype: Token
+        """
+        raise NotImplementedError
+
+    def __next__(self):
+        return self.next()
+
+
+class TokenList(TokenStream):
+    """ 미리 나눈 token을 차례로 꺼내는 iterator입니다.
+
+    token을 나누다가 LexingError가 발생했다면, 그 앞의 token을 모두 꺼낸 뒤에
+    같은 LexingError를 발생시킵니다.
+    """
+
+    def __init__(self, tokens, error):
+        """ 새로운 TokenList를 생성합니다.
+
+        :param tokens: token 목록
+        :type tokens: list[Token]
+        :param error: token을 나누다 발생한 오류
+        :type error: LexingError|None
+        """
+        self.tokens = tokens
+        self.error = error
+        self.idx = 0
+
+    def next(self):
+        if self.idx >= len(self.tokens):
+            if self.error is not None:
+                raise self.error
+            raise StopIteration
+        token = self.tokens[self.idx]
+        self.idx += 1
+        return token
+
+
+class LexerStream(TokenStream):
+    """ Bibim code에서 token을 하나씩 꺼내는 iterator입니다. """
+
+    def __init__(self, s):
+        """ 새로운 LexerStream을 생성합니다.
+
+        :param s: Bibim code
+        :type s: str
+        """
+        self.s = s
+        self.idx = 0
+        self._lineno = 1
+        self._last_nl = -1
+
+    def _consume(self, start, end):
+        """ s[start:end]를 읽고, 그 시작 위치의 column 번호를 반환합니다.
+
+        :type start: int
+        :type end: int
+        :rtype: int
+        """
+        colno = start - self._last_nl
+        s = self.s
+        for i in range(start, end):
+            if s[i] == '\n':
+                self._lineno += 1
+                self._last_nl = i
+        self.idx = end
+        return colno
+
+    def _comment_end(self, start):
+        """ start에서 시작하는 주석의 끝 위치를 반환합니다.
+
+        주석이 아니라면 -1을 반환합니다.
+
+        :type start: int
+        :rtype: int
+        """
+        s = self.s
+        length = len(s)
+        i = start + 1
+        while i < length and _is_space(s[i]):
+            i += 1
+        if i >= length or s[i] != '#':
+            return -1
+        body = i + 1
+        end = s.find('#~', body)
+        if end >= 0:
+            return end + 2
+        # '#~'가 없으면, 가장 뒤에 있는 '#' 공백 '~'에서 주석이 끝납니다.
+        tilde = s.rfind('~', body)
+        while tilde >= body:
+            j = tilde - 1
+            while j >= body and _is_space(s[j]):
+                j -= 1
+            if j >= body and s[j] == '#':
+                return tilde + 1
+            tilde = s.rfind('~', body, tilde)
+        return -1
+
+    def _skip_ignored(self):
+        """ 현재 위치의 공백과 주석을 건너뜁니다. """
+        s = self.s
+        length = len(s)
+        while self.idx < length:
+            c = s[self.idx]
+            if _is_space(c):
+                end = self.idx + 1
+                while end < length and _is_space(s[end]):
+                    end += 1
+                self._consume(self.idx, end)
+            elif c == '~':
+                end = self._comment_end(self.idx)
+                if end < 0:
+                    return
+                self._consume(self.idx, end)
+            else:
+                return
+
+    def next(self):
+        """ 다음 token을 반환합니다.
+
+        code의 끝에 도달하면 StopIteration을, 알 수 없는 문자를 만나면
+        LexingError를 발생시킵니다.
+
+        :return: 다음 token
+        :rtype: Token
+        """
+        self._skip_ignored()
+        s = self.s
+        length = len(s)
+        start = self.idx
+        if start >= length:
+            raise StopIteration
+        lineno = self._lineno
+        c = s[start]
+        if _is_digit(c):
+            end = start + 1
+            digits_end = end
+            stripped = None
+            while end < length:
+                c = s[end]
+                if _is_digit(c):
+                    if stripped is not None:
+                        stripped.append(c)
+                    elif digits_end != end:
+                        stripped = [s[start:digits_end], c]
+                    digits_end = end + 1
+                elif not _is_space(c):
+                    break
+                end += 1
+            if stripped is None:
+                value = s[start:digits_end]
+            else:
+                value = "".join(stripped)
+            colno = self._consume(start, end)
+            return Token('NUMBER', value, SourcePosition(start, lineno, colno))
+        elif c == '?':
+            end = start + 1
+            while end < length and _is_space(s[end]):
+                end += 1
+            if end < length and s[end] == '=':
+                end += 1
+                colno = self._consume(start, end)
+                return Token('EQ', s[start:end],
+                             SourcePosition(start, lineno, colno))
+        else:
+            name = single_char_map.get(c, None)
+            if name is not None:
+                colno = self._consume(start, start + 1)
+                return Token(name, c, SourcePosition(start, lineno, colno))
+        raise LexingError(None, SourcePosition(start, -1, -1))
 
-lg.ignore('\s+')
-lg.ignore('~\s*#((?!#~)[\s|\S])*#\s*~')
 
-lexer = lg.build()
+lexer = Lexer()
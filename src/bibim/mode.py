@@ -1,3 +1,181 @@
 # -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+from .io import DEFAULT_BUFFER_SIZE
+
 debug_loop = False
 debug_time = False
+# RPython으로 번역하는 중인지 여부. pybibim.py의 target이 bibim을 import하기 전에
+# 켭니다.
+translating = False
+
+VERSION = "0.1"
+
+# --profile이 collapsed stack을 저장하는 기본 파일 경로
+DEFAULT_PROFILE_STACKS = "bibim.folded"
+
+USAGE = """usage: pybibim.py [options] filename
+       pybibim.py [--cache-dir DIR] --compile DIR
+
+options:
+  --vm              Compile noodles to bytecode and run them on the stack VM
+  --cache           Reuse the parsed program stored in a .bbc file next to
+                    the source, creating it if needed
+  --cache-dir DIR   Like --cache, but store .bbc files in DIR
+  --compile DIR     Write .bbc files for every .bibim file under DIR and exit
+  --buffer-size N   Buffer up to N bytes of output before writing it
+                    (default 8192, 0 disables buffering)
+  --line-buffered   Write output whenever a printed string contains a newline
+  --stream-input    Make each read of @:1 return the next line of stdin
+                    instead of waiting for the end of the input
+  --input-delimiter STR
+                    Like --stream-input, but split stdin at STR
+                    (\\n, \\t, \\0 and \\\\ are unescaped; an empty STR
+                    returns stdin in chunks as they arrive)
+  --profile         Print the time spent in each noodle to stderr and write
+                    collapsed stacks for flamegraph tools to bibim.folded
+  --profile-stacks FILE
+                    Like --profile, but write the collapsed stacks to FILE
+  --trace FILE      Record executed noodles and memory writes to FILE
+                    (read it with tools/bbtrace.py)
+  --stats FILE      Write run counters and the time spent reading, lexing,
+                    parsing and running the program to FILE as JSON
+"""
+
+
+class OptionError(Exception):
+    """ 잘못된 명령행 인자가 주어졌을 때 발생하는 예외입니다. """
+
+    def __init__(self, msg, show_usage=True):
+        """ 새로운 OptionError를 생성합니다.
+
+        :param msg: 오류 메시지
+        :type msg: str
+        :param show_usage: 사용법을 함께 출력할지 여부
+        :type show_usage: bool
+        """
+        self.msg = msg
+        self.show_usage = show_usage
+
+
+class Options(object):
+    """ 실행 옵션을 담는 class입니다. """
+
+    def __init__(self):
+        """ 기본값을 가지는 Options를 생성합니다. """
+        self.filename = None
+        self.use_vm = False
+        self.use_cache = False
+        self.cache_dir = None
+        self.compile_dir = None
+        self.buffer_size = DEFAULT_BUFFER_SIZE
+        self.line_buffered = False
+        self.stream_input = False
+        self.input_delimiter = "\n"
+        self.profile = False
+        self.profile_stacks = DEFAULT_PROFILE_STACKS
+        self.trace = None
+        self.stats = None
+
+
+def parse_options(argv):
+    """ 명령행 인자로부터 Options를 만듭니다.
+
+    알 수 없는 옵션이 있거나, 값이 필요한 옵션에 값이 없거나, 파일 이름이 없으면
+    OptionError를 발생시킵니다. --compile을 사용할 때에는 파일 이름이 필요하지
+    않습니다.
+
+    :param argv: 명령행 인자
+    :type argv: list[str]
+    :return: 실행 옵션
+    :rtype: Options
+    """
+    options = Options()
+    index = 1
+    while index < len(argv):
+        arg = argv[index]
+        if arg == "--vm":
+            options.use_vm = True
+        elif arg == "--cache":
+            options.use_cache = True
+        elif arg == "--cache-dir":
+            index += 1
+            options.cache_dir = _option_value(argv, index, arg)
+            options.use_cache = True
+        elif arg == "--compile":
+            index += 1
+            options.compile_dir = _option_value(argv, index, arg)
+        elif arg == "--buffer-size":
+            index += 1
+            options.buffer_size = _int_option_value(argv, index, arg)
+        elif arg == "--line-buffered":
+            options.line_buffered = True
+        elif arg == "--stream-input":
+            options.stream_input = True
+        elif arg == "--input-delimiter":
+            index += 1
+            options.input_delimiter = _unescape(_option_value(argv, index, arg))
+            options.stream_input = True
+        elif arg == "--profile":
+            options.profile = True
+        elif arg == "--profile-stacks":
+            index += 1
+            options.profile_stacks = _option_value(argv, index, arg)
+            options.profile = True
+        elif arg == "--trace":
+            index += 1
+            options.trace = _option_value(argv, index, arg)
+        elif arg == "--stats":
+            index += 1
+            options.stats = _option_value(argv, index, arg)
+        elif arg.startswith("--"):
+            raise OptionError("Unknown option %s" % (arg,))
+        elif options.filename is None:
+            options.filename = arg
+        else:
+            raise OptionError("Too many filenames")
+        index += 1
+    if options.compile_dir is not None:
+        if options.filename is not None:
+            raise OptionError("--compile does not take a filename")
+    elif options.filename is None:
+        raise OptionError("You must supply a filename", len(argv) > 1)
+    return options
+
+
+def _option_value(argv, index, option):
+    if index >= len(argv):
+        raise OptionError("%s requires a value" % (option,))
+    return argv[index]
+
+
+def _int_option_value(argv, index, option):
+    value = _option_value(argv, index, option)
+    try:
+        number = int(value)
+    except ValueError:
+        raise OptionError("%s requires a number" % (option,))
+    if number < 0:
+        raise OptionError("%s requires a number" % (option,))
+    return number
+
+
+def _unescape(value):
+    result = []
+    index = 0
+    while index < len(value):
+        c = value[index]
+        if c == "\\" and index + 1 < len(value):
+            index += 1
+            c = value[index]
+            if c == "n":
+                c = "\n"
+            elif c == "t":
+                c = "\t"
+            elif c == "0":
+                c = "\0"
+            elif c != "\\":
+                result.append("\\")
+        result.append(c)
+        index += 1
+    return "".join(result)
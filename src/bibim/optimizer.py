@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+from . import datatype
+from .expr_func import FuncBowl, FuncAssign, FuncDeno, FuncPlus, FuncMinus, \
+    FuncMul, FuncNumberSep, FuncAnd, FuncOr, FuncNot, FuncEq, FuncGt, FuncLt
+
+
+class ConstantFolder(object):
+    """ 파싱된 Bowl에서 '@'나 Bowl 접근이 없는 Expr을 미리 평가하는 class입니다.
+
+    평가 결과가 Number인 Expr만 ValueExpr로 바꾸며, 같은 값을 가지는 ValueExpr은
+    하나의 객체를 공유합니다. 평가 중 오류가 발생하는 Expr은 실행 시점의 동작을
+    유지하기 위해 그대로 둡니다.
+    """
+
+    def __init__(self):
+        """ 새로운 ConstantFolder를 생성합니다. """
+        self._constants = datatype.number_dict()
+
+    def constant(self, number):
+        """ number를 value로 가지는 공유 ValueExpr을 반환합니다.
+
+        :param number: value
+        :type number: datatype.Number
+        :return: 공유 ValueExpr
+        :rtype: datatype.ValueExpr
+        """
+        value_expr = self._constants.get(number, None)
+        if value_expr is None:
+            value_expr = datatype.ValueExpr(number)
+            self._constants[number] = value_expr
+        return value_expr
+
+    def fold_bowl(self, bowl):
+        """ bowl의 모든 Noodle을 상수 접기한 새 Bowl을 반환합니다.
+
+        :param bowl: 파싱된 Bowl
+        :type bowl: datatype.Bowl
+        :return: 상수 접기한 Bowl
+        :rtype: datatype.Bowl
+        """
+        wad = datatype.Wad(None)
+        for noodle in bowl.wad().noodles():
+            folded = datatype.Noodle(self.fold_expr(noodle.nn_expr()),
+                                     self.fold_expr(noodle.expr()))
+            folded.set_position(noodle.lineno, noodle.colno)
+            wad.put(folded)
+        return datatype.Bowl(wad)
+
+    def fold_expr(self, expr):
+        """ expr을 상수 접기한 Expr을 반환합니다.
+
+        :param expr: 파싱된 Expr
+        :type expr: datatype.Expr
+        :return: 상수 접기한 Expr
+        :rtype: datatype.Expr
+        """
+        if isinstance(expr, datatype.MemoryExpr):
+            return expr
+        if isinstance(expr, datatype.ValueExpr):
+            value = expr.value()
+            if isinstance(value, datatype.Bowl):
+                return datatype.ValueExpr(self.fold_bowl(value))
+            elif isinstance(value, datatype.Number):
+                return self.constant(value)
+            return expr
+        func = expr.func()
+        if isinstance(func, FuncBowl):
+            func.bowl = self.fold_expr(func.bowl)
+            func.nn = self.fold_expr(func.nn)
+            return expr
+        elif isinstance(func, FuncAssign):
+            func.bowl = self.fold_expr(func.bowl)
+            func.nn = self.fold_expr(func.nn)
+            func.value_expr = self.fold_expr(func.value_expr)
+            return expr
+        elif isinstance(func, FuncDeno):
+            func.number = self.fold_expr(func.number)
+            is_constant = _is_number(func.number)
+        elif isinstance(func, FuncNot):
+            func.number = self.fold_expr(func.number)
+            is_constant = _is_number(func.number)
+        elif isinstance(func, FuncPlus):
+            func.l_number = self.fold_expr(func.l_number)
+            func.r_number = self.fold_expr(func.r_number)
+            is_constant = _is_number(func.l_number) and \
+                _is_number(func.r_number)
+        elif isinstance(func, FuncMinus):
+            func.l_number = self.fold_expr(func.l_number)
+            func.r_number = self.fold_expr(func.r_number)
+            is_constant = _is_number(func.l_number) and \
+                _is_number(func.r_number)
+        elif isinstance(func, FuncMul):
+            func.l_number = self.fold_expr(func.l_number)
+            func.r_number = self.fold_expr(func.r_number)
+            is_constant = _is_number(func.l_number) and \
+                _is_number(func.r_number)
+        elif isinstance(func, FuncNumberSep):
+            func.l_number = self.fold_expr(func.l_number)
+            func.r_number = self.fold_expr(func.r_number)
+            is_constant = _is_number(func.l_number) and \
+                _is_number(func.r_number)
+        elif isinstance(func, FuncAnd):
+            func.l_number = self.fold_expr(func.l_number)
+            func.r_number = self.fold_expr(func.r_number)
+            is_constant = _is_number(func.l_number) and \
+                _is_number(func.r_number)
+        elif isinstance(func, FuncOr):
+            func.l_number = self.fold_expr(func.l_number)
+            func.r_number = self.fold_expr(func.r_number)
+            is_constant = _is_number(func.l_number) and \
+                _is_number(func.r_number)
+        elif isinstance(func, FuncEq):
+            func.l_number = self.fold_expr(func.l_number)
+            func.r_number = self.fold_expr(func.r_number)
+            is_constant = _is_number(func.l_number) and \
+                _is_number(func.r_number)
+        elif isinstance(func, FuncGt):
+            func.l_number = self.fold_expr(func.l_number)
+            func.r_number = self.fold_expr(func.r_number)
+            is_constant = _is_number(func.l_number) and \
+                _is_number(func.r_number)
+        elif isinstance(func, FuncLt):
+            func.l_number = self.fold_expr(func.l_number)
+            func.r_number = self.fold_expr(func.r_number)
+            is_constant = _is_number(func.l_number) and \
+                _is_number(func.r_number)
+        else:
+            return expr
+        if not is_constant:
+            return expr
+        try:
+            value = expr.eval().value()
+        except:
+            return expr
+        if isinstance(value, datatype.Number):
+            return self.constant(value)
+        return expr
+
+
+def _is_number(expr):
+    return isinstance(expr, datatype.ValueExpr) and \
+        isinstance(expr.value(), datatype.Number)
+
+
+def fold_constants(bowl):
+    """ bowl을 상수 접기한 새 Bowl을 반환합니다.
+
+    :param bowl: 파싱된 Bowl
+    :type bowl: datatype.Bowl
+    :return: 상수 접기한 Bowl
+    :rtype: datatype.Bowl
+    """
+    return ConstantFolder().fold_bowl(bowl)
@@ -2,15 +2,15 @@
 from __future__ import absolute_import
 
 from rply import ParserGenerator
-from rpython.rlib.rbigint import rbigint
 
-from . import datatype, io
+from . import datatype
+from .interpreter import current
 from .expr_func import *
 from .lexer import op_map
-from .utils import filtered_str
 
 pg = ParserGenerator(
     list(op_map.keys()),
+    cache_id="pybibim",
     precedence=[
         ('left', ['ASSIGN']),
         ('left', ['ass_expr']),
@@ -45,21 +45,24 @@ def bowl_wad(p):
 
 @pg.production('number : NUMBER')
 def number(p):
-    number_str = filtered_str(p[0].getstr())
-    number_int = rbigint.fromstr(number_str)
-    return datatype.Number(number_int)
+    return datatype.Number.from_digits(p[0].getstr())
 
 
 @pg.production('noodle : NOODLE_OPEN expr NOODLE_SEP expr NOODLE_CLOSE')
 def noodle(p):
     nn = p[1]
     expr = p[3]
-    return datatype.Noodle(nn, expr)
+    _noodle = datatype.Noodle(nn, expr)
+    source_pos = p[0].getsourcepos()
+    if source_pos is not None:
+        _noodle.set_position(source_pos.lineno, source_pos.colno)
+    return _noodle
 
 
 @pg.production('wad : noodle')
 def wad_single(p):
     _noodle = p[0]
+    assert isinstance(_noodle, datatype.Noodle)
     return datatype.Wad(_noodle)
 
 
@@ -67,6 +70,8 @@ def wad_single(p):
 def wad_put(p):
     wad = p[0]
     _noodle = p[1]
+    assert isinstance(wad, datatype.Wad)
+    assert isinstance(_noodle, datatype.Noodle)
     return wad.put(_noodle)
 
 
@@ -93,7 +98,7 @@ def expr_assign(p):
 
 @pg.production('expr : MEM BOWL expr ASSIGN expr', precedence='ass_expr')
 def expr_assign_m(p):
-    bowl = datatype.ValueExpr(datatype.MEM)
+    bowl = datatype.MEM_EXPR
     nn = p[2]
     value_expr = p[4]
     return datatype.Expr(FuncAssign(bowl=bowl, nn=nn, value_expr=value_expr))
@@ -108,7 +113,7 @@ def expr_bowl_get(p):
 
 @pg.production('expr : MEM BOWL expr')
 def expr_bowl_get_m(p):
-    bowl = datatype.ValueExpr(datatype.MEM)
+    bowl = datatype.MEM_EXPR
     nn = p[2]
     return datatype.Expr(FuncBowl(bowl=bowl, nn=nn))
 
@@ -198,7 +203,7 @@ def error_handler(token):
 
 
 def gen_error(msg):
-    io.write_data(io.STDOUT, ("Parse Error: %s\n" % (msg,)).decode("utf-8"))
+    current().write_message(("Parse Error: %s\n" % (msg,)).decode("utf-8"))
     return ValueError(msg)
 
 
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+import time
+
+from rpython.rlib.listsort import make_timsort_class
+
+
+class NoodleProfile(object):
+    """ Noodle 하나의 실행 횟수와 실행 시간을 담는 class입니다. """
+
+    def __init__(self, noodle):
+        """ noodle의 새로운 NoodleProfile을 생성합니다.
+
+        :param noodle: 측정할 Noodle
+        :type noodle: datatype.Noodle
+        """
+        self.noodle = noodle
+        self.count = 0
+        self.nn_time = 0.0
+        self.body_time = 0.0
+
+    def total_time(self):
+        return self.nn_time + self.body_time
+
+    def label(self):
+        """ source 위치와 noodle number Expr로 Noodle을 나타내는 문자열을 반환합니다.
+
+        :rtype: str
+        """
+        return "%s [%s]" % (self.noodle.position_string(),
+                            self.noodle.nn_expr().log_expr())
+
+
+class Profiler(object):
+    """ Noodle마다 실행 횟수와 noodle number, body의 평가 시간을 기록하는 class입니다.
+
+    다음에 실행할 Noodle을 찾는 데 걸린 시간 중 noodle number의 평가 시간을 뺀
+    나머지는 scheduling 시간으로 따로 기록합니다.
+    """
+
+    def __init__(self):
+        """ 새로운 Profiler를 생성합니다. """
+        self._profiles = {}
+        self._order = []
+        self.schedule_calls = 0
+        self.schedule_time = 0.0
+        self._nn_time_in_schedule = 0.0
+        self.start_time = time.time()
+
+    def now(self):
+        return time.time()
+
+    def profile(self, noodle):
+        """ noodle의 NoodleProfile을 반환합니다. 없으면 새로 만듭니다.
+
+        :param noodle: Noodle
+        :type noodle: datatype.Noodle
+        :rtype: NoodleProfile
+        """
+        profile = self._profiles.get(noodle, None)
+        if profile is None:
+            profile = NoodleProfile(noodle)
+            self._profiles[noodle] = profile
+            self._order.append(profile)
+        return profile
+
+    def record_nn(self, noodle, elapsed):
+        """ noodle의 noodle number를 평가하는 데 걸린 시간을 기록합니다.
+
+        :type noodle: datatype.Noodle
+        :type elapsed: float
+        """
+        self.profile(noodle).nn_time += elapsed
+        self._nn_time_in_schedule += elapsed
+
+    def record_body(self, noodle, elapsed):
+        """ noodle이 한 번 실행되었고, body를 평가하는 데 elapsed초 걸렸음을
+        기록합니다.
+
+        :type noodle: datatype.Noodle
+        :type elapsed: float
+        """
+        profile = self.profile(noodle)
+        profile.count += 1
+        profile.body_time += elapsed
+
+    def record_schedule(self, elapsed):
+        """ 다음에 실행할 Noodle을 찾는 데 걸린 시간을 기록합니다.
+
+        그 동안 record_nn으로 기록한 시간은 scheduling 시간에서 뺍니다.
+
+        :type elapsed: float
+        """
+        self.schedule_calls += 1
+        self.schedule_time += elapsed - self._nn_time_in_schedule
+        self._nn_time_in_schedule = 0.0
+
+    def sorted_profiles(self):
+        """ 실행 시간이 긴 순서로 정렬한 NoodleProfile의 목록을 반환합니다.
+
+        :rtype: list[NoodleProfile]
+        """
+        profiles = list(self._order)
+        ProfileSort(profiles).sort()
+        return profiles
+
+    def report(self):
+        """ Noodle별 실행 시간을 정리한 보고서를 반환합니다.
+
+        :rtype: str
+        """
+        total = time.time() - self.start_time
+        lines = ["profile: %s ms total, %s ms scheduling "
+                 "(%d get_next_noodle calls)" % (
+                     _milliseconds(total), _milliseconds(self.schedule_time),
+                     self.schedule_calls),
+                 _row("count", "total ms", "body ms", "nn ms", "noodle")]
+        for profile in self.sorted_profiles():
+            lines.append(_row(str(profile.count),
+                              _milliseconds(profile.total_time()),
+                              _milliseconds(profile.body_time),
+                              _milliseconds(profile.nn_time),
+                              profile.label()))
+        return "\n".join(lines) + "\n"
+
+    def collapsed_stacks(self):
+        """ flamegraph 도구가 읽을 수 있는 collapsed stack 형식으로 실행 시간을
+        반환합니다. 각 줄의 값은 microsecond 단위입니다.
+
+        :rtype: str
+        """
+        lines = []
+        schedule = _microseconds(self.schedule_time)
+        if schedule > 0:
+            lines.append("bibim;get_next_noodle %d" % (schedule,))
+        for profile in self._order:
+            frame = _frame_name(profile.label())
+            nn_time = _microseconds(profile.nn_time)
+            if nn_time > 0:
+                lines.append("bibim;get_next_noodle;%s;nn %d" % (frame,
+                                                                 nn_time))
+            body_time = _microseconds(profile.body_time)
+            if body_time > 0:
+                lines.append("bibim;%s;body %d" % (frame, body_time))
+        return "\n".join(lines) + "\n"
+
+
+def _profile_gt(a, b):
+    return a.total_time() > b.total_time()
+
+
+def _microseconds(seconds):
+    return int(seconds * 1000000)
+
+
+def _milliseconds(seconds):
+    micro = _microseconds(seconds)
+    return "%d.%s" % (micro // 1000, str(1000 + micro % 1000)[1:])
+
+
+def _row(count, total, body, nn, label):
+    return "%s %s %s %s  %s" % (_rjust(count, 10), _rjust(total, 12),
+                                _rjust(body, 12), _rjust(nn, 12), label)
+
+
+def _rjust(s, width):
+    if len(s) >= width:
+        return s
+    return " " * (width - len(s)) + s
+
+
+def _frame_name(label):
+    # collapsed stack 형식에서 ';'는 frame 구분자이고 마지막 공백 뒤는 값입니다.
+    return label.replace(";", ",").replace(" ", "_")
+
+
+ProfileSort = make_timsort_class(lt=_profile_gt)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+""" 번역할 때만 RPython의 구현이 필요한 class들입니다.
+
+rply와 rpython.rlib.rthread는 import할 때 번역 toolchain 대부분을 함께 import하므로,
+번역하지 않은 interpreter에서는 같은 방식으로 동작하는 간단한 class를 대신 사용해서
+시작 시간을 줄입니다. pybibim.py의 target이 mode.translating을 켠 뒤 bibim을
+import하므로 번역할 때는 RPython의 구현을 사용합니다.
+"""
+from __future__ import absolute_import
+
+from .mode import translating
+
+if translating:
+    from rply.token import BaseBox
+    from rpython.rlib.jit import JitDriver
+    from rpython.rlib.rthread import ThreadLocalReference
+else:
+    from thread import _local
+
+    class BaseBox(object):
+        """ rply가 parser의 결과로 받는 값의 부모 class입니다. """
+        _attrs_ = []
+
+    class JitDriver(object):
+        """ 번역하지 않은 interpreter에서는 아무 일도 하지 않는 JitDriver입니다. """
+
+        def __init__(self, **kwargs):
+            pass
+
+        def jit_merge_point(self, **kwargs):
+            pass
+
+    class ThreadLocalReference(object):
+        """ thread마다 따로 값을 기록하는 참조입니다. """
+
+        def __init__(self, Cls, loop_invariant=False):
+            """ 새로운 ThreadLocalReference를 생성합니다.
+
+            :param Cls: 기록할 값의 class
+            :type Cls: type
+            :param loop_invariant: JIT가 loop 안에서 값을 한 번만 읽어도 되는지
+                여부. 번역하지 않으면 사용하지 않습니다.
+            :type loop_invariant: bool
+            """
+            self.Cls = Cls
+            self.local = _local()
+
+        def get(self):
+            """ 현재 thread에 기록된 값을 반환합니다. 기록된 값이 없으면 None을
+            반환합니다.
+            """
+            return getattr(self.local, "value", None)
+
+        def set(self, value):
+            assert isinstance(value, self.Cls) or value is None
+            self.local.value = value
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+from rpython.rlib.listsort import make_timsort_class
+
+from . import datatype
+from .interpreter import current
+from .stats import COUNTING
+from .utils import safe_get_value
+
+
+class ScheduleEntry(object):
+    """ 상수 noodle number를 가지는 Noodle과 그 위치를 담는 class입니다. """
+
+    def __init__(self, nn, position, noodle):
+        """ 새로운 ScheduleEntry를 생성합니다.
+
+        :param nn: Noodle의 noodle number
+        :type nn: datatype.Number
+        :param position: Wad 안에서 Noodle의 위치
+        :type position: int
+        :param noodle: Noodle
+        :type noodle: datatype.Noodle
+        """
+        self.nn = nn
+        self.position = position
+        self.noodle = noodle
+        self.cache = None
+
+
+class CachedExpr(datatype.Dependency):
+    """ Expr의 평가 결과를 평가 중에 읽은 cell이 바뀔 때까지 재사용하는 class입니다. """
+
+    def __init__(self, expr, evaluator):
+        """ expr의 평가 결과를 재사용할 새로운 CachedExpr을 생성합니다.
+
+        :param expr: 평가할 Expr
+        :type expr: datatype.Expr
+        :param evaluator: expr을 평가할 Evaluator
+        :type evaluator: Evaluator
+        """
+        datatype.Dependency.__init__(self)
+        self._expr = expr
+        self._evaluator = evaluator
+        self._value = datatype.NULL_INST
+
+    def value(self):
+        """ expr을 평가한 결과의 Value를 반환합니다.
+
+        마지막 평가 이후 평가 중에 읽은 cell이 바뀌지 않았다면 다시 평가하지 않습니다.
+
+        :return: value
+        :rtype: datatype.Value
+        """
+        if self.valid:
+            return self._value
+        tracker = current().tracker
+        previous = tracker.start(self)
+        try:
+            value = self._evaluator.safe_value(self._expr)
+        finally:
+            tracker.stop(previous)
+        self._value = value
+        self.valid = self.pure
+        return value
+
+
+def _entry_lt(a, b):
+    return a.nn.lt(b.nn)
+
+
+EntrySort = make_timsort_class(lt=_entry_lt)
+
+
+class Scheduler(object):
+    """ 실행 중인 Bowl에서 다음에 실행할 Noodle을 찾는 class입니다.
+
+    상수 noodle number를 가지는 Noodle은 noodle number 순서로 정렬해 두고, 현재
+    noodle number보다 큰 첫 번째 noodle number를 이진 탐색으로 찾습니다. noodle
+    number가 평가가 필요한 Expr인 Noodle은 평가 중에 읽은 cell이 바뀌었을 때만 다시
+    평가합니다.
+    """
+
+    def __init__(self, bowl_inst, evaluator, profiler=None):
+        """ bowl_inst의 Noodle을 실행할 새로운 Scheduler를 생성합니다.
+
+        :param bowl_inst: 실행할 Bowl instance
+        :type bowl_inst: datatype.Bowl
+        :param evaluator: noodle number를 평가할 Evaluator
+        :type evaluator: Evaluator
+        :param profiler: noodle number의 평가 시간을 기록할 Profiler
+        :type profiler: Profiler|None
+        """
+        self._bowl = bowl_inst
+        self._evaluator = evaluator
+        self._profiler = profiler
+        self._size = -1
+        self._constants = []
+        self._dynamic = []
+        self._current_nn = datatype.NULL_INST
+
+    def _build(self):
+        """ Wad의 Noodle들로부터 정렬된 상수 noodle number 목록을 만듭니다. """
+        noodles = self._bowl.wad().noodles()
+        self._constants = []
+        self._dynamic = []
+        position = 0
+        for noodle in noodles:
+            nn = noodle.constant_nn()
+            if nn is None:
+                entry = ScheduleEntry(None, position, noodle)
+                entry.cache = CachedExpr(noodle.nn_expr(), self._evaluator)
+                self._dynamic.append(entry)
+            else:
+                self._constants.append(ScheduleEntry(nn, position, noodle))
+            position += 1
+        EntrySort(self._constants).sort()
+        self._size = len(noodles)
+
+    def current_nn(self):
+        """ 마지막으로 get_next_noodle이 찾은 Noodle의 noodle number를 반환합니다.
+
+        :return: noodle number
+        :rtype: datatype.Number|datatype.Null
+        """
+        return self._current_nn
+
+    def get_next_noodle(self):
+        """ 다음에 실행할 Noodle을 반환합니다.
+
+        noodle number가 같은 Noodle이 여러 개일 경우 Wad에서 앞에 있는 Noodle을
+        선택합니다. 다음에 실행할 Noodle을 발견하지 못하면 None을 반환합니다.
+
+        :return: 다음 Noodle
+        :rtype: datatype.Noodle|None
+        """
+        interpreter = current()
+        stats = interpreter.stats
+        counting = COUNTING.enabled
+        if counting:
+            stats.schedule_calls += 1
+        if self._size != len(self._bowl.wad().noodles()):
+            self._build()
+        try:
+            current_noodle = interpreter.memory.current_noodle()
+        except KeyError:
+            self._current_nn = datatype.NULL_INST
+            return None
+        current_nn = safe_get_value(current_noodle.expr(), datatype.Number)
+
+        min_nn = None
+        min_position = -1
+        min_noodle = None
+        index = self._successor(current_nn)
+        if index < len(self._constants):
+            min_entry = self._constants[index]
+            min_nn = min_entry.nn
+            min_position = min_entry.position
+            min_noodle = min_entry.noodle
+        for entry in self._dynamic:
+            if counting:
+                stats.noodles_scanned += 1
+            if self._profiler is None:
+                nn = entry.cache.value()
+            else:
+                start = self._profiler.now()
+                nn = entry.cache.value()
+                self._profiler.record_nn(entry.noodle,
+                                         self._profiler.now() - start)
+            if nn is datatype.NULL_INST:
+                continue
+            if not is_nextable_nn(nn, current_nn):
+                continue
+            if min_noodle is None or nn.lt(min_nn) or (
+                    nn.eq(min_nn) and entry.position < min_position):
+                min_nn = nn
+                min_position = entry.position
+                min_noodle = entry.noodle
+
+        if min_noodle is None:
+            self._current_nn = datatype.NULL_INST
+            return None
+        self._current_nn = min_nn
+        return min_noodle
+
+    def _successor(self, current_nn):
+        """ 다음에 실행할 수 있는 첫 번째 상수 noodle number의 index를 반환합니다.
+
+        :param current_nn: 현재 noodle number
+        :type current_nn: datatype.Number|datatype.Null
+        :return: self._constants의 index
+        :rtype: int
+        """
+        low = 0
+        high = len(self._constants)
+        counting = COUNTING.enabled
+        while low < high:
+            middle = (low + high) // 2
+            if counting:
+                current().stats.noodles_scanned += 1
+            if is_nextable_nn(self._constants[middle].nn, current_nn):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+
+def is_nextable_nn(number, current_nn):
+    """ number가 다음에 실행할 noodle number가 될 수 있는지 확인합니다.
+
+    마지막에 실행한 noodle number보다 number가 크면 True를, 작거나 같으면 False를
+    반환합니다. 만약 마지막에 실행한 noodle number가 존재하지 않을 경우에는 number가 0보다
+    크거나 같으면 True, 작으면 False를 반환합니다.
+
+    :param number: 확인할 number
+    :type number: datatype.Number
+    :param current_nn: 마지막에 실행한 noodle number
+    :type current_nn: datatype.Number|datatype.Null
+    :return: 확인 결과
+    :rtype: bool
+    """
+    if number is datatype.NULL_INST:
+        return False
+    if current_nn is datatype.NULL_INST:
+        return not number.lt(datatype.Number.ZERO())
+    else:
+        return number.gt(current_nn)
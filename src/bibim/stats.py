@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+""" 실행 중에 센 횟수와 단계별 실행 시간을 모으는 통계입니다.
+
+실행한 step 수는 항상 세고, 나머지 횟수는 COUNTING.enabled가 켜져 있을 때만
+셉니다. 단계별 시간은 timing이 켜져 있을 때만 잽니다. elidable 함수는 JIT가 호출을
+생략할 수 있으므로 그 안에서는 횟수를 세지 않습니다. 다만 Number를 만들거나
+NumberCache에서 찾은 횟수는 elidable인 Number 연산이 부르는 함수에서 세므로, 번역한
+interpreter에서 JIT가 Number 연산을 생략하면 그 안에서 만들거나 찾은 Number는
+세지 않습니다.
+"""
+from __future__ import absolute_import
+
+import time
+
+
+class Counting(object):
+    """ 실행 횟수를 셀지 정하는 process 전체의 설정입니다.
+
+    enabled는 quasi-immutable field이므로 JIT는 이 값을 상수로 취급해서, 꺼져 있을
+    때는 횟수를 세는 code를 trace에 남기지 않습니다. 값이 바뀌면 이전 값을 가정한
+    trace는 버려집니다.
+    """
+    _immutable_fields_ = ["enabled?"]
+
+    def __init__(self):
+        """ 횟수를 세지 않는 새로운 Counting을 생성합니다. """
+        self.enabled = False
+
+
+COUNTING = Counting()
+
+
+class RunStats(object):
+    """ 한 번의 실행에 대한 횟수와 단계별 시간을 담는 class입니다. """
+
+    def __init__(self):
+        """ 모든 값이 0인 새로운 RunStats를 생성합니다. """
+        self.timing = False
+        self.reset()
+
+    def reset(self):
+        """ 모든 횟수와 시간을 0으로 만듭니다. """
+        self.steps = 0
+        self.schedule_calls = 0
+        self.noodles_scanned = 0
+        self.get_noodle_calls = 0
+        self.set_noodle_calls = 0
+        self.find_calls = 0
+        self.find_scanned = 0
+        self.numbers_allocated = 0
+        self.gcd_calls = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_evictions = 0
+        self.peak_memory_cells = 0
+        self.max_bigint_bits = 0
+        self.read_time = 0.0
+        self.lex_time = 0.0
+        self.parse_time = 0.0
+        self.run_time = 0.0
+
+    def now(self):
+        return time.time()
+
+    def record_bigint(self, bits):
+        """ bits 비트의 큰 정수를 만들었음을 기록합니다.
+
+        :type bits: int
+        """
+        if bits > self.max_bigint_bits:
+            self.max_bigint_bits = bits
+
+    def record_memory_cells(self, count):
+        """ Memory의 cell 수가 count가 되었음을 기록합니다.
+
+        :type count: int
+        """
+        if count > self.peak_memory_cells:
+            self.peak_memory_cells = count
+
+    def log_cache(self):
+        return "NumberCache(hits=%d, misses=%d, evictions=%d)" % (
+            self.cache_hits, self.cache_misses, self.cache_evictions)
+
+    def to_json(self, memory):
+        """ 통계를 JSON 문자열로 반환합니다. 시간은 초 단위입니다.
+
+        :param memory: 읽고 쓴 횟수를 함께 기록할 Memory
+        :type memory: datatype.Memory
+        :rtype: str
+        """
+        total = self.read_time + self.lex_time + self.parse_time + \
+            self.run_time
+        return "\n".join([
+            "{",
+            '  "steps": %d,' % (self.steps,),
+            '  "scheduler": {"calls": %d, "noodles_scanned": %d},' % (
+                self.schedule_calls, self.noodles_scanned),
+            '  "noodles": {"get_noodle_calls": %d, "set_noodle_calls": %d, '
+            '"wad_finds": %d, "wad_find_scanned": %d},' % (
+                self.get_noodle_calls, self.set_noodle_calls,
+                self.find_calls, self.find_scanned),
+            '  "numbers": {"allocated": %d, "gcd_calls": %d, '
+            '"max_bigint_bits": %d, "cache_hits": %d, "cache_misses": %d},'
+            % (self.numbers_allocated, self.gcd_calls, self.max_bigint_bits,
+               self.cache_hits, self.cache_misses),
+            '  "memory": {"peak_cells": %d, "reads": %d, "writes": %d},' % (
+                self.peak_memory_cells, memory.reads, memory.writes),
+            '  "time": {"read": %s, "lex": %s, "parse": %s, "run": %s, '
+            '"total": %s}' % (
+                _seconds(self.read_time), _seconds(self.lex_time),
+                _seconds(self.parse_time), _seconds(self.run_time),
+                _seconds(total)),
+            "}",
+        ]) + "\n"
+
+
+def _seconds(seconds):
+    micro = int(seconds * 1000000)
+    if micro < 0:
+        micro = 0
+    return "%d.%s" % (micro // 1000000, str(1000000 + micro % 1000000)[1:])
+
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+""" 실행 과정을 기록하는 binary trace (.bbt) 입니다.
+
+trace 파일은 MAGIC, TRACE_VERSION과 줄바꿈 문자로 시작하고, 그 뒤에 record가
+이어집니다. 각 record는 tag 한 글자와 그 내용으로 이루어지며, 정수와 Number는
+.bbc 파일과 같은 방식으로 기록합니다.
+
+- TAG_NOODLE: 처음 실행되는 Noodle의 id, source 위치와 noodle number Expr
+- TAG_STEP: 실행한 Noodle의 id와 그 noodle number
+- TAG_WRITE: 값을 쓴 cell의 경로와 값. 경로는 Memory cell의 noodle number와,
+  그 cell에 담긴 Bowl 안에 썼다면 Bowl을 따라간 noodle number들입니다.
+- TAG_END: trace의 끝
+
+값이 Bowl이면 Bowl의 Noodle 수만 기록합니다. Bowl의 내용이 바뀌는 것은 그 안에
+쓴 TAG_WRITE record로 알 수 있습니다. 다만 noodle number가 상수가 아니거나 아직
+평가하지 않은 Noodle 안에 있는 Bowl처럼 Memory cell에서 따라갈 수 없는 Bowl에
+쓴 값은 기록하지 않습니다.
+"""
+from __future__ import absolute_import
+
+import os
+
+from rpython.rlib.rarithmetic import r_uint, intmask
+
+from . import datatype, io
+from .bbc import BowlWriter, BowlReader, CacheError, TAG_INT, TAG_FRACTION, \
+    TAG_BIG, TAG_NULL, TAG_BOWL
+
+MAGIC = "BBT"
+TRACE_VERSION = 2
+
+TAG_NOODLE = 'D'
+TAG_STEP = 'S'
+TAG_WRITE = 'W'
+TAG_END = 'E'
+
+# 이만큼의 record를 모을 때마다 파일에 씁니다.
+FLUSH_RECORDS = 4096
+
+
+class TraceError(Exception):
+    """ trace 파일을 읽을 수 없을 때 발생하는 예외입니다. """
+
+    def __init__(self, msg):
+        """ 새로운 TraceError를 생성합니다.
+
+        :param msg: 오류 메시지
+        :type msg: str
+        """
+        self.msg = msg
+
+
+class TraceRecorder(object):
+    """ 실행한 Noodle과 Memory cell에 쓴 값을 trace 파일에 기록하는 class입니다.
+
+    Noodle마다 처음 실행될 때 한 번만 TAG_NOODLE record를 남기고, 그 뒤로는 id로
+    가리킵니다. 기록한 내용은 FLUSH_RECORDS개의 record마다 모아서 씁니다.
+    """
+
+    def __init__(self, fp):
+        """ fp에 기록하는 새로운 TraceRecorder를 생성합니다.
+
+        :param fp: trace를 쓸 file descriptor
+        :type fp: int
+        """
+        self.fp = fp
+        self.steps = 0
+        self._ids = {}
+        self._writer = BowlWriter()
+        self._records = 0
+        self._writer.write_tag("%s%d\n" % (MAGIC, TRACE_VERSION))
+
+    def _noodle_id(self, noodle):
+        noodle_id = self._ids.get(noodle, -1)
+        if noodle_id == -1:
+            noodle_id = len(self._ids)
+            self._ids[noodle] = noodle_id
+            writer = self._writer
+            writer.write_tag(TAG_NOODLE)
+            writer.write_uint(r_uint(noodle_id))
+            writer.write_int(noodle.lineno)
+            writer.write_int(noodle.colno)
+            writer.write_str(noodle.nn_expr().log_expr())
+        return noodle_id
+
+    def record_step(self, noodle, nn):
+        """ noodle을 noodle number nn으로 실행했음을 기록합니다.
+
+        :param noodle: 실행한 Noodle
+        :type noodle: datatype.Noodle
+        :param nn: 실행한 noodle number
+        :type nn: datatype.Number
+        """
+        noodle_id = self._noodle_id(noodle)
+        writer = self._writer
+        writer.write_tag(TAG_STEP)
+        writer.write_uint(r_uint(noodle_id))
+        self._write_value(nn)
+        self.steps += 1
+        self._record()
+
+    def record_write(self, path, value):
+        """ path가 가리키는 cell에 value를 썼음을 기록합니다.
+
+        :param path: Memory cell의 noodle number부터 값을 쓴 cell까지의 noodle
+            number
+        :type path: list[datatype.Number]
+        :param value: 쓴 값
+        :type value: datatype.Value
+        """
+        writer = self._writer
+        writer.write_tag(TAG_WRITE)
+        writer.write_uint(r_uint(len(path)))
+        for nn in path:
+            self._write_value(nn)
+        self._write_value(value)
+        self._record()
+
+    def _write_value(self, value):
+        writer = self._writer
+        if isinstance(value, datatype.Number):
+            writer.write_number(value)
+        elif isinstance(value, datatype.Bowl):
+            writer.write_tag(TAG_BOWL)
+            writer.write_uint(r_uint(value.size()))
+        else:
+            writer.write_tag(TAG_NULL)
+
+    def _record(self):
+        self._records += 1
+        if self._records >= FLUSH_RECORDS:
+            self.flush()
+
+    def flush(self):
+        """ 모은 record를 파일에 씁니다. """
+        io.write_all(self.fp, self._writer.result())
+        self._writer = BowlWriter()
+        self._records = 0
+
+    def close(self):
+        """ TAG_END를 기록하고 파일을 닫습니다. """
+        self._writer.write_tag(TAG_END)
+        self.flush()
+        os.close(self.fp)
+
+
+class TraceReader(object):
+    """ trace 파일의 record를 하나씩 읽는 class입니다.
+
+    번역하지 않은 Python에서 trace를 분석하기 위해 사용합니다.
+    """
+
+    def __init__(self, data):
+        """ trace 파일 내용 data를 읽는 새로운 TraceReader를 생성합니다.
+
+        :param data: trace 파일 내용
+        :type data: str
+        """
+        header = "%s%d\n" % (MAGIC, TRACE_VERSION)
+        if not data.startswith(header):
+            raise TraceError("Not a trace file or unsupported version")
+        self._reader = BowlReader(data, len(header))
+        self.noodles = {}
+
+    def records(self):
+        """ record를 (tag, 내용) 형식으로 차례로 반환합니다.
+
+        TAG_NOODLE record는 noodles에 (source 위치, noodle number Expr)로 등록한
+        뒤 반환합니다. TAG_STEP의 내용은 (id, noodle number), TAG_WRITE의 내용은
+        ("2:0"처럼 noodle number를 ':'로 이은 경로, 값)입니다. 값은 Number 또는
+        "{n noodles}"나 "Null" 같은 문자열입니다.
+        """
+        reader = self._reader
+        try:
+            while not reader.at_end():
+                tag = reader.read_tag()
+                if tag == TAG_NOODLE:
+                    noodle_id = intmask(reader.read_uint())
+                    lineno = reader.read_int()
+                    colno = reader.read_int()
+                    label = reader.read_str()
+                    if lineno < 0:
+                        position = "?"
+                    else:
+                        position = "%d:%d" % (lineno, colno)
+                    self.noodles[noodle_id] = (position, label)
+                    yield tag, (noodle_id, position, label)
+                elif tag == TAG_STEP:
+                    noodle_id = intmask(reader.read_uint())
+                    yield tag, (noodle_id, self._read_value(reader))
+                elif tag == TAG_WRITE:
+                    length = intmask(reader.read_uint())
+                    path = ":".join([self._read_value(reader)
+                                     for _ in range(length)])
+                    yield tag, (path, self._read_value(reader))
+                elif tag == TAG_END:
+                    yield tag, None
+                    return
+                else:
+                    raise TraceError("Unknown record %r" % (tag,))
+        except CacheError as e:
+            raise TraceError(e.msg)
+        raise TraceError("Trace ends without an end record")
+
+    def _read_value(self, reader):
+        tag = reader.read_tag()
+        if tag in (TAG_INT, TAG_FRACTION, TAG_BIG):
+            return reader.read_number(tag).log_string()
+        elif tag == TAG_BOWL:
+            return "{%d noodles}" % (intmask(reader.read_uint()),)
+        elif tag == TAG_NULL:
+            return "Null"
+        raise TraceError("Unknown value %r" % (tag,))
@@ -4,14 +4,6 @@ from __future__ import absolute_import
 from . import datatype
 
 
-def filtered_str(string):
-    result = ''
-    for c in string:
-        if not c.isspace():
-            result += c
-    return result
-
-
 # def safe_get_evaled_expr(expr):
 #     if mode == MODE_DEBUG:
 #         assert isinstance(expr, datatype.Expr), \
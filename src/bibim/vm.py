@@ -0,0 +1,415 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+from . import datatype
+from .evaluator import Evaluator
+from .expr_func import FuncBowl, FuncAssign, FuncDeno, FuncPlus, FuncMinus, \
+    FuncMul, FuncNumberSep, FuncAnd, FuncOr, FuncNot, FuncEq, FuncGt, FuncLt
+from .interpreter import current
+
+# opcode 다음에 오는 정수는 opcode의 인자입니다.
+LOAD_CONST = 0  # LOAD_CONST const_index
+EXIT_IF_NULL = 1  # EXIT_IF_NULL pop_count target
+BOWL_GET = 2
+ASSIGN = 3
+PLUS = 4
+MINUS = 5
+MUL = 6
+NUMBER_SEP = 7
+AND = 8
+OR = 9
+EQ = 10
+GT = 11
+LT = 12
+DENO = 13
+NOT = 14
+LOAD_MEM = 15  # 실행 중인 Interpreter의 Memory를 넣습니다.
+
+OP_NAMES = ["LOAD_CONST", "EXIT_IF_NULL", "BOWL_GET", "ASSIGN", "PLUS",
+            "MINUS", "MUL", "NUMBER_SEP", "AND", "OR", "EQ", "GT", "LT",
+            "DENO", "NOT", "LOAD_MEM"]
+
+
+class Code(object):
+    """ Expr 하나를 compile한 bytecode입니다.
+
+    handlers는 (start, end, depth) 세 정수씩 묶인 목록으로, start 이상 end 미만의
+    위치에서 예외가 발생하면 operand stack을 depth까지 비우고 Null을 넣은 뒤 end부터
+    실행을 계속합니다. Func의 operand를 safe_get_value로 평가하는 것과 같은 동작입니다.
+    안쪽 operand의 handler가 항상 먼저 옵니다.
+    """
+    _immutable_fields_ = ["ops[*]", "consts[*]", "handlers[*]", "stack_size"]
+
+    def __init__(self, ops, consts, handlers, stack_size):
+        """ 새로운 Code를 생성합니다.
+
+        :param ops: opcode와 인자의 목록
+        :type ops: list[int]
+        :param consts: LOAD_CONST가 사용할 Value 목록
+        :type consts: list[datatype.Value]
+        :param handlers: 예외 handler 목록
+        :type handlers: list[int]
+        :param stack_size: 필요한 operand stack의 크기
+        :type stack_size: int
+        """
+        self.ops = ops
+        self.consts = consts
+        self.handlers = handlers
+        self.stack_size = stack_size
+
+    def find_handler(self, pc):
+        """ pc 위치를 감싸는 가장 안쪽 handler의 index를 반환합니다.
+
+        :param pc: 예외가 발생한 위치
+        :type pc: int
+        :return: handlers의 index, 없으면 -1
+        :rtype: int
+        """
+        index = 0
+        while index < len(self.handlers):
+            if self.handlers[index] <= pc < self.handlers[index + 1]:
+                return index
+            index += 3
+        return -1
+
+    def log_string(self):
+        result = ""
+        pc = 0
+        while pc < len(self.ops):
+            op = self.ops[pc]
+            if op == LOAD_CONST:
+                result += "%d LOAD_CONST %s\n" % (
+                    pc, self.consts[self.ops[pc + 1]].log_expr())
+                pc += 2
+            elif op == EXIT_IF_NULL:
+                result += "%d EXIT_IF_NULL %d %d\n" % (
+                    pc, self.ops[pc + 1], self.ops[pc + 2])
+                pc += 3
+            else:
+                result += "%d %s\n" % (pc, OP_NAMES[op])
+                pc += 1
+        return result
+
+
+class Compiler(object):
+    """ Expr tree를 Code로 compile하는 class입니다. """
+
+    def __init__(self):
+        """ 새로운 Compiler를 생성합니다. """
+        self.ops = []
+        self.consts = []
+        self.handlers = []
+        self.depth = 0
+        self.max_depth = 0
+
+    def code(self):
+        """ 지금까지 compile한 결과로 Code를 만듭니다.
+
+        :return: Code
+        :rtype: Code
+        """
+        # Code의 목록은 크기가 바뀌지 않아야 하므로 복사해서 넘깁니다.
+        return Code(self.ops[:], self.consts[:], self.handlers[:],
+                    self.max_depth)
+
+    def _push(self, count):
+        self.depth += count
+        if self.depth > self.max_depth:
+            self.max_depth = self.depth
+
+    def emit_const(self, value):
+        """ value를 operand stack에 넣는 bytecode를 추가합니다.
+
+        :param value: 넣을 Value
+        :type value: datatype.Value
+        """
+        index = 0
+        while index < len(self.consts):
+            if self.consts[index] is value:
+                break
+            index += 1
+        if index == len(self.consts):
+            self.consts.append(value)
+        self.ops.append(LOAD_CONST)
+        self.ops.append(index)
+        self._push(1)
+
+    def emit_load_mem(self):
+        """ 실행 중인 Interpreter의 Memory를 operand stack에 넣는 bytecode를
+        추가합니다.
+        """
+        self.ops.append(LOAD_MEM)
+        self._push(1)
+
+    def emit_op(self, op, operand_count):
+        """ operand_count개의 operand를 꺼내 결과 하나를 넣는 opcode를 추가합니다.
+
+        :param op: opcode
+        :type op: int
+        :param operand_count: operand의 수
+        :type operand_count: int
+        """
+        self.ops.append(op)
+        self.depth -= operand_count
+        self._push(1)
+
+    def compile_expr(self, expr):
+        """ expr을 평가해 결과 Value를 operand stack에 넣는 bytecode를 추가합니다.
+
+        :param expr: compile할 Expr
+        :type expr: datatype.Expr
+        """
+        if isinstance(expr, datatype.ValueExpr):
+            self.emit_const(expr.value())
+            return
+        if isinstance(expr, datatype.MemoryExpr):
+            self.emit_load_mem()
+            return
+        func = expr.func()
+        if isinstance(func, FuncBowl):
+            self.compile_call(BOWL_GET, [func.bowl, func.nn])
+        elif isinstance(func, FuncAssign):
+            self.compile_assign(func)
+        elif isinstance(func, FuncDeno):
+            self.compile_call(DENO, [func.number])
+        elif isinstance(func, FuncNot):
+            self.compile_call(NOT, [func.number])
+        elif isinstance(func, FuncPlus):
+            self.compile_call(PLUS, [func.l_number, func.r_number])
+        elif isinstance(func, FuncMinus):
+            self.compile_call(MINUS, [func.l_number, func.r_number])
+        elif isinstance(func, FuncMul):
+            self.compile_call(MUL, [func.l_number, func.r_number])
+        elif isinstance(func, FuncNumberSep):
+            self.compile_call(NUMBER_SEP, [func.l_number, func.r_number])
+        elif isinstance(func, FuncAnd):
+            self.compile_call(AND, [func.l_number, func.r_number])
+        elif isinstance(func, FuncOr):
+            self.compile_call(OR, [func.l_number, func.r_number])
+        elif isinstance(func, FuncEq):
+            self.compile_call(EQ, [func.l_number, func.r_number])
+        elif isinstance(func, FuncGt):
+            self.compile_call(GT, [func.l_number, func.r_number])
+        elif isinstance(func, FuncLt):
+            self.compile_call(LT, [func.l_number, func.r_number])
+        else:
+            self.emit_const(datatype.NULL_INST)
+
+    def compile_operand(self, expr):
+        """ expr을 safe_get_value처럼 평가하는 bytecode를 추가합니다.
+
+        :param expr: compile할 operand
+        :type expr: datatype.Expr
+        """
+        if isinstance(expr, datatype.ValueExpr):
+            self.emit_const(expr.value())
+            return
+        if isinstance(expr, datatype.MemoryExpr):
+            self.emit_load_mem()
+            return
+        start = len(self.ops)
+        depth = self.depth
+        self.compile_expr(expr)
+        self.handlers.append(start)
+        self.handlers.append(len(self.ops))
+        self.handlers.append(depth)
+
+    def compile_call(self, op, operands):
+        """ operand가 하나라도 Null이면 Null을 결과로 하는 Func의 bytecode를
+        추가합니다.
+
+        :param op: operand를 모두 평가한 뒤 실행할 opcode
+        :type op: int
+        :param operands: 순서대로 평가할 operand 목록
+        :type operands: list[datatype.Expr]
+        """
+        exits = []
+        count = 0
+        for operand in operands:
+            self.compile_operand(operand)
+            count += 1
+            if _may_be_null(operand):
+                exits.append(self._emit_exit_if_null(count))
+        self.emit_op(op, count)
+        end = len(self.ops)
+        for position in exits:
+            self.ops[position] = end
+
+    def compile_assign(self, func):
+        """ FuncAssign의 bytecode를 추가합니다. 대입할 값은 Null이어도 대입합니다.
+
+        :param func: compile할 FuncAssign
+        :type func: FuncAssign
+        """
+        exits = []
+        self.compile_operand(func.bowl)
+        if _may_be_null(func.bowl):
+            exits.append(self._emit_exit_if_null(1))
+        self.compile_operand(func.nn)
+        if _may_be_null(func.nn):
+            exits.append(self._emit_exit_if_null(2))
+        self.compile_operand(func.value_expr)
+        self.emit_op(ASSIGN, 3)
+        end = len(self.ops)
+        for position in exits:
+            self.ops[position] = end
+
+    def _emit_exit_if_null(self, pop_count):
+        """ EXIT_IF_NULL을 추가하고, 나중에 채울 target의 위치를 반환합니다. """
+        self.ops.append(EXIT_IF_NULL)
+        self.ops.append(pop_count)
+        self.ops.append(-1)
+        return len(self.ops) - 1
+
+
+def _may_be_null(expr):
+    if isinstance(expr, datatype.ValueExpr):
+        return expr.value() is datatype.NULL_INST
+    return not isinstance(expr, datatype.MemoryExpr)
+
+
+def compile_expr(expr):
+    """ expr을 Code로 compile합니다.
+
+    :param expr: compile할 Expr
+    :type expr: datatype.Expr
+    :return: Code
+    :rtype: Code
+    """
+    compiler = Compiler()
+    compiler.compile_expr(expr)
+    return compiler.code()
+
+
+class VirtualMachine(Evaluator):
+    """ Expr을 bytecode로 compile해서 평가하는 Evaluator입니다.
+
+    compile한 Code는 Expr마다 보관해 두고 다시 사용합니다.
+    """
+
+    def __init__(self):
+        """ 새로운 VirtualMachine을 생성합니다. """
+        self._codes = {}
+
+    def code_of(self, expr):
+        """ expr을 compile한 Code를 반환합니다.
+
+        :param expr: compile할 Expr
+        :type expr: datatype.Expr
+        :return: Code
+        :rtype: Code
+        """
+        code = self._codes.get(expr, None)
+        if code is None:
+            code = compile_expr(expr)
+            self._codes[expr] = code
+        return code
+
+    def value(self, expr):
+        if isinstance(expr, datatype.ValueExpr):
+            return expr.value()
+        return self.execute(self.code_of(expr))
+
+    def safe_value(self, expr):
+        try:
+            return self.value(expr)
+        except:
+            return datatype.NULL_INST
+
+    def execute(self, code):
+        """ code를 실행한 결과를 반환합니다.
+
+        :param code: 실행할 Code
+        :type code: Code
+        :return: 실행 결과
+        :rtype: datatype.Value
+        """
+        ops = code.ops
+        consts = code.consts
+        stack = [datatype.NULL_INST] * code.stack_size
+        sp = 0
+        pc = 0
+        while pc < len(ops):
+            op = ops[pc]
+            try:
+                if op == LOAD_CONST:
+                    stack[sp] = consts[ops[pc + 1]]
+                    sp += 1
+                    pc += 2
+                elif op == LOAD_MEM:
+                    stack[sp] = current().memory
+                    sp += 1
+                    pc += 1
+                elif op == EXIT_IF_NULL:
+                    if stack[sp - 1] is datatype.NULL_INST:
+                        sp -= ops[pc + 1]
+                        stack[sp] = datatype.NULL_INST
+                        sp += 1
+                        pc = ops[pc + 2]
+                    else:
+                        pc += 3
+                elif op == BOWL_GET:
+                    sp -= 1
+                    stack[sp - 1] = self.bowl_get(stack[sp - 1], stack[sp])
+                    pc += 1
+                elif op == ASSIGN:
+                    sp -= 2
+                    value_expr = datatype.to_value_expr(stack[sp + 1])
+                    stack[sp - 1].set_noodle(stack[sp], value_expr)
+                    stack[sp - 1] = datatype.NULL_INST
+                    pc += 1
+                elif op == DENO:
+                    stack[sp - 1] = stack[sp - 1].denominator_number()
+                    pc += 1
+                elif op == NOT:
+                    stack[sp - 1] = stack[sp - 1].not_f()
+                    pc += 1
+                else:
+                    sp -= 1
+                    l_number = stack[sp - 1]
+                    r_number = stack[sp]
+                    if op == PLUS:
+                        stack[sp - 1] = l_number.add(r_number)
+                    elif op == MINUS:
+                        stack[sp - 1] = l_number.sub(r_number)
+                    elif op == MUL:
+                        stack[sp - 1] = l_number.mul(r_number)
+                    elif op == NUMBER_SEP:
+                        stack[sp - 1] = l_number.div(r_number)
+                    elif op == AND:
+                        stack[sp - 1] = l_number._and(r_number)
+                    elif op == OR:
+                        stack[sp - 1] = l_number._or(r_number)
+                    elif op == EQ:
+                        stack[sp - 1] = l_number.eq_f(r_number)
+                    elif op == GT:
+                        stack[sp - 1] = l_number.gt_f(r_number)
+                    elif op == LT:
+                        stack[sp - 1] = l_number.lt_f(r_number)
+                    pc += 1
+            except:
+                index = code.find_handler(pc)
+                if index == -1:
+                    raise
+                sp = code.handlers[index + 2]
+                stack[sp] = datatype.NULL_INST
+                sp += 1
+                pc = code.handlers[index + 1]
+        return stack[sp - 1]
+
+    def bowl_get(self, bowl, nn):
+        """ FuncBowl과 같이 bowl에서 nn을 noodle number로 가지는 Noodle의 값을
+        반환합니다.
+
+        :param bowl: Noodle을 가져올 Bowl
+        :type bowl: datatype.Bowl
+        :param nn: 가져올 Noodle의 noodle number
+        :type nn: datatype.Number
+        :return: Noodle의 expr을 평가한 결과
+        :rtype: datatype.Value
+        """
+        try:
+            noodle = bowl.get_noodle(nn)
+        except KeyError:
+            return datatype.NULL_INST
+        return self.safe_value(noodle.expr())
@@ -7,6 +7,8 @@ def jitpolicy(driver):
 
 
 def target(*args):
+    from bibim import mode
+    mode.translating = True
     from bibim.bibim import entry_point
     return entry_point, None
 
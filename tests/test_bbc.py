@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+""" .bbc 파일을 쓰고 읽는 bibim.bbc를 확인합니다. """
+from __future__ import print_function
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from bibim import bbc  # noqa: E402
+from bibim.interpreter import Interpreter  # noqa: E402
+
+BIG = "123456789012345678901234567890"
+SOURCE = "{[0; @:2 = %s]}" % (BIG,)
+
+
+def dumps(source):
+    key = bbc.source_key(source)
+    return bbc.dumps(Interpreter().parse(source), key), key
+
+
+def big_reader(*payloads):
+    """ payloads를 TAG_BIG의 분자와 분모로 기록한 BowlReader를 반환합니다. """
+    writer = bbc.BowlWriter()
+    writer.write_tag(bbc.TAG_BIG)
+    for payload in payloads:
+        writer.write_str(payload)
+    return bbc.BowlReader(writer.result(), 0)
+
+
+def read_number(reader):
+    return reader.read_number(reader.read_tag())
+
+
+def test_big_number_round_trip():
+    data, key = dumps(SOURCE)
+    bowl = bbc.loads(data, key)
+    assert BIG in bowl.log_string()
+    number = read_number(big_reader("-" + BIG + "1", "2"))
+    assert number.log_expr() == "-%s1/2" % (BIG,)
+
+
+@pytest.mark.parametrize("numerator, denominator", [
+    ("12x4", "1"),
+    (BIG, "1 "),
+    ("-", "1"),
+    ("", "1"),
+    ("+1", "1"),
+])
+def test_invalid_big_number(numerator, denominator):
+    with pytest.raises(bbc.CacheError):
+        read_number(big_reader(numerator, denominator))
+
+
+def test_truncated_big_number():
+    with pytest.raises(bbc.CacheError):
+        read_number(big_reader(BIG))
+
+
+def test_corrupt_big_number_is_ignored(tmpdir):
+    data, key = dumps(SOURCE)
+    assert data.count(BIG) == 1
+    corrupt = data.replace(BIG, BIG[:10] + "?" + BIG[11:])
+    with pytest.raises(bbc.CacheError):
+        bbc.loads(corrupt, key)
+    path = tmpdir.join("corrupt.bbc")
+    path.write_binary(corrupt)
+    assert bbc.read_cache(str(path), key) is None
+
+
+def test_write_cache_uses_own_tmp_file(tmpdir):
+    path = str(tmpdir.join("program.bbc"))
+    pid = os.getpid()
+    # 다른 writer가 아직 쓰는 중인 임시 파일은 건드리지 않습니다.
+    busy = tmpdir.join("program.bbc.%d.0.tmp" % (pid,))
+    busy.write_binary(b"partial")
+    bowl = Interpreter().parse(SOURCE)
+    key = bbc.source_key(SOURCE)
+    assert bbc.write_cache(path, key, bowl)
+    assert busy.read_binary() == b"partial"
+    assert BIG in bbc.read_cache(path, key).log_string()
+    assert sorted(os.listdir(str(tmpdir))) == [
+        "program.bbc", "program.bbc.%d.0.tmp" % (pid,)]
+
+
+def test_write_cache_removes_tmp_file_on_failure(tmpdir):
+    # 디렉터리가 이미 있는 경로로는 rename할 수 없습니다.
+    path = tmpdir.mkdir("program.bbc")
+    key = bbc.source_key(SOURCE)
+    assert not bbc.write_cache(str(path), key, Interpreter().parse(SOURCE))
+    assert os.listdir(str(tmpdir)) == ["program.bbc"]
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+""" tools/bbserve.py의 worker와 server를 확인합니다. """
+from __future__ import print_function
+
+import os
+import socket
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+import bbserve  # noqa: E402
+
+
+def request(header, body=b"", worker=None):
+    """ worker에 요청 하나를 처리하게 하고 응답을 반환합니다. """
+    if worker is None:
+        worker = bbserve.Worker(None, 1, 0)
+    client, server = socket.socketpair()
+    try:
+        bbserve.send_message(client, header, body)
+        worker.handle(server)
+        return bbserve.read_message(client)
+    finally:
+        client.close()
+        server.close()
+
+
+def job(source, args=None, worker=None):
+    header = {"source": len(source), "stdin": 0, "args": args or []}
+    return request(header, source, worker)
+
+
+def test_runs_program():
+    header, stdout = job(b"{[0; @:1 = {[0; 72] [1; 105]}]}")
+    assert header["status"] == 0
+    assert header["steps"] == 1
+    assert stdout == b"Hi"
+
+
+def test_exception_is_reported_and_worker_survives():
+    worker = bbserve.Worker(None, 2, 0)
+    header, _ = job(b"{[0; x]}", worker=worker)
+    assert header["status"] == bbserve.ERROR_STATUS
+    assert header["error"] == "LexingError: at index 5"
+    header, stdout = job(b"{[0; @:1 = {[0; 79] [1; 75]}]}", worker=worker)
+    assert header["status"] == 0
+    assert stdout == b"OK"
+
+
+def test_allowed_options():
+    header, stdout = job(b"{[0; @:1 = {[0; 86]}]}",
+                         ["--vm", "--buffer-size", "0"])
+    assert header["status"] == 0
+    assert stdout == b"V"
+
+
+def test_rejects_options_that_touch_files(tmpdir):
+    target = str(tmpdir.join("written"))
+    for args in (["--trace", target], ["--stats", target],
+                 ["--profile-stacks", target], ["--cache"],
+                 ["--cache-dir", target], ["--compile", target],
+                 ["--profile"], [target], ["--buffer-size"], [1]):
+        header, _ = job(b"{[0; @:1 = {[0; 86]}]}", args)
+        assert header["status"] == bbserve.BAD_REQUEST_STATUS, args
+        assert not os.path.exists(target)
+
+
+def test_serve_builds_parser_before_forking(tmpdir):
+    # 이미 parser를 import한 이 process 대신 새 process에서 확인합니다.
+    script = "\n".join([
+        "import sys",
+        "sys.path.insert(0, %r)" % os.path.join(ROOT, "tools"),
+        "import bbserve",
+        "assert 'bibim.parser' not in sys.modules",
+        "def fork_worker(sock, args):",
+        "    print('bibim.parser' in sys.modules)",
+        "    raise bbserve.ServerExit()",
+        "bbserve.fork_worker = fork_worker",
+        "bbserve.serve(bbserve.argparse.Namespace(",
+        "    socket=%r, workers=1, max_jobs=1, timeout=0))"
+        % str(tmpdir.join("sock")),
+    ])
+    output = subprocess.check_output([sys.executable, "-c", script],
+                                     stderr=open(os.devnull, "w"))
+    assert output.strip() == b"True"
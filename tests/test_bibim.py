@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+""" 실행 옵션에 따라 프로그램을 실행하는 bibim.bibim을 확인합니다. """
+from __future__ import print_function
+
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from bibim.bibim import execute  # noqa: E402
+from bibim.interpreter import Interpreter  # noqa: E402
+from bibim.mode import parse_options  # noqa: E402
+from bibim.stats import COUNTING  # noqa: E402
+from bibim.trace import TAG_END, TAG_STEP, TAG_WRITE, \
+    TraceReader  # noqa: E402
+
+# 두 번째 Noodle이 Number인 @:4를 Bowl처럼 수정하다가 AttributeError로 끝납니다.
+CRASH = "{[0; @:4 = 1] [1; @:4:2/7 = 8]}"
+
+
+def execute_source(tmpdir, source, *args):
+    """ source를 파일로 저장하고 args 옵션으로 실행합니다. """
+    path = tmpdir.join("program.bibim")
+    path.write(source)
+    stdout = os.open(os.devnull, os.O_WRONLY)
+    try:
+        argv = ["pybibim"] + list(args) + [str(path)]
+        return execute(Interpreter(stdout=stdout), parse_options(argv))
+    finally:
+        os.close(stdout)
+
+
+def test_trace_is_written_when_program_crashes(tmpdir):
+    trace = tmpdir.join("crash.bbt")
+    with pytest.raises(AttributeError):
+        execute_source(tmpdir, CRASH, "--trace", str(trace))
+    records = list(TraceReader(trace.read_binary()).records())
+    assert [tag for tag, _ in records if tag == TAG_STEP] == [TAG_STEP] * 2
+    assert records[-1] == (TAG_END, None)
+
+
+@pytest.mark.parametrize("mode", [[], ["--vm"]])
+def test_trace_records_writes_into_nested_bowls(tmpdir, mode):
+    trace = tmpdir.join("nested.bbt")
+    execute_source(tmpdir, "{[0; @:2 = {[0; 1]}] [1; @:2:0 = 5] "
+                   "[2; @:2:0 = {}] [3; @:2:0:1 = 7] [4; @:3 = @:2:0:1]}",
+                   "--trace", str(trace), *mode)
+    writes = [record for tag, record in
+              TraceReader(trace.read_binary()).records() if tag == TAG_WRITE]
+    assert writes == [("2", "{1 noodles}"), ("2:0", "5"),
+                      ("2:0", "{0 noodles}"), ("2:0:1", "7"), ("3", "7")]
+
+
+def test_stats_are_written_when_program_crashes(tmpdir):
+    stats = tmpdir.join("crash.json")
+    enabled = COUNTING.enabled
+    try:
+        with pytest.raises(AttributeError):
+            execute_source(tmpdir, CRASH, "--stats", str(stats))
+    finally:
+        COUNTING.enabled = enabled
+    result = json.loads(stats.read())
+    assert result["steps"] == 2
+    assert result["memory"]["writes"] == 1
+
+
+def test_profile_is_written_when_program_crashes(tmpdir):
+    stacks = tmpdir.join("crash.folded")
+    with pytest.raises(AttributeError):
+        execute_source(tmpdir, CRASH, "--profile-stacks", str(stacks))
+    assert "bibim;1:15_[1];body" in stacks.read()
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+""" 번역하지 않은 interpreter가 시작할 때 import하는 module을 확인합니다. """
+from __future__ import print_function
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+
+
+def modules_after(*lines):
+    """ 새 process에서 lines를 실행한 뒤 import된 module 이름의 목록을
+    반환합니다.
+    """
+    script = "\n".join(("import sys", "sys.path.insert(0, %r)" % SRC) +
+                       lines + ("print(' '.join(sorted(k for k, v in "
+                                "sys.modules.items() if v is not None)))",))
+    with open(os.devnull, "w") as devnull:
+        output = subprocess.check_output([sys.executable, "-c", script],
+                                         stderr=devnull)
+    return output.decode("ascii").split()
+
+
+def test_import_skips_translation_toolchain():
+    modules = modules_after("import bibim.bibim")
+    assert "bibim.bibim" in modules
+    for name in ("rply", "rpython.rlib.rthread", "rpython.rlib.rstring",
+                 "rpython.tool.version"):
+        assert name not in modules, name
+    assert len([name for name in modules
+                if name.startswith("rpython")]) <= 25
+
+
+def test_translation_uses_rpython_classes():
+    modules = modules_after(
+        "from bibim import mode",
+        "mode.translating = True",
+        "import bibim.bibim",
+        "from bibim import rlib",
+        "from rply.token import BaseBox",
+        "from rpython.rlib.rthread import ThreadLocalReference",
+        "assert rlib.BaseBox is BaseBox",
+        "assert rlib.ThreadLocalReference is ThreadLocalReference")
+    assert "rpython.rlib.rthread" in modules
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+""" 작은 Number를 공유하는 bibim.datatype.NumberCache를 확인합니다. """
+from __future__ import print_function
+
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from bibim.datatype import Number, NumberCache  # noqa: E402
+from bibim.interpreter import Interpreter  # noqa: E402
+from bibim.stats import COUNTING  # noqa: E402
+
+
+@pytest.fixture
+def counting():
+    enabled = COUNTING.enabled
+    COUNTING.enabled = True
+    yield
+    COUNTING.enabled = enabled
+
+
+def lookup(interpreter, cache, values):
+    previous = interpreter.enter()
+    try:
+        for value in values:
+            cache.number(value, 1)
+    finally:
+        interpreter.leave(previous)
+
+
+def test_counts_belong_to_running_interpreter(counting):
+    cache = NumberCache(size=4)
+    first = Interpreter()
+    second = Interpreter()
+    lookup(first, cache, [1, 1, 1, 5])
+    lookup(second, cache, [1])
+    assert (first.stats.cache_hits, first.stats.cache_misses,
+            first.stats.cache_evictions) == (2, 2, 1)
+    assert (second.stats.cache_hits, second.stats.cache_misses) == (0, 1)
+
+
+def test_entry_keeps_number_and_expr_together():
+    cache = NumberCache(size=2)
+    errors = []
+
+    def work(offset):
+        interpreter = Interpreter()
+        previous = interpreter.enter()
+        try:
+            for step in range(2000):
+                value = (step + offset) % 7
+                number = cache.number(value, 1)
+                expr = cache.value_expr(Number.from_ints(value))
+                if number.toint() != value or \
+                        expr.value().toint() != value:
+                    errors.append(value)
+        finally:
+            interpreter.leave(previous)
+
+    threads = [threading.Thread(target=work, args=(offset,))
+               for offset in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
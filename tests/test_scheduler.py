@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+""" 다음 Noodle을 찾는 bibim.scheduler와 Noodle을 찾는 bibim.datatype.Wad를
+확인합니다. 기대하는 출력은 모두 모든 noodle number를 매번 평가하던 원래
+interpreter의 출력과 같습니다.
+"""
+from __future__ import print_function
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from bibim.bibim import execute  # noqa: E402
+from bibim.datatype import Noodle, Number, ValueExpr, Wad, \
+    to_value_expr  # noqa: E402
+from bibim.interpreter import Interpreter  # noqa: E402
+from bibim.mode import parse_options  # noqa: E402
+
+MODES = [[], ["--vm"]]
+
+
+def print_char(code):
+    """ 문자 코드가 code인 문자 하나를 출력하는 Expr입니다. """
+    return "@:1 = {[0; %s]}" % (code,)
+
+
+def run(tmpdir, mode, *noodles):
+    """ (noodle number, Expr) 쌍으로 만든 프로그램을 실행한 출력을 반환합니다. """
+    path = tmpdir.join("program.bibim")
+    path.write("{%s}" % " ".join("[%s; %s]" % noodle for noodle in noodles))
+    output = tmpdir.join("output")
+    stdout = os.open(str(output), os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+    try:
+        execute(Interpreter(stdout=stdout),
+                parse_options(["pybibim"] + mode + [str(path)]))
+    finally:
+        os.close(stdout)
+    return output.read()
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_nested_bowl_write_invalidates_noodle_number(tmpdir, mode):
+    # @:2:0을 읽은 noodle number는 Bowl 안의 cell을 바꾸면 다시 평가합니다.
+    assert run(tmpdir, mode,
+               ("0", "@:2 = {[0; 5]}"),
+               ("1", "@:2:0 = 3/2"),
+               ("@:2:0", print_char(66)),
+               ("2", print_char(67))) == "BC"
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_noodle_number_reading_current_noodle_number(tmpdir, mode):
+    # 3 - @:0은 실행할 때마다 바뀌며, 1 다음에는 상수 2와 같은 값이 됩니다.
+    assert run(tmpdir, mode,
+               ("0", print_char(65)),
+               ("1", print_char(88)),
+               ("3 - @:0", print_char(66)),
+               ("2", print_char(67)),
+               ("4", print_char(68))) == "AXBD"
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_equal_noodle_numbers_run_earlier_noodle(tmpdir, mode):
+    assert run(tmpdir, mode,
+               ("1", print_char(65)),
+               ("0", print_char(90)),
+               ("1", print_char(66)),
+               ("2", print_char(67))) == "ZAC"
+    assert run(tmpdir, mode,
+               ("0", print_char(65)),
+               ("1", print_char(88)),
+               ("2", print_char(67)),
+               ("3 - @:0", print_char(66)),
+               ("4", print_char(68))) == "AXCD"
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_noodle_number_with_print_is_evaluated_every_time(tmpdir, mode):
+    # 'P'는 다음 Noodle을 찾을 때마다 noodle number를 평가하며 출력됩니다.
+    assert run(tmpdir, mode,
+               ("0", print_char(65)),
+               (print_char(80), print_char(88)),
+               ("1", print_char(66))) == "PAPBP"
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_noodle_number_with_memory_write_is_evaluated_every_time(tmpdir,
+                                                                 mode):
+    # @:3은 다음 Noodle을 찾은 횟수를 셉니다.
+    assert run(tmpdir, mode,
+               ("0", "@:3 = 0"),
+               ("@:3 = @:3 + 1", print_char(88)),
+               ("1", print_char("64 + @:3")),
+               ("2", print_char("64 + @:3"))) == "AB"
+
+
+def noodle(nn, value):
+    return Noodle(to_value_expr(Number.from_ints(nn)),
+                  ValueExpr(Number.from_ints(value)))
+
+
+def test_dense_wad_switches_to_index():
+    wad = Wad(None)
+    for position in range(3):
+        wad.put(noodle(position, 10 + position))
+    assert wad.is_dense()
+    assert wad.find(Number.from_ints(2)).expr().value().toint() == 12
+    with pytest.raises(KeyError):
+        wad.find(Number.from_ints(5))
+
+    wad.put(noodle(5, 15))
+    wad.put(noodle(1, 21))
+    assert not wad.is_dense()
+    for nn, value in [(0, 10), (1, 11), (2, 12), (5, 15)]:
+        assert wad.find(Number.from_ints(nn)).expr().value().toint() == value
+    with pytest.raises(KeyError):
+        wad.find(Number.from_ints(3))
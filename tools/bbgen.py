@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+""" 크기와 모양을 조절할 수 있는 Bibim 프로그램을 만듭니다.
+
+Noodle 수, noodle number가 평가가 필요한 Expr인 Noodle의 비율, 사용하는 Memory
+cell 수, 반복문의 반복 횟수, 중첩된 Bowl의 깊이와 주석의 비율을 정할 수 있습니다.
+같은 seed로는 항상 같은 프로그램을 만들며, 프로그램이 출력해야 하는 내용의 길이와
+sha1 checksum을 표준 오류로 출력합니다.
+
+만드는 프로그램은 다음 순서로 실행됩니다.
+
+1. @:2에 base를 대입합니다. noodle number가 Expr인 Noodle은 @:2 + k 꼴입니다.
+2. Memory cell을 'A'부터 'Z' 사이의 값으로 초기화합니다.
+3. 다른 cell을 읽어 cell에 쓰거나, cell의 값을 문자로 출력하거나, 중첩된 Bowl에서
+   꺼낸 문자를 출력합니다.
+4. 반복 횟수만큼 '.'을 출력하는 반복문을 실행하고 줄바꿈을 출력합니다.
+
+사용법::
+
+    python tools/bbgen.py [--noodles N] [--dynamic RATIO] [--cells N]
+                          [--loop N] [--depth N] [--comments RATIO]
+                          [--shuffle] [--seed N] [-o FILE] [--expected FILE]
+"""
+from __future__ import print_function
+
+import argparse
+import hashlib
+import random
+import sys
+
+# 반복문과 base가 사용하는 cell
+BASE_CELL = 2
+COUNTER_CELL = 3
+LOOP_CELL = 4
+EXIT_CELL = 5
+# 프로그램이 값을 저장하는 첫 번째 cell
+FIRST_CELL = 10
+
+FIRST_CHAR = ord("A")
+LAST_CHAR = ord("Z")
+
+WORDS = ["noodle", "bowl", "wad", "rice", "sesame", "egg", "carrot",
+         "spinach", "sprout", "gochujang", "memory", "number"]
+
+
+class Generator(object):
+    """ 프로그램의 Noodle과 그 실행 결과를 함께 만드는 class입니다. """
+
+    def __init__(self, args):
+        """ args의 설정으로 프로그램을 만들 새로운 Generator를 생성합니다.
+
+        :param args: 명령행 인자
+        :type args: argparse.Namespace
+        """
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.base = args.noodles // 2
+        self.values = []
+        self.output = []
+
+    def nn(self, position):
+        """ position번째로 실행될 Noodle의 noodle number Expr을 반환합니다.
+
+        :type position: int
+        :rtype: str
+        """
+        if position == 0 or self.random.random() >= self.args.dynamic:
+            return str(position)
+        return "@:%d %s" % (BASE_CELL, offset(position - self.base))
+
+    def below(self, n):
+        """ 0 이상 n 미만의 정수를 반환합니다.
+
+        random.randrange는 Python 버전마다 결과가 다르므로, 모든 버전에서 같은
+        random()만 사용합니다.
+
+        :type n: int
+        :rtype: int
+        """
+        return int(self.random.random() * n)
+
+    def char(self):
+        return FIRST_CHAR + self.below(LAST_CHAR - FIRST_CHAR + 1)
+
+    def cell(self, index):
+        return "@:%d" % (FIRST_CELL + index,)
+
+    def body(self, position):
+        """ position번째로 실행될 Noodle의 Expr을 반환하고, 그 결과를 기록합니다.
+
+        :type position: int
+        :rtype: str
+        """
+        if position == 0:
+            return "@:%d = %d" % (BASE_CELL, self.base)
+        index = position - 1
+        if index < self.args.cells:
+            value = self.char()
+            self.values.append(value)
+            return "%s = %d" % (self.cell(index), value)
+        if not self.values:
+            value = self.char()
+            self.output.append(value)
+            return "@:1 = {[0; %d]}" % (value,)
+        choice = self.random.random()
+        if choice < 0.6:
+            target = self.below(len(self.values))
+            source = self.below(len(self.values))
+            value = self.char()
+            expr = "%s = %s %s" % (self.cell(target), self.cell(source),
+                                   offset(value - self.values[source]))
+            self.values[target] = value
+            return expr
+        source = self.below(len(self.values))
+        self.output.append(self.values[source])
+        if choice < 0.85 or self.args.depth == 0:
+            return "@:1 = {[0; %s]}" % (self.cell(source),)
+        inner = self.cell(source)
+        for _ in range(self.args.depth):
+            inner = "{[0; %s]}" % (inner,)
+        return "@:1 = {[0; %s%s]}" % (inner, ":0" * self.args.depth)
+
+    def comment(self):
+        return "~# %s #~" % " ".join(WORDS[self.below(len(WORDS))]
+                                    for _ in range(1 + self.below(8)))
+
+    def loop(self, start):
+        """ start부터 실행되는 반복문과 마지막 줄바꿈의 Noodle 목록을 반환합니다.
+
+        :type start: int
+        :rtype: list[str]
+        """
+        iterations = self.args.loop
+        self.output.extend([ord(".")] * iterations + [ord("\n")])
+        if iterations == 0:
+            return ["[%d; @:1 = {[0; 10]}]" % (start,)]
+        return [
+            "[%d; @:%d = 0]" % (start, COUNTER_CELL),
+            "[%d; @:%d = @:0 + 1]" % (start + 1, LOOP_CELL),
+            "[@:%d + 0; @:%d = @:%d + 1]" % (LOOP_CELL, COUNTER_CELL,
+                                            COUNTER_CELL),
+            "[@:%d + 1; @:1 = {[0; 46]}]" % (LOOP_CELL,),
+            "[@:%d + 2; {\n"
+            "        [0; @:%d = @:0 + 1]\n"
+            "        [1; @:%d = @:0 + 1]\n"
+            "    }:(@:%d < %d)]" % (LOOP_CELL, EXIT_CELL, LOOP_CELL,
+                                    COUNTER_CELL, iterations),
+            "[@:%d + 0; @:1 = {[0; 10]}]" % (EXIT_CELL,),
+        ]
+
+    def program(self):
+        """ 프로그램 code를 반환합니다.
+
+        :rtype: str
+        """
+        noodles = []
+        for position in range(self.args.noodles):
+            nn = self.nn(position)
+            noodles.append("[%s; %s]" % (nn, self.body(position)))
+        if self.args.shuffle:
+            # 실행 순서는 noodle number가 정하므로 Wad 안의 순서만 바뀝니다.
+            for i in range(len(noodles) - 1, 0, -1):
+                j = self.below(i + 1)
+                noodles[i], noodles[j] = noodles[j], noodles[i]
+        noodles.extend(self.loop(self.args.noodles))
+        lines = ["{"]
+        for noodle in noodles:
+            lines.append("    " + noodle)
+            if self.random.random() < self.args.comments:
+                lines.append("    " + self.comment())
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    def expected_output(self):
+        return "".join(chr(c) for c in self.output)
+
+
+def offset(k):
+    if k < 0:
+        return "- %d" % (-k,)
+    return "+ %d" % (k,)
+
+
+def ratio(value):
+    number = float(value)
+    if not 0 <= number <= 1:
+        raise argparse.ArgumentTypeError("%s is not between 0 and 1" % value)
+    return number
+
+
+def count(value):
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError("%s is negative" % value)
+    return number
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        description="Generate a Bibim program for scaling tests")
+    parser.add_argument("--noodles", type=count, default=1000,
+                        help="number of noodles before the loop")
+    parser.add_argument("--dynamic", type=ratio, default=0.2,
+                        help="share of noodles whose noodle number reads "
+                             "memory")
+    parser.add_argument("--cells", type=count, default=100,
+                        help="number of memory cells the program uses")
+    parser.add_argument("--loop", type=count, default=100,
+                        help="iterations of the final loop")
+    parser.add_argument("--depth", type=count, default=2,
+                        help="nesting depth of the bowls printed from")
+    parser.add_argument("--comments", type=ratio, default=0.1,
+                        help="share of noodles followed by a comment")
+    parser.add_argument("--shuffle", action="store_true",
+                        help="write the noodles in random order")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="random seed")
+    parser.add_argument("-o", "--output", default=None,
+                        help="write the program to FILE instead of stdout")
+    parser.add_argument("--expected", default=None,
+                        help="write the expected output to FILE")
+    args = parser.parse_args(argv[1:])
+    if args.cells >= args.noodles:
+        parser.error("--cells must be smaller than --noodles")
+
+    generator = Generator(args)
+    program = generator.program()
+    expected = generator.expected_output()
+    if args.output is None:
+        sys.stdout.write(program)
+    else:
+        with open(args.output, "w") as f:
+            f.write(program)
+    if args.expected is not None:
+        with open(args.expected, "w") as f:
+            f.write(expected)
+    sys.stderr.write("expected output: %d bytes, sha1 %s\n" % (
+        len(expected), hashlib.sha1(expected.encode("ascii")).hexdigest()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
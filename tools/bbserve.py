@@ -0,0 +1,483 @@
+# -*- coding: utf-8 -*-
+""" 미리 fork한 worker로 Bibim 프로그램을 실행하는 server와 그 client입니다.
+
+serve는 lexer와 parser를 한 번만 import한 뒤 worker를 fork하므로, 작업마다 Python을
+새로 시작하거나 parser table을 다시 만들지 않습니다. worker는 Unix socket으로 받은
+작업마다 새 Interpreter를 만들어 실행하므로 작업 사이에 Memory나 입출력이 섞이지
+않습니다. worker는 작업을 --max-jobs개 처리하면 종료하고, server가 새 worker를
+fork해서 memory 사용량이 계속 늘어나지 않게 합니다. 작업 하나가 --timeout초를
+넘으면 그때까지의 출력을 보내고 worker를 종료합니다.
+
+connection 하나로 작업 하나를 주고받습니다. 요청과 응답은 모두 JSON header 한 줄과
+header가 길이를 알려주는 byte들로 이루어집니다.
+
+- 요청: {"source": 길이, "stdin": 길이, "args": [옵션, ...]} 다음에 source와
+  stdin. args에는 파일을 쓰거나 경로를 받지 않는 실행 옵션(ALLOWED_OPTIONS)만
+  줄 수 있습니다.
+- 응답: {"status": 종료 status, "stdout": 길이, "time": 실행 시간(초),
+  "steps": 실행한 step 수, "worker": pid, "job": worker가 처리한 작업 번호}
+  다음에 stdout. 실패하면 "error"에 이유를 담습니다.
+
+run은 server에 작업 하나를 보내고, 받은 stdout을 출력한 뒤 종료 status로
+종료합니다. serve는 Python 2로 실행해야 하지만, run은 Python 3에서도 동작합니다.
+
+사용법::
+
+    python tools/bbserve.py serve SOCKET [--workers N] [--max-jobs K]
+                                         [--timeout SEC]
+    python tools/bbserve.py run SOCKET FILE [--stdin FILE] [-- OPTION ...]
+"""
+from __future__ import print_function
+
+import argparse
+import errno
+import json
+import os
+import signal
+import socket
+import stat
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+# 요청 header 한 줄의 최대 길이 (byte)
+MAX_HEADER_SIZE = 65536
+RECV_SIZE = 65536
+# 실행 중 예외가 난 작업, 시간 제한을 넘은 작업과 잘못된 요청의 종료 status
+ERROR_STATUS = 1
+TIMEOUT_STATUS = 124
+BAD_REQUEST_STATUS = 2
+# 작업에 줄 수 있는 실행 옵션과, 그 옵션이 값을 받는지 여부. server 사용자의
+# 권한으로 파일을 쓰거나 읽는 --cache, --compile, --profile, --trace, --stats
+# 등은 받지 않습니다.
+ALLOWED_OPTIONS = {
+    "--vm": False,
+    "--line-buffered": False,
+    "--stream-input": False,
+    "--buffer-size": True,
+    "--input-delimiter": True,
+}
+
+
+class ProtocolError(Exception):
+    """ 요청이나 응답의 형식이 잘못되었을 때 발생하는 예외입니다. """
+
+
+class ServerExit(Exception):
+    """ server가 종료 signal을 받았을 때 발생하는 예외입니다. """
+
+
+def recv_line(conn, buffered, limit):
+    """ 줄바꿈까지 읽은 한 줄과 그 뒤에 이미 받은 data를 반환합니다.
+
+    :type conn: socket.socket
+    :param buffered: 이미 받은 data
+    :type buffered: bytes
+    :type limit: int
+    :rtype: (bytes, bytes)
+    """
+    while b"\n" not in buffered:
+        if len(buffered) > limit:
+            raise ProtocolError("header is too long")
+        data = conn.recv(RECV_SIZE)
+        if not data:
+            raise ProtocolError("connection closed before the header")
+        buffered += data
+    line, rest = buffered.split(b"\n", 1)
+    return line, rest
+
+
+def recv_exact(conn, buffered, size):
+    """ buffered에 이어서 size byte를 채워 반환합니다.
+
+    :type conn: socket.socket
+    :type buffered: bytes
+    :type size: int
+    :rtype: bytes
+    """
+    chunks = [buffered]
+    length = len(buffered)
+    while length < size:
+        data = conn.recv(min(RECV_SIZE, size - length))
+        if not data:
+            raise ProtocolError("connection closed before %d bytes" % size)
+        chunks.append(data)
+        length += len(data)
+    return b"".join(chunks)
+
+
+def send_message(conn, header, body):
+    conn.sendall(json.dumps(header, sort_keys=True).encode("ascii") + b"\n" +
+                 body)
+
+
+def read_message(conn):
+    """ conn에서 JSON header와, header의 길이 field만큼의 body를 읽습니다.
+
+    :rtype: (dict, bytes)
+    """
+    line, rest = recv_line(conn, b"", MAX_HEADER_SIZE)
+    try:
+        header = json.loads(line.decode("utf-8"))
+    except ValueError:
+        raise ProtocolError("header is not JSON")
+    if not isinstance(header, dict):
+        raise ProtocolError("header is not a JSON object")
+    size = 0
+    for field in ("source", "stdin", "stdout"):
+        length = header.get(field, 0)
+        if not isinstance(length, int) or length < 0:
+            raise ProtocolError("%s must be a non-negative integer" % field)
+        size += length
+    if len(rest) > size:
+        raise ProtocolError("more data than the header announced")
+    return header, recv_exact(conn, rest, size)
+
+
+def check_args(args):
+    """ args가 작업에 줄 수 있는 실행 옵션으로만 이루어졌는지 확인합니다.
+
+    :type args: list
+    :raise ProtocolError: 허용하지 않는 옵션이나 파일 이름이 있을 때
+    """
+    if not isinstance(args, list):
+        raise ProtocolError("args must be a list of strings")
+    index = 0
+    while index < len(args):
+        arg = args[index]
+        if not isinstance(arg, basestring):
+            raise ProtocolError("args must be a list of strings")
+        if arg not in ALLOWED_OPTIONS:
+            raise ProtocolError("option %s is not allowed" % (arg,))
+        if ALLOWED_OPTIONS[arg]:
+            index += 1
+            if index == len(args) or \
+                    not isinstance(args[index], basestring):
+                raise ProtocolError("option %s needs a value" % (arg,))
+        index += 1
+
+
+def describe_error(error):
+    """ 작업 중에 난 예외를 응답의 "error"에 담을 한 줄로 만듭니다.
+
+    rply의 LexingError처럼 message가 비어 있고 source 위치만 가진 예외는 위치를
+    덧붙입니다.
+
+    :type error: Exception
+    :rtype: str
+    """
+    parts = [str(error)]
+    if hasattr(error, "getsourcepos"):
+        parts.append("at index %d" % (error.getsourcepos().idx,))
+    return "%s: %s" % (type(error).__name__,
+                       " ".join(part for part in parts if part))
+
+
+def read_fd(fd):
+    os.lseek(fd, 0, os.SEEK_SET)
+    chunks = []
+    while True:
+        data = os.read(fd, RECV_SIZE)
+        if not data:
+            return b"".join(chunks)
+        chunks.append(data)
+
+
+class Worker(object):
+    """ listening socket에서 작업을 받아 실행하는 worker process입니다. """
+
+    def __init__(self, sock, max_jobs, timeout):
+        """ 새로운 Worker를 생성합니다.
+
+        :param sock: 작업을 받을 listening socket
+        :type sock: socket.socket
+        :param max_jobs: 종료하기 전까지 처리할 작업 수
+        :type max_jobs: int
+        :param timeout: 작업 하나의 시간 제한 (초). 0이면 제한하지 않습니다.
+        :type timeout: int
+        """
+        self.sock = sock
+        self.max_jobs = max_jobs
+        self.timeout = timeout
+        self.jobs = 0
+
+    def loop(self):
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        # Ctrl-C는 server가 받아서 worker를 종료합니다.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        while self.jobs < self.max_jobs:
+            conn, _ = self.sock.accept()
+            self.jobs += 1
+            try:
+                self.handle(conn)
+            except socket.error:
+                # client가 응답을 받기 전에 연결을 끊었습니다.
+                pass
+            finally:
+                conn.close()
+
+    def handle(self, conn):
+        """ conn으로 받은 작업 하나를 실행하고 결과를 보냅니다.
+
+        :type conn: socket.socket
+        """
+        try:
+            header, body = read_message(conn)
+            args = header.get("args", [])
+            check_args(args)
+        except ProtocolError as e:
+            send_message(conn, self.result(BAD_REQUEST_STATUS, 0.0, 0,
+                                           error=str(e)), b"")
+            return
+        source = body[:header.get("source", 0)]
+        stdin = body[len(source):]
+        stdin_file = tempfile.TemporaryFile()
+        stdout_file = tempfile.TemporaryFile()
+        fd, path = tempfile.mkstemp(suffix=".bibim")
+        try:
+            os.write(fd, source)
+            os.close(fd)
+            stdin_file.write(stdin)
+            stdin_file.seek(0)
+            start = time.time()
+            self.set_alarm(conn, start, stdout_file.fileno())
+            error = None
+            try:
+                status, steps = run_job(path, [str(arg) for arg in args],
+                                        stdin_file.fileno(),
+                                        stdout_file.fileno())
+            except Exception as e:
+                # lexer의 LexingError처럼 interpreter가 처리하지 않은 예외는
+                # 작업 하나의 실패로 돌려주고, worker는 다음 작업을 받습니다.
+                status, steps = ERROR_STATUS, 0
+                error = describe_error(e)
+            finally:
+                signal.alarm(0)
+            elapsed = time.time() - start
+            output = read_fd(stdout_file.fileno())
+            send_message(conn, self.result(status, elapsed, steps,
+                                           stdout=len(output), error=error),
+                         output)
+        finally:
+            os.unlink(path)
+            stdin_file.close()
+            stdout_file.close()
+
+    def set_alarm(self, conn, start, stdout_fd):
+        """ 시간 제한을 넘으면 그때까지의 출력을 보내고 worker를 종료하도록
+        SIGALRM을 설정합니다.
+        """
+        if self.timeout <= 0:
+            return
+
+        def on_timeout(signum, frame):
+            # interpreter는 모든 예외를 Null로 바꾸는 곳이 있으므로 예외 대신
+            # 여기서 응답을 보내고 바로 종료합니다.
+            try:
+                output = read_fd(stdout_fd)
+                send_message(conn, self.result(
+                    TIMEOUT_STATUS, time.time() - start, 0,
+                    stdout=len(output), error="timeout"), output)
+            finally:
+                os._exit(0)
+        signal.signal(signal.SIGALRM, on_timeout)
+        signal.alarm(self.timeout)
+
+    def result(self, status, elapsed, steps, stdout=0, error=None):
+        header = {"status": status, "stdout": stdout, "time": elapsed,
+                  "steps": steps, "worker": os.getpid(), "job": self.jobs}
+        if error is not None:
+            header["error"] = error
+        return header
+
+
+def run_job(path, args, stdin_fd, stdout_fd):
+    """ path의 프로그램을 pybibim.py와 같은 옵션으로 실행합니다.
+
+    :return: 종료 status와 실행한 step 수
+    :rtype: (int, int)
+    """
+    from bibim.bibim import execute
+    from bibim.interpreter import Interpreter
+    from bibim.mode import USAGE, OptionError, parse_options
+    try:
+        options = parse_options(["bbserve"] + args + [path])
+    except OptionError as e:
+        os.write(stdout_fd, e.msg + "\n")
+        if e.show_usage:
+            os.write(stdout_fd, USAGE + "\n")
+        return 1, 0
+    interpreter = Interpreter(stdin=stdin_fd, stdout=stdout_fd)
+    return execute(interpreter, options), interpreter.stats.steps
+
+
+def fork_worker(sock, args):
+    pid = os.fork()
+    if pid != 0:
+        return pid
+    status = 0
+    try:
+        Worker(sock, args.max_jobs, args.timeout).loop()
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+        status = 1
+    finally:
+        os._exit(status)
+
+
+def listen(path):
+    """ path에 Unix socket을 만들어 반환합니다. 남아 있던 socket 파일은
+    지웁니다.
+
+    :type path: str
+    :rtype: socket.socket
+    """
+    try:
+        if stat.S_ISSOCK(os.stat(path).st_mode):
+            os.unlink(path)
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    sock.listen(socket.SOMAXCONN)
+    return sock
+
+
+def preload():
+    """ worker를 fork하기 전에 lexer와 parser를 만듭니다.
+
+    Interpreter.parse는 lexer와 parser를 처음 사용할 때 import하므로, 여기서
+    미리 import하지 않으면 worker마다 첫 작업에서 parser table을 만듭니다.
+    """
+    import bibim.bibim  # noqa: F401
+    import bibim.lexer  # noqa: F401
+    import bibim.parser  # noqa: F401
+
+
+def serve(args):
+    preload()
+
+    def stop(signum, frame):
+        raise ServerExit()
+
+    sock = listen(args.socket)
+    workers = set()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    print("serving on %s with %d workers" % (args.socket, args.workers),
+          file=sys.stderr)
+    try:
+        while True:
+            while len(workers) < args.workers:
+                workers.add(fork_worker(sock, args))
+            try:
+                pid, _ = os.wait()
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+            workers.discard(pid)
+    except ServerExit:
+        pass
+    finally:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+            except OSError:
+                pass
+        sock.close()
+        os.unlink(args.socket)
+    return 0
+
+
+def request(path, source, stdin, args):
+    """ path의 server에 작업을 보내고 응답 header와 stdout을 반환합니다.
+
+    :type path: str
+    :type source: bytes
+    :type stdin: bytes
+    :type args: list[str]
+    :rtype: (dict, bytes)
+    """
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(path)
+        send_message(conn, {"source": len(source), "stdin": len(stdin),
+                            "args": args}, source + stdin)
+        return read_message(conn)
+    finally:
+        conn.close()
+
+
+def run(args):
+    with open(args.file, "rb") as f:
+        source = f.read()
+    stdin = b""
+    if args.stdin == "-":
+        stdin = getattr(sys.stdin, "buffer", sys.stdin).read()
+    elif args.stdin is not None:
+        with open(args.stdin, "rb") as f:
+            stdin = f.read()
+    try:
+        header, stdout = request(args.socket, source, stdin, args.args)
+    except (socket.error, ProtocolError) as e:
+        print("Cannot run %s on %s: %s" % (args.file, args.socket, e),
+              file=sys.stderr)
+        return 1
+    out = getattr(sys.stdout, "buffer", sys.stdout)
+    out.write(stdout)
+    out.flush()
+    message = "time: %.3f ms, steps: %d, worker: %d, job: %d" % (
+        header["time"] * 1000, header["steps"], header["worker"],
+        header["job"])
+    if "error" in header:
+        message += ", error: %s" % (header["error"],)
+    print(message, file=sys.stderr)
+    return header["status"]
+
+
+def positive(value):
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError("%s is not positive" % value)
+    return number
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="PyBibim pre-fork server")
+    subparsers = parser.add_subparsers(dest="command")
+    serve_parser = subparsers.add_parser("serve", help="start the server")
+    serve_parser.add_argument("socket", help="path of the Unix socket")
+    serve_parser.add_argument("--workers", type=positive, default=4,
+                              help="number of worker processes")
+    serve_parser.add_argument("--max-jobs", type=positive, default=1000,
+                              help="jobs a worker runs before it is replaced")
+    serve_parser.add_argument("--timeout", type=int, default=0,
+                              help="seconds a job may run (0: no limit)")
+    run_parser = subparsers.add_parser("run", help="run a program on a server")
+    run_parser.add_argument("socket", help="path of the Unix socket")
+    run_parser.add_argument("file", help="Bibim source file")
+    run_parser.add_argument("--stdin", default=None,
+                            help="file to use as stdin ('-' for this "
+                                 "process's stdin)")
+    run_parser.add_argument("args", nargs="*",
+                            help="pybibim.py options, after '--'")
+    args = parser.parse_args(argv[1:])
+    if args.command is None:
+        parser.print_usage()
+        return 1
+    if args.command == "serve":
+        return serve(args)
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
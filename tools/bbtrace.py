@@ -0,0 +1,130 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+""" pybibim.py --trace로 기록한 trace 파일을 요약하거나 다시 보여줍니다.
+
+summary는 실행한 step 수, Noodle별 실행 횟수, Memory cell별 쓰기 횟수와 마지막
+값을 출력합니다. replay는 실행한 Noodle과 Memory cell에 쓴 값을 실행 순서대로
+출력합니다.
+
+trace를 읽는 code가 rpython을 사용하므로 Python 2와 rpython이 필요합니다.
+
+사용법::
+
+    python2 tools/bbtrace.py summary TRACE [--top N]
+    python2 tools/bbtrace.py replay TRACE [--limit N]
+"""
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+
+if sys.version_info[0] != 2:
+    sys.exit("bbtrace.py needs Python 2 and rpython; "
+             "run it as: python2 tools/bbtrace.py ...")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from bibim.trace import TraceReader, TraceError, TAG_NOODLE, TAG_STEP, \
+    TAG_WRITE  # noqa: E402
+
+
+def noodle_label(reader, noodle_id):
+    position, label = reader.noodles[noodle_id]
+    return "%s [%s]" % (position, label)
+
+
+def summary(reader, top):
+    """ trace를 요약해서 출력합니다.
+
+    :param reader: trace를 읽을 TraceReader
+    :type reader: TraceReader
+    :param top: 출력할 Noodle과 cell의 최대 수
+    :type top: int
+    """
+    steps = 0
+    writes = 0
+    step_counts = {}
+    write_counts = {}
+    last_values = {}
+    for tag, record in reader.records():
+        if tag == TAG_STEP:
+            steps += 1
+            step_counts[record[0]] = step_counts.get(record[0], 0) + 1
+        elif tag == TAG_WRITE:
+            writes += 1
+            nn, value = record
+            write_counts[nn] = write_counts.get(nn, 0) + 1
+            last_values[nn] = value
+    print("steps: %d, memory writes: %d, noodles: %d, cells: %d"
+          % (steps, writes, len(reader.noodles), len(write_counts)))
+    print()
+    print("%10s  %s" % ("steps", "noodle"))
+    for noodle_id, count in sorted(step_counts.items(),
+                                   key=lambda item: -item[1])[:top]:
+        print("%10d  %s" % (count, noodle_label(reader, noodle_id)))
+    print()
+    print("%10s  %-20s %s" % ("writes", "cell", "last value"))
+    for nn, count in sorted(write_counts.items(),
+                            key=lambda item: -item[1])[:top]:
+        print("%10d  %-20s %s" % (count, "@:" + nn, last_values[nn]))
+
+
+def replay(reader, limit):
+    """ 실행한 Noodle과 Memory cell에 쓴 값을 순서대로 출력합니다.
+
+    :param reader: trace를 읽을 TraceReader
+    :type reader: TraceReader
+    :param limit: 출력할 최대 step 수. None이면 모두 출력합니다.
+    :type limit: int|None
+    """
+    steps = 0
+    for tag, record in reader.records():
+        if tag == TAG_STEP:
+            if limit is not None and steps >= limit:
+                break
+            steps += 1
+            noodle_id, nn = record
+            print("#%d %s -> %s" % (steps, noodle_label(reader, noodle_id),
+                                    nn))
+        elif tag == TAG_WRITE:
+            nn, value = record
+            print("    @:%s = %s" % (nn, value))
+        elif tag != TAG_NOODLE:
+            break
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="PyBibim trace tool")
+    subparsers = parser.add_subparsers(dest="command")
+    summary_parser = subparsers.add_parser("summary",
+                                           help="summarise a trace")
+    summary_parser.add_argument("trace")
+    summary_parser.add_argument("--top", type=int, default=20,
+                                help="number of noodles and cells to show")
+    replay_parser = subparsers.add_parser("replay", help="replay a trace")
+    replay_parser.add_argument("trace")
+    replay_parser.add_argument("--limit", type=int, default=None,
+                               help="number of steps to show")
+    args = parser.parse_args(argv[1:])
+    if args.command is None:
+        parser.print_usage()
+        return 1
+
+    with open(args.trace, "rb") as f:
+        data = f.read()
+    try:
+        reader = TraceReader(data)
+        if args.command == "summary":
+            summary(reader, args.top)
+        else:
+            replay(reader, args.limit)
+    except TraceError as e:
+        print("Cannot read trace %s: %s" % (args.trace, e.msg))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))